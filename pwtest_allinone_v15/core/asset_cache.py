@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+ASSET_CACHE_DIR_NAME = "asset_cache"
+
+# response headers worth replaying when serving from the cache
+KEEP_HEADERS = ("content-type", "access-control-allow-origin", "etag", "last-modified", "cache-control")
+
+_VERSION_QUERY_RE = re.compile(r"(?:^|&)(?:v|ver|version|rev)=[^&]+")
+_HASHED_NAME_RE = re.compile(r"[.\-_][0-9a-f]{8,}\.(?:js|css)$", re.IGNORECASE)
+
+
+def is_versioned_url(url: str) -> bool:
+    """True when the URL carries its own version (query or hashed file name) and can be treated as immutable."""
+    try:
+        u = urlparse(url or "")
+    except Exception:
+        return False
+    return bool(_VERSION_QUERY_RE.search(u.query or "") or _HASHED_NAME_RE.search(u.path or ""))
+
+
+def is_cacheable_response(status: int, headers: Dict[str, str]) -> bool:
+    cc = str((headers or {}).get("cache-control", "")).lower()
+    return int(status) == 200 and "no-store" not in cc and "private" not in cc
+
+
+class AssetCache:
+    """Content-addressed on-disk cache of static scripts/stylesheets.
+
+    Bodies are stored once per SHA-256 under ``objects/``; ``index.json``
+    maps URL -> {sha, headers, ts, used, size}. Versioned URLs are served
+    without revalidation; others are fresh for ``ttl_s`` and then need a
+    conditional refetch (``validators``) before they are served again.
+    The total size of referenced objects is kept under ``max_bytes`` by
+    evicting the least recently used URLs.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 64 * 1024 * 1024, ttl_s: float = 6 * 3600.0):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.json")
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_s = max(0.0, float(ttl_s))
+        self._index: Dict[str, Dict[str, Any]] = self._load()
+        self._evicted = set()
+        self._dirty = False
+        self.hits = 0
+        self.stored = 0
+        self.revalidated = 0
+        self.bytes_served = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f) or {}
+                if isinstance(data, dict):
+                    return {k: v for k, v in data.items() if isinstance(v, dict) and v.get("sha")}
+        except Exception:
+            pass
+        return {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _object_path(self, sha: str) -> str:
+        return os.path.join(self.objects_dir, sha[:2], sha)
+
+    def _read(self, ent: Dict[str, Any]) -> Optional[bytes]:
+        try:
+            with open(self._object_path(ent["sha"]), "rb") as f:
+                return f.read()
+        except Exception:
+            return None
+
+    def lookup(self, url: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """{"body", "headers", "fresh"} for a cached URL, or None. Stale entries still return (for revalidation)."""
+        ent = self._index.get(url)
+        if not ent:
+            return None
+        body = self._read(ent)
+        if body is None:
+            self._index.pop(url, None)
+            self._evicted.add(url)
+            self._dirty = True
+            return None
+        now = time.time() if now is None else now
+        fresh = bool(ent.get("versioned")) or now - float(ent.get("ts", 0) or 0) <= self.ttl_s
+        return {"body": body, "headers": dict(ent.get("headers") or {}), "fresh": fresh}
+
+    def served(self, url: str, body: bytes, revalidated: bool = False, now: Optional[float] = None) -> None:
+        """Record that a cached body was served (LRU touch; a 304 also renews freshness)."""
+        ent = self._index.get(url)
+        if not ent:
+            return
+        now = time.time() if now is None else now
+        ent["used"] = now
+        if revalidated:
+            ent["ts"] = now
+            self.revalidated += 1
+        self.hits += 1
+        self.bytes_served += len(body or b"")
+        self._dirty = True
+
+    @staticmethod
+    def validators(cached: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Conditional request headers for a stale entry."""
+        h = (cached or {}).get("headers") or {}
+        out = {}
+        if h.get("etag"):
+            out["if-none-match"] = h["etag"]
+        if h.get("last-modified"):
+            out["if-modified-since"] = h["last-modified"]
+        return out
+
+    def put(self, url: str, body: bytes, headers: Dict[str, str], now: Optional[float] = None) -> bool:
+        if not body or len(body) > self.max_bytes:
+            return False
+        now = time.time() if now is None else now
+        sha = hashlib.sha256(body).hexdigest()
+        path = self._object_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        lower = {str(k).lower(): v for k, v in (headers or {}).items()}
+        self._evicted.discard(url)
+        self._index[url] = {
+            "sha": sha,
+            "size": len(body),
+            "headers": {k: lower[k] for k in KEEP_HEADERS if k in lower},
+            "versioned": is_versioned_url(url),
+            "ts": now,
+            "used": now,
+        }
+        self.stored += 1
+        self._dirty = True
+        self._evict()
+        return True
+
+    def total_bytes(self) -> int:
+        sizes = {}
+        for ent in self._index.values():
+            sizes[ent["sha"]] = int(ent.get("size", 0) or 0)
+        return sum(sizes.values())
+
+    def _evict(self) -> None:
+        if self.total_bytes() <= self.max_bytes:
+            return
+        for url, _ in sorted(self._index.items(), key=lambda kv: float(kv[1].get("used", 0) or 0)):
+            self._index.pop(url, None)
+            self._evicted.add(url)
+            if self.total_bytes() <= self.max_bytes:
+                break
+        self._gc()
+
+    def _gc(self) -> None:
+        """Remove object files no URL refers to any more (here or in the saved index)."""
+        live = {ent["sha"] for ent in self._index.values()}
+        live |= {ent["sha"] for url, ent in self._load().items() if url not in self._evicted}
+        try:
+            for sub in os.listdir(self.objects_dir):
+                d = os.path.join(self.objects_dir, sub)
+                for name in os.listdir(d):
+                    if name not in live:
+                        try:
+                            os.remove(os.path.join(d, name))
+                        except Exception:
+                            pass
+        except Exception:
+            pass
+
+    def save(self) -> bool:
+        if not self._dirty:
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        # keep entries other processes saved meanwhile; ours are at least as new
+        data = {k: v for k, v in self._load().items() if k not in self._evicted}
+        data.update(self._index)
+        tmp_path = f"{self.index_path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        return True
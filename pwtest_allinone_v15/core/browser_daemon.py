@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, Optional
+
+BROWSER_DAEMON_FILE_NAME = "browser_daemon.json"
+BROWSER_DAEMON_STOP_NAME = "browser_daemon.stop"
+
+
+def pid_alive(pid: Any) -> bool:
+    try:
+        pid = int(pid)
+    except Exception:
+        return False
+    if pid <= 0:
+        return False
+    if sys.platform.startswith("win"):
+        try:
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return False
+            code = ctypes.c_ulong()
+            ok = kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+            kernel32.CloseHandle(handle)
+            return bool(ok) and code.value == 259  # STILL_ACTIVE
+        except Exception:
+            return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except Exception:
+        return False
+    return True
+
+
+def write_daemon_state(path: str, payload: Dict[str, Any]) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = dict(payload or {})
+    payload.setdefault("updated_at", time.time())
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_daemon_state(path: str) -> Optional[Dict[str, Any]]:
+    """The running daemon's state ({pid, endpoint, ...}), or None if there is none or its process is gone."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or not data.get("endpoint") or not pid_alive(data.get("pid")):
+        return None
+    return data
+
+
+def clear_daemon_state(path: str, pid: Optional[int] = None) -> None:
+    """Remove the state file (only if it still belongs to ``pid`` when given)."""
+    try:
+        if pid is not None:
+            with open(path, "r", encoding="utf-8") as f:
+                if int((json.load(f) or {}).get("pid", 0) or 0) != int(pid):
+                    return
+        os.remove(path)
+    except Exception:
+        pass
+
+
+def cdp_version(endpoint: str, timeout_s: float = 2.0) -> Optional[Dict[str, Any]]:
+    """``/json/version`` of a CDP endpoint (``http://127.0.0.1:PORT``), or None if it does not answer."""
+    try:
+        with urllib.request.urlopen(endpoint.rstrip("/") + "/json/version", timeout=timeout_s) as resp:
+            data = json.loads(resp.read().decode("utf-8", errors="ignore") or "{}")
+        return data if isinstance(data, dict) and data.get("webSocketDebuggerUrl") else None
+    except Exception:
+        return None
@@ -0,0 +1,469 @@
+"""Pure-Python reservation calendar parsing.
+
+Mirrors the slot-counting script that scrape_core evaluates inside the
+calendar iframe, but works on raw HTML so it can run without a browser.
+Only the standard library is used; computed styles are not available,
+so background-image hints are read from inline ``style`` attributes only.
+"""
+import datetime
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+_SKIP_TEXT_TAGS = {"script", "style", "noscript", "template"}
+_TABLE_SECTION_TAGS = {"thead", "tbody", "tfoot"}
+_TIME_RE = re.compile(r"^\s*\d{1,2}:\d{2}")
+_WS_RE = re.compile(r"[ \t\r\n\f]+")
+_INT_RE = re.compile(r"^\s*([+-]?\d+)")
+_BG_RE = re.compile(r"background(?:-image)?\s*:\s*([^;]+)", re.I)
+_DASH_TEXTS = ("―", "‐", "-", "–", "—", "ー")
+_BELL_TEXTS = ("×", "✕", "✖")
+_EXCLUDED_NOTICE = "お電話にてお問い合わせください"
+_JST = datetime.timezone(datetime.timedelta(hours=9))
+
+
+class Node:
+    __slots__ = ("tag", "attrs", "children", "parent", "text")
+
+    def __init__(self, tag: str, attrs: Optional[Dict[str, str]] = None, parent: "Node" = None, text: str = None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children: List["Node"] = []
+        self.parent = parent
+        self.text = text
+
+    def get(self, name: str) -> str:
+        return self.attrs.get(name) or ""
+
+    def elements(self) -> List["Node"]:
+        return [c for c in self.children if c.tag != "#text"]
+
+    def iter(self):
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            if node.tag == "#text":
+                continue
+            yield node
+            stack.extend(reversed(node.children))
+
+    def find_all(self, *tags: str) -> List["Node"]:
+        return [n for n in self.iter() if n.tag in tags]
+
+    def find(self, *tags: str) -> Optional["Node"]:
+        for n in self.iter():
+            if n.tag in tags:
+                return n
+        return None
+
+    def inner_text(self) -> str:
+        """Rough innerText: collapsed whitespace, <br> as newline, scripts skipped."""
+        parts = []
+
+        def walk(node):
+            for c in node.children:
+                if c.tag == "#text":
+                    parts.append(_WS_RE.sub(" ", c.text or ""))
+                elif c.tag == "br":
+                    parts.append("\n")
+                elif c.tag not in _SKIP_TEXT_TAGS:
+                    walk(c)
+                    if c.tag in ("p", "div", "tr", "li"):
+                        parts.append("\n")
+                    elif c.tag in ("td", "th"):
+                        parts.append("\t")
+
+        walk(self)
+        text = "".join(parts)
+        lines = [ln.strip(" ") for ln in text.split("\n")]
+        return "\n".join(lines).strip()
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document")
+        self.cur = self.root
+
+    def _close_until(self, tags, stop_at=("table",)):
+        node = self.cur
+        while node is not self.root:
+            if node.tag in stop_at:
+                return
+            if node.tag in tags:
+                self.cur = node.parent
+                return
+            node = node.parent
+
+    def handle_starttag(self, tag, attrs):
+        tag = tag.lower()
+        # HTML の省略終了タグ（td/tr/tbody）を補う
+        if tag in ("td", "th"):
+            self._close_until(("td", "th"), stop_at=("tr", "table"))
+        elif tag == "tr":
+            self._close_until(("td", "th"), stop_at=("tr", "table"))
+            self._close_until(("tr",))
+        elif tag in _TABLE_SECTION_TAGS:
+            self._close_until(("td", "th"), stop_at=("tr", "table"))
+            self._close_until(("tr",))
+            self._close_until(_TABLE_SECTION_TAGS)
+        node = Node(tag, {k.lower(): (v if v is not None else "") for k, v in attrs}, self.cur)
+        self.cur.children.append(node)
+        if tag not in _VOID_TAGS:
+            self.cur = node
+
+    def handle_startendtag(self, tag, attrs):
+        tag = tag.lower()
+        node = Node(tag, {k.lower(): (v if v is not None else "") for k, v in attrs}, self.cur)
+        self.cur.children.append(node)
+
+    def handle_endtag(self, tag):
+        tag = tag.lower()
+        if tag in _VOID_TAGS:
+            return
+        node = self.cur
+        while node is not self.root:
+            if node.tag == tag:
+                self.cur = node.parent
+                return
+            node = node.parent
+
+    def handle_data(self, data):
+        if data:
+            self.cur.children.append(Node("#text", parent=self.cur, text=data))
+
+
+def parse_html(html: str) -> Node:
+    builder = _TreeBuilder()
+    try:
+        builder.feed(html or "")
+        builder.close()
+    except Exception:
+        pass
+    return builder.root
+
+
+def _js_int(value: str, default: int = 1) -> int:
+    """parseInt(value, 10) || default"""
+    m = _INT_RE.match(value or "")
+    if not m:
+        return default
+    n = int(m.group(1))
+    return n or default
+
+
+def _cells(row: Node) -> List[Node]:
+    return [c for c in row.elements() if c.tag in ("td", "th")][1:]
+
+
+def _body_text(root: Node) -> str:
+    body = root.find("body")
+    return (body or root).inner_text()
+
+
+def _base_year_month(body_text: str, today: datetime.date):
+    year, month = today.year, today.month
+    m = re.search(r"(\d{4})\s*[年/.]\s*(\d{1,2})\s*月", body_text)
+    if m:
+        return int(m.group(1)) or year, int(m.group(2)) or month
+    m = re.search(r"(\d{1,2})\s*月", body_text)
+    if m:
+        month = int(m.group(1)) or month
+    return year, month
+
+
+def _parse_date_text(txt: str, base_ym) -> Optional[str]:
+    if not txt:
+        return None
+    clean = re.sub(r"\s+", "", str(txt))
+    month = None
+    day = None
+    m = re.search(r"(\d{1,2})[/.](\d{1,2})", clean)
+    if m:
+        month, day = int(m.group(1)), int(m.group(2))
+    else:
+        m = re.search(r"(\d{1,2})月(\d{1,2})", clean)
+        if m:
+            month, day = int(m.group(1)), int(m.group(2))
+        else:
+            m = re.search(r"(\d{1,2})\([月火水木金土日]\)", clean)
+            if m:
+                day = int(m.group(1))
+            else:
+                m = re.search(r"(\d{1,2})日", clean)
+                if m:
+                    day = int(m.group(1))
+    if not day or day < 1 or day > 31:
+        return None
+    base_year, base_month = base_ym
+    if not month or month < 1 or month > 12:
+        month = base_month
+    if not month:
+        return None
+    year = base_year
+    if base_month == 12 and month == 1:
+        year += 1
+    if base_month == 1 and month == 12:
+        year -= 1
+    return f"{year}-{month:02d}-{day:02d}"
+
+
+def _cell_type(td: Node) -> str:
+    raw_txt = td.inner_text().strip()
+    msg = td.get("data-name_message").strip()
+    txt = raw_txt
+    dn = td.get("data-name").strip().upper()
+    data_mark = td.get("data-mark").strip().upper()
+    data_status = td.get("data-status").strip().upper()
+    aria = td.get("aria-label").strip().upper()
+    title = td.get("title").strip().upper()
+    cls = td.get("class").upper()
+    combined = f"{raw_txt} {msg}"
+    if _EXCLUDED_NOTICE in combined:
+        return "excluded_notice_big"
+    if dn == "TEL" or "TEL" in data_status or txt.upper() == "TEL" or "TEL" in aria or "TEL" in title or "TEL" in cls or "PHONE" in cls:
+        return "tel"
+    if txt in _BELL_TEXTS or "不可" in txt or "×" in aria or "×" in title or "NG" in cls:
+        return "bell"
+    if "〇先行" in raw_txt or "○先行" in raw_txt:
+        return "maru"
+    has_mark_span = any(n.tag == "span" and n.get("data-mark") == "○" for n in td.iter())
+    if data_mark in ("○", "MARU") or has_mark_span or txt in ("○", "〇") or "MARU" in cls or "CIRCLE" in cls or "OK" in cls or "○" in aria:
+        return "maru"
+    if "BELL" in cls or "CROSS" in cls or "NG" in data_status:
+        return "bell"
+    m = _BG_RE.search(td.get("style"))
+    bg = (m.group(1) if m else "").lower()
+    if "url(" in bg and ("bell" in bg or "cross" in bg or "ng" in bg):
+        return "bell"
+    img = td.find("img")
+    if img is not None:
+        hay = [
+            img.get("alt").lower(),
+            img.get("title").lower(),
+            img.get("aria-label").lower(),
+            img.get("src").lower(),
+            img.get("class").lower(),
+            img.get("data-name").lower(),
+        ]
+        if any("bell" in h for h in hay):
+            return "bell"
+        if any("cross" in h for h in hay):
+            return "bell"
+        if any("tel" in h for h in hay):
+            return "tel"
+    if txt in _DASH_TEXTS:
+        return "dash"
+    return "other"
+
+
+def _first_cell_text(row: Node) -> str:
+    first = row.find("td", "th")
+    return first.inner_text().strip() if first is not None else ""
+
+
+def _pick_table(root: Node):
+    tables = root.find_all("table")
+    if not tables:
+        return None
+    for t in tables:
+        if any(_TIME_RE.match(_first_cell_text(r)) for r in t.find_all("tr")):
+            return t
+    return tables[0]
+
+
+def has_calendar_table(html: str) -> bool:
+    root = parse_html(html)
+    for t in root.find_all("table"):
+        if any(_TIME_RE.match(_first_cell_text(r)) for r in t.find_all("tr")):
+            return True
+    return False
+
+
+def parse_calendar_html(html: str, today: datetime.date = None) -> dict:
+    """Count calendar slots from the iframe document.
+
+    Returns the same dict shape as the in-page evaluator
+    (``ok``/``bell``/``maru``/``tel``/... plus ``stats_by_date``).
+    """
+    root = parse_html(html)
+    table = _pick_table(root)
+    if table is None:
+        return {"ok": False, "reason": "no table"}
+    rows = table.find_all("tr")
+    data_rows = [r for r in rows if r.find("td", "th") is not None and _TIME_RE.match(_first_cell_text(r))]
+    if not data_rows:
+        return {"ok": False, "reason": "no time rows"}
+
+    max_cols = 0
+    for r in data_rows:
+        cols = sum(_js_int(td.get("colspan")) for td in _cells(r))
+        max_cols = max(max_cols, cols)
+    if max_cols <= 0:
+        return {"ok": False, "reason": "no cols"}
+
+    if today is None:
+        today = datetime.datetime.now(_JST).date()
+    base_ym = _base_year_month(_body_text(root), today)
+
+    data_row_ids = {id(r) for r in data_rows}
+    first_data_idx = next((i for i, r in enumerate(rows) if id(r) in data_row_ids), -1)
+    header_rows = rows[:first_data_idx] if first_data_idx > 0 else []
+    header_row = None
+    header_matches = 0
+    for r in header_rows:
+        hits = sum(1 for td in _cells(r) if _parse_date_text(td.inner_text(), base_ym))
+        if hits > header_matches:
+            header_matches = hits
+            header_row = r
+    column_date_keys = [None] * max_cols
+    if header_row is not None and header_matches > 0:
+        col = 0
+        for td in _cells(header_row):
+            cs = _js_int(td.get("colspan"))
+            date_key = _parse_date_text(td.inner_text(), base_ym)
+            for cc in range(col, min(max_cols, col + cs)):
+                if date_key:
+                    column_date_keys[cc] = date_key
+            col += cs
+            if col >= max_cols:
+                break
+    header_dates = len({k for k in column_date_keys if k})
+
+    row_count = len(data_rows)
+    grid = [[None] * max_cols for _ in range(row_count)]
+    out = {
+        "ok": True, "bell": 0, "maru": 0, "tel": 0, "dash": 0, "other": 0,
+        "total_slots": 0, "bookable_slots": 0, "excluded_slots": 0,
+        "time_rows": row_count, "max_cols": max_cols, "td_count": 0,
+        "header_dates": header_dates, "slots_unique": 0, "symbols": {},
+    }
+    stats_by_date = {}
+
+    def ensure_date(key):
+        return stats_by_date.setdefault(key, {"bell": 0, "maru": 0, "tel": 0, "other": 0})
+
+    def count_slot(r, c, t):
+        if grid[r][c]:
+            return
+        grid[r][c] = t
+        date_key = column_date_keys[c]
+        if t == "excluded_notice_big":
+            out["excluded_slots"] += 1
+            if date_key:
+                ensure_date(date_key)["other"] += 1
+            return
+        out[t] = out.get(t, 0) + 1
+        out["total_slots"] += 1
+        if t in ("bell", "maru", "tel"):
+            out["bookable_slots"] += 1
+        if date_key:
+            dst = ensure_date(date_key)
+            if t in ("bell", "maru", "tel"):
+                dst[t] += 1
+            else:
+                dst["other"] += 1
+
+    for r in range(row_count):
+        col = 0
+        for td in _cells(data_rows[r]):
+            out["td_count"] += 1
+            while col < max_cols and grid[r][col]:
+                col += 1
+            if col >= max_cols:
+                break
+            t = _cell_type(td)
+            rs = _js_int(td.get("rowspan"))
+            cs = _js_int(td.get("colspan"))
+            r_limit = min(row_count, r + rs)
+            c_limit = min(max_cols, col + cs)
+            for rr in range(r, r_limit):
+                for cc in range(col, c_limit):
+                    count_slot(rr, cc, t)
+            key = td.inner_text().strip() or t
+            slots = (r_limit - r) * (c_limit - col)
+            out["symbols"][key] = out["symbols"].get(key, 0) + slots
+            col += cs
+
+    out["slots_unique"] = sum(1 for row in grid for v in row if v and v != "excluded_notice_big")
+    denom = out["total_slots"] or 0
+    out["other_ratio"] = (out["other"] / denom) if denom > 0 else None
+    out["bell_rate_total"] = (out["bell"] / out["total_slots"]) if out["total_slots"] else None
+    out["bell_rate_bookable"] = (out["bell"] / out["bookable_slots"]) if out["bookable_slots"] else None
+    out["stats_by_date"] = stats_by_date
+    return out
+
+
+def find_calendar_iframe_src(html: str, base_url: str = "") -> str:
+    """Return the absolute src of the reservation calendar iframe, or ''."""
+    root = parse_html(html)
+    fallback = ""
+    for node in root.find_all("iframe"):
+        src = node.get("src").strip()
+        if not src:
+            continue
+        if node.get("name") == "pcreserveiframe" or node.get("id") == "pcreserveiframe":
+            return urljoin(base_url, src)
+        if not fallback and ("yoyaku.cityheaven.net" in src or "ShopReservation" in src):
+            fallback = urljoin(base_url, src)
+    return fallback
+
+
+def find_error_message(html: str) -> str:
+    """Text of the first ``div.error-msg`` (the not-reservable notice), or ''."""
+    root = parse_html(html)
+    for node in root.find_all("div"):
+        if "error-msg" in node.get("class").split():
+            return node.inner_text().strip()
+    return ""
+
+
+PARITY_KEYS = (
+    "ok", "bell", "maru", "tel", "dash", "other", "total_slots", "bookable_slots",
+    "excluded_slots", "time_rows", "max_cols", "td_count", "header_dates", "slots_unique",
+)
+
+
+def diff_calendar_stats(expected: dict, actual: dict) -> List[str]:
+    """List the count fields (and per-date counts) where two stats dicts disagree."""
+    expected = expected or {}
+    actual = actual or {}
+    diffs = []
+    for key in PARITY_KEYS:
+        if expected.get(key) != actual.get(key):
+            diffs.append(f"{key}:{expected.get(key)}!={actual.get(key)}")
+    exp_dates = expected.get("stats_by_date") or {}
+    act_dates = actual.get("stats_by_date") or {}
+    for day in sorted(set(exp_dates) | set(act_dates)):
+        if exp_dates.get(day) != act_dates.get(day):
+            diffs.append(f"stats_by_date[{day}]")
+    return diffs
+
+
+def _parse_file(path: str, today: datetime.date = None) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            html = f.read()
+    except Exception as e:
+        return {"ok": False, "reason": f"read_failed:{str(e)[:120]}"}
+    return parse_calendar_html(html, today=today)
+
+
+def parse_calendar_files(paths, workers: int = None, today: datetime.date = None) -> List[dict]:
+    """Parse saved frame HTML files, in worker processes when workers > 1.
+
+    Returns ``[{"path": ..., "stats": ...}, ...]`` in input order.
+    """
+    paths = list(paths or [])
+    if workers is None or workers <= 1 or len(paths) <= 1:
+        return [{"path": p, "stats": _parse_file(p, today)} for p in paths]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        results = list(ex.map(_parse_file, paths, [today] * len(paths)))
+    return [{"path": p, "stats": st} for p, st in zip(paths, results)]
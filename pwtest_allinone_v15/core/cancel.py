@@ -0,0 +1,216 @@
+import asyncio
+import os
+import select
+import sys
+import threading
+import time
+import weakref
+from typing import Optional
+
+# inotify(7)
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+# FindFirstChangeNotification
+_FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+_FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+_WAIT_OBJECT_0 = 0
+_INVALID_HANDLE_VALUE = -1
+
+
+class CancelToken:
+    """Run-wide cooperative cancellation, fired when a stop file appears.
+
+    ``is_set()`` is a plain flag read, cheap enough to check per item and
+    inside wait loops. The stop file's directory is watched by a
+    background thread using inotify (Linux) or a change notification
+    handle (Windows); elsewhere, or if those fail, the thread falls back
+    to checking the file every ``poll_s``. Even with a native watcher the
+    file is re-checked every ``safety_s`` in case an event is missed (e.g.
+    on network shares).
+
+    Coroutines can ``await wait()``, and asyncio events registered with
+    ``subscribe`` are set on cancellation so existing waits wake up.
+    """
+
+    def __init__(self, stop_path: str, poll_s: float = 1.0, safety_s: float = 30.0, backend: Optional[str] = None):
+        self.stop_path = os.path.abspath(stop_path)
+        self.poll_s = max(0.05, float(poll_s))
+        self.safety_s = max(self.poll_s, float(safety_s))
+        self.backend = backend
+        self.reason = None
+        self._flag = threading.Event()
+        self._closing = threading.Event()
+        self._loop = None
+        self._event = None
+        self._subscribers = weakref.WeakSet()
+        self._thread = None
+        self._wake_w = None
+
+    def is_set(self) -> bool:
+        return self._flag.is_set()
+
+    def start(self) -> "CancelToken":
+        """Start watching (call from the event loop that will consume the token)."""
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        if self._flag.is_set():
+            self._event.set()
+        os.makedirs(os.path.dirname(self.stop_path), exist_ok=True)
+        if os.path.exists(self.stop_path):
+            self.cancel("stop_file")
+            return self
+        if self.backend is None:
+            if sys.platform.startswith("linux"):
+                self.backend = "inotify"
+            elif sys.platform.startswith("win"):
+                self.backend = "win32"
+            else:
+                self.backend = "poll"
+        self._thread = threading.Thread(target=self._run, name="cancel-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self, reason: str = "cancel") -> None:
+        """Fire the token (thread-safe, idempotent)."""
+        if self._flag.is_set():
+            return
+        self.reason = reason
+        self._flag.set()
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            if loop.is_closed():
+                return
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                self._fire()
+            else:
+                loop.call_soon_threadsafe(self._fire)
+        except Exception:
+            pass
+
+    def _fire(self) -> None:
+        if self._event is not None:
+            self._event.set()
+        for evt in list(self._subscribers):
+            try:
+                evt.set()
+            except Exception:
+                pass
+
+    async def wait(self) -> None:
+        if self._event is None:
+            raise RuntimeError("CancelToken.start() was not called")
+        await self._event.wait()
+
+    def subscribe(self, evt: asyncio.Event) -> None:
+        """Set ``evt`` when the token fires (immediately if it already has)."""
+        self._subscribers.add(evt)
+        if self._flag.is_set():
+            evt.set()
+
+    def unsubscribe(self, evt: asyncio.Event) -> None:
+        self._subscribers.discard(evt)
+
+    def close(self) -> None:
+        self._closing.set()
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _check(self) -> bool:
+        if os.path.exists(self.stop_path):
+            self.cancel("stop_file")
+            return True
+        return False
+
+    def _run(self) -> None:
+        try:
+            if self.backend == "inotify" and self._run_inotify():
+                return
+            if self.backend == "win32" and self._run_win32():
+                return
+        except Exception:
+            pass
+        self.backend = "poll"
+        while not self._closing.is_set():
+            if self._check():
+                return
+            self._closing.wait(self.poll_s)
+
+    def _run_inotify(self) -> bool:
+        """False if inotify is not usable (the caller then polls)."""
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return False
+        wake_r, self._wake_w = os.pipe()
+        try:
+            mask = _IN_CREATE | _IN_MOVED_TO | _IN_CLOSE_WRITE | _IN_ATTRIB
+            if libc.inotify_add_watch(fd, os.path.dirname(self.stop_path).encode(), mask) < 0:
+                return False
+            # the file may have appeared between start() and the watch being added
+            while not self._closing.is_set() and not self._check():
+                ready, _, _ = select.select([fd, wake_r], [], [], self.safety_s)
+                if fd in ready:
+                    try:
+                        while os.read(fd, 4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+            return True
+        finally:
+            os.close(fd)
+            os.close(wake_r)
+            w, self._wake_w = self._wake_w, None
+            try:
+                os.close(w)
+            except Exception:
+                pass
+
+    def _run_win32(self) -> bool:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        handle = kernel32.FindFirstChangeNotificationW(
+            os.path.dirname(self.stop_path), False, _FILE_NOTIFY_CHANGE_FILE_NAME | _FILE_NOTIFY_CHANGE_LAST_WRITE
+        )
+        if not handle or handle == ctypes.c_void_p(_INVALID_HANDLE_VALUE).value:
+            return False
+        handle = ctypes.c_void_p(handle)
+        try:
+            # wake every poll_s only to notice close(); the file is checked on change or every safety_s
+            timeout_ms = int(self.poll_s * 1000)
+            last = time.monotonic()
+            if self._check():
+                return True
+            while not self._closing.is_set():
+                if kernel32.WaitForSingleObject(handle, timeout_ms) == _WAIT_OBJECT_0:
+                    if self._check():
+                        return True
+                    if not kernel32.FindNextChangeNotification(handle):
+                        return False
+                elif time.monotonic() - last >= self.safety_s:
+                    last = time.monotonic()
+                    if self._check():
+                        return True
+            return True
+        finally:
+            kernel32.FindCloseChangeNotification(handle)
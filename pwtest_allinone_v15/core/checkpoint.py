@@ -0,0 +1,95 @@
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+CHECKPOINT_FILE_NAME = "checkpoint.jsonl"
+
+
+def checkpoint_path(run_dir: str, shard: Optional[int] = None) -> str:
+    """checkpoint.jsonl, or checkpoint.shardN.jsonl for shard worker N (one writer per file)."""
+    if shard is None:
+        return os.path.join(run_dir, CHECKPOINT_FILE_NAME)
+    base, ext = os.path.splitext(CHECKPOINT_FILE_NAME)
+    return os.path.join(run_dir, f"{base}.shard{int(shard)}{ext}")
+
+
+class RunCheckpoint:
+    """Append-only per-run checkpoint (one JSON object per line).
+
+    Records are either scraped rows ({"type": "row", "job": i, "gid": ...})
+    or job completion markers ({"type": "job_done", "job": i}). Each line is
+    flushed as soon as it is written so a crashed run loses at most the row
+    that was being written.
+    """
+
+    def __init__(self, run_dir: str, shard: Optional[int] = None):
+        self.path = checkpoint_path(run_dir, shard)
+        self._lock = threading.Lock()
+
+    def _append(self, rec: Dict[str, Any]) -> None:
+        rec = dict(rec)
+        rec.setdefault("ts", time.time())
+        line = json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+
+    def add_row(self, job_i: int, preset: str, row: Dict[str, Any]) -> None:
+        self._append({"type": "row", "job": int(job_i), "preset": preset, "gid": row.get("gid", ""), "row": row})
+
+    def mark_job_done(self, job_i: int, preset: str, rows: int) -> None:
+        self._append({"type": "job_done", "job": int(job_i), "preset": preset, "rows": int(rows)})
+
+
+def load_checkpoint(run_dir: str) -> Dict[str, Any]:
+    """Read a checkpoint back.
+
+    Returns {"rows": {job_i: {gid: row}}, "done": {job_i, ...}}. Shard
+    checkpoints in the same run_dir are read too. A torn last line (crash
+    mid-write) is ignored.
+    """
+    rows: Dict[int, Dict[str, Any]] = {}
+    done = set()
+    base, ext = os.path.splitext(CHECKPOINT_FILE_NAME)
+    paths = [checkpoint_path(run_dir)] + sorted(glob.glob(os.path.join(run_dir, f"{base}.shard*{ext}")))
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                    job_i = int(rec.get("job"))
+                except Exception:
+                    continue
+                if rec.get("type") == "row" and isinstance(rec.get("row"), dict) and rec.get("gid"):
+                    rows.setdefault(job_i, {})[rec["gid"]] = rec["row"]
+                elif rec.get("type") == "job_done":
+                    done.add(job_i)
+    return {"rows": rows, "done": done}
+
+
+def load_job_rows(run_dir: str, job_i: int) -> Optional[List[Dict[str, Any]]]:
+    """Finalized rows saved for job ``job_i`` (jobs/NN_*_current.json), if any."""
+    jobs_dir = os.path.join(run_dir, "jobs")
+    prefix = f"{int(job_i):02d}_"
+    try:
+        names = sorted(os.listdir(jobs_dir))
+    except Exception:
+        return None
+    for name in names:
+        if name.startswith(prefix) and name.endswith("_current.json"):
+            try:
+                with open(os.path.join(jobs_dir, name), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                return data if isinstance(data, list) else None
+            except Exception:
+                return None
+    return None
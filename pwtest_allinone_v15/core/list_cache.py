@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+LIST_CACHE_FILE_NAME = "list_cache.json"
+
+
+def list_page_fingerprint(pairs: List[List[str]]) -> str:
+    """Fingerprint of one list page: the ordered (gid, name) pairs it showed."""
+    raw = json.dumps([[str(g), str(n)] for g, n in (pairs or [])], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ListCache:
+    """Per-preset girl list snapshots keyed by list URL.
+
+    An entry holds the full (gid, name) list collected across all pages plus
+    the fingerprint of page 1. If page 1 still has the same fingerprint and
+    the entry is younger than ``ttl_hours``, the rest of the pagination can
+    be skipped and the cached list used instead.
+    """
+
+    def __init__(self, path: str, ttl_hours: float = 12.0):
+        self.path = path
+        self.ttl_s = max(0.0, float(ttl_hours)) * 3600.0
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._changed = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f) or {}
+                if isinstance(data, dict):
+                    return {k: v for k, v in data.items() if isinstance(v, dict)}
+        except Exception:
+            pass
+        return {}
+
+    def get(self, list_url: str, page1_fp: str, max_items: int, now: Optional[float] = None) -> Optional[List[List[str]]]:
+        """Cached pairs when page 1 matches, the entry is fresh and it covers ``max_items``."""
+        ent = self._entries.get(list_url)
+        now = time.time() if now is None else now
+        ok = (
+            bool(ent)
+            and ent.get("page1_fp") == page1_fp
+            and now - float(ent.get("ts", 0) or 0) <= self.ttl_s
+            and isinstance(ent.get("pairs"), list)
+        )
+        if ok:
+            pairs = ent["pairs"]
+            cached_max = int(ent.get("max_items", 0) or 0)
+            # roster ended before the old limit -> the list is complete for any limit
+            ok = cached_max >= int(max_items) or len(pairs) < cached_max
+        if not ok:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [list(p) for p in ent["pairs"][: int(max_items)]]
+
+    def put(self, list_url: str, page1_fp: str, pairs: List[List[str]], max_items: int, now: Optional[float] = None) -> None:
+        self._entries[list_url] = {
+            "page1_fp": page1_fp,
+            "ts": time.time() if now is None else now,
+            "max_items": int(max_items),
+            "pairs": [[str(g), str(n)] for g, n in pairs],
+        }
+        self._changed.add(list_url)
+
+    def save(self) -> bool:
+        """Write the entries put here on top of the file (other processes may have saved meanwhile)."""
+        if not self._changed:
+            return False
+        data = self._load()
+        data.update({k: self._entries[k] for k in self._changed})
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._changed.clear()
+        return True
@@ -0,0 +1,116 @@
+import json
+import os
+import random
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+NEGATIVE_CACHE_FILE_NAME = "negative_cache.json"
+
+# reasons that mean "this gid has no usable calendar right now"
+NEGATIVE_REASON_PREFIXES = ("not_reservable", "calendar_not_present", "iframe_missing")
+
+
+def is_negative_reason(reason: Optional[str]) -> bool:
+    reason = str(reason or "")
+    return any(reason.startswith(p) for p in NEGATIVE_REASON_PREFIXES)
+
+
+class NegativeCache:
+    """TTL cache of gids whose reservation page had no calendar.
+
+    Entries are keyed by ``store_base::gid``. While an entry is fresh the gid
+    is skipped, except that ``recheck_ratio`` of lookups are let through so
+    dead gids that come back are noticed before the TTL runs out. A
+    successful scrape removes the entry; a negative one refreshes it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_hours: float = 72.0,
+        recheck_ratio: float = 0.1,
+        rng: Optional[Callable[[], float]] = None,
+    ):
+        self.path = path
+        self.ttl_s = max(0.0, float(ttl_hours)) * 3600.0
+        self.recheck_ratio = min(1.0, max(0.0, float(recheck_ratio)))
+        self._rng = rng or random.random
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._changed = set()
+        self.skipped = 0
+        self.rechecked = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f) or {}
+                if isinstance(data, dict):
+                    return {k: v for k, v in data.items() if isinstance(v, dict)}
+        except Exception:
+            pass
+        return {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Fresh entry for ``key`` or None (expired entries are dropped)."""
+        ent = self._entries.get(key)
+        if not ent:
+            return None
+        now = time.time() if now is None else now
+        if now - float(ent.get("ts", 0) or 0) > self.ttl_s:
+            self._entries.pop(key, None)
+            self._changed.add(key)
+            return None
+        return ent
+
+    def should_skip(self, key: str, now: Optional[float] = None) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(skip, entry). A sampled fraction of fresh entries is not skipped (re-verification)."""
+        ent = self.get(key, now=now)
+        if ent is None:
+            return False, None
+        if self._rng() < self.recheck_ratio:
+            self.rechecked += 1
+            return False, ent
+        self.skipped += 1
+        return True, ent
+
+    def observe(self, key: str, ok: bool, reason: Optional[str] = None, now: Optional[float] = None) -> None:
+        """Record a scrape outcome: ok clears the entry, a negative reason (re)sets it."""
+        if ok:
+            if self._entries.pop(key, None) is not None:
+                self._changed.add(key)
+            return
+        if not is_negative_reason(reason):
+            return
+        now = time.time() if now is None else now
+        prev = self._entries.get(key) or {}
+        self._entries[key] = {
+            "reason": str(reason)[:120],
+            "ts": now,
+            "first_ts": prev.get("first_ts", now),
+            "hits": int(prev.get("hits", 0) or 0) + 1,
+        }
+        self._changed.add(key)
+
+    def save(self) -> bool:
+        """Write the entries changed here on top of the file (other processes may have saved meanwhile)."""
+        if not self._changed:
+            return False
+        now = time.time()
+        data = self._load()
+        for key in self._changed:
+            if key in self._entries:
+                data[key] = self._entries[key]
+            else:
+                data.pop(key, None)
+        data = {k: v for k, v in data.items() if now - float(v.get("ts", 0) or 0) <= self.ttl_s}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._changed.clear()
+        return True
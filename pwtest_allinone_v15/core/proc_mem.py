@@ -0,0 +1,63 @@
+import os
+from typing import Dict, Optional
+
+PROC_ROOT = "/proc"
+
+
+def _page_size() -> int:
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE"))
+    except Exception:
+        return 4096
+
+
+def _read_ppid_rss(proc_root: str, pid: str, page_size: int):
+    """(ppid, rss_bytes) from /proc/<pid>/stat and statm, or None if the process is gone."""
+    try:
+        with open(os.path.join(proc_root, pid, "stat"), "r", encoding="utf-8", errors="ignore") as f:
+            stat = f.read()
+        # comm may contain spaces/parentheses: fields after the last ')' are fixed
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        with open(os.path.join(proc_root, pid, "statm"), "r", encoding="utf-8", errors="ignore") as f:
+            rss_pages = int(f.read().split()[1])
+        return ppid, rss_pages * page_size
+    except Exception:
+        return None
+
+
+def process_tree_rss(root_pid: int, proc_root: str = PROC_ROOT, page_size: Optional[int] = None) -> Optional[int]:
+    """Total RSS in bytes of all descendants of ``root_pid`` (not the root itself).
+
+    For this tool that is the Playwright driver plus every Chromium process
+    it launched. Returns None where /proc is not available (e.g. Windows).
+    Shared pages are counted once per process, so this over-estimates; it
+    is meant for thresholds, not accounting.
+    """
+    if not os.path.isdir(proc_root):
+        return None
+    page_size = page_size or _page_size()
+    procs: Dict[int, tuple] = {}
+    try:
+        names = os.listdir(proc_root)
+    except Exception:
+        return None
+    for name in names:
+        if not name.isdigit():
+            continue
+        info = _read_ppid_rss(proc_root, name, page_size)
+        if info is not None:
+            procs[int(name)] = info
+    children: Dict[int, list] = {}
+    for pid, (ppid, _) in procs.items():
+        children.setdefault(ppid, []).append(pid)
+    total = 0
+    stack = list(children.get(int(root_pid), []))
+    seen = set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += procs[pid][1]
+        stack.extend(children.get(pid, []))
+    return total
@@ -0,0 +1,88 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class RetryQueue:
+    """Run-level queue of items whose navigation failed.
+
+    Instead of reloading inline (holding a page slot while the site is
+    struggling), a failed item is pushed here and retried later by
+    ``drain``. Each retry waits a jittered exponential backoff
+    (``base_delay_s * 2**(attempt-1)``, capped at ``max_delay_s``, scaled by
+    a random factor in [0.5, 1.0)). An item is retried at most
+    ``max_attempts`` times and the whole run at most ``budget`` times.
+    Items are grouped by ``owner`` (the preset) so each preset drains only
+    its own failures.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay_s: float = 2.0,
+        max_delay_s: float = 30.0,
+        budget: int = 60,
+        rng: Optional[Callable[[], float]] = None,
+    ):
+        self.max_attempts = max(0, int(max_attempts))
+        self.base_delay_s = max(0.0, float(base_delay_s))
+        self.max_delay_s = max(self.base_delay_s, float(max_delay_s))
+        self.budget = max(0, int(budget))
+        self._rng = rng or random.random
+        self._seq = itertools.count()
+        self._attempts: Dict[Tuple[Any, str], int] = {}
+        self._pending: Dict[Any, List[Tuple[float, int, str]]] = {}
+        self.pushed = 0
+        self.exhausted = 0
+
+    def delay_s(self, attempt: int) -> float:
+        base = min(self.max_delay_s, self.base_delay_s * (2 ** max(0, int(attempt) - 1)))
+        return base * (0.5 + 0.5 * self._rng())
+
+    def attempts(self, owner: Any, key: str) -> int:
+        return self._attempts.get((owner, key), 0)
+
+    def push(self, owner: Any, key: str, now: Optional[float] = None) -> bool:
+        """Schedule a retry. False when the item or the run budget is used up."""
+        n = self._attempts.get((owner, key), 0) + 1
+        if n > self.max_attempts or self.pushed >= self.budget:
+            self.exhausted += 1
+            return False
+        self._attempts[(owner, key)] = n
+        self.pushed += 1
+        now = time.monotonic() if now is None else now
+        heapq.heappush(self._pending.setdefault(owner, []), (now + self.delay_s(n), next(self._seq), key))
+        return True
+
+    def pending(self, owner: Any) -> int:
+        return len(self._pending.get(owner) or [])
+
+    def take(self, owner: Any) -> List[Tuple[float, str]]:
+        """Remove and return ``owner``'s items as (due, key), earliest first."""
+        items = self._pending.pop(owner, None) or []
+        return [(due, key) for due, _, key in sorted(items)]
+
+    async def drain(self, owner: Any, fn: Callable[[str], Awaitable[Any]]) -> int:
+        """Run ``fn(key)`` for each of ``owner``'s items once its backoff has passed.
+
+        Items are retried concurrently (``fn`` is expected to apply its own
+        limits). Items pushed again while draining are picked up in the next
+        round. Returns the number of ``fn`` calls made.
+        """
+        calls = 0
+
+        async def _one(due: float, key: str):
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            return await fn(key)
+
+        while True:
+            batch = self.take(owner)
+            if not batch:
+                return calls
+            calls += len(batch)
+            await asyncio.gather(*[_one(due, key) for due, key in batch], return_exceptions=True)
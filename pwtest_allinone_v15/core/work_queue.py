@@ -0,0 +1,223 @@
+import abc
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+WORK_QUEUE_FILE_NAME = "work_queue.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created REAL,
+    updated REAL,
+    UNIQUE (run_id, key)
+)
+"""
+
+
+class WorkQueue(abc.ABC):
+    """Leased work items shared by several runner processes or hosts.
+
+    A coordinator ``enqueue``s items for a run; runners ``lease`` one at a
+    time, keep it alive with ``heartbeat`` and hand the result back with
+    ``complete`` (or ``fail``). A lease that is not renewed expires and the
+    item goes to the next runner, up to ``max_attempts`` leases. Item
+    states: pending, leased, done, failed, cancelled.
+    """
+
+    @abc.abstractmethod
+    def enqueue(self, run_id: str, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        ...
+
+    @abc.abstractmethod
+    def lease(self, worker: str, lease_s: float, now: Optional[float] = None, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    def heartbeat(self, item_id: int, worker: str, lease_s: float, now: Optional[float] = None) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def complete(self, item_id: int, worker: str, result: Any) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def fail(self, item_id: int, worker: str, error: str, retry: bool = True) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def cancel(self, run_id: str) -> int:
+        ...
+
+    @abc.abstractmethod
+    def counts(self, run_id: str) -> Dict[str, int]:
+        ...
+
+    @abc.abstractmethod
+    def results(self, run_id: str) -> List[Dict[str, Any]]:
+        ...
+
+
+class SqliteWorkQueue(WorkQueue):
+    """WorkQueue backed by one SQLite file (local disk or a shared folder).
+
+    Every state change runs in a ``BEGIN IMMEDIATE`` transaction, so two
+    runners can never lease the same item. The rollback journal is kept
+    (no WAL) so the file also works on network shares.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, timeout_s: float = 30.0):
+        self.path = path
+        self.max_attempts = max(1, int(max_attempts))
+        self.timeout_s = float(timeout_s)
+        os.makedirs(os.path.dirname(os.path.abspath(path)) or ".", exist_ok=True)
+        with self._tx() as con:
+            con.execute(_SCHEMA)
+
+    @contextmanager
+    def _tx(self):
+        con = sqlite3.connect(self.path, timeout=self.timeout_s, isolation_level=None)
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+        finally:
+            con.close()
+
+    def enqueue(self, run_id: str, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        now = time.time()
+        added = 0
+        with self._tx() as con:
+            for key, payload in items:
+                cur = con.execute(
+                    "INSERT OR IGNORE INTO items (run_id, key, payload, created, updated) VALUES (?, ?, ?, ?, ?)",
+                    (str(run_id), str(key), json.dumps(payload, ensure_ascii=False), now, now),
+                )
+                added += cur.rowcount
+        return added
+
+    def lease(self, worker: str, lease_s: float, now: Optional[float] = None, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Oldest pending item (of ``run_id`` if given), or one whose lease expired; None when there is nothing to do."""
+        now = time.time() if now is None else now
+        where = "(state = 'pending' OR (state = 'leased' AND lease_until < ?))"
+        params: tuple = (now,)
+        if run_id is not None:
+            where += " AND run_id = ?"
+            params += (str(run_id),)
+        with self._tx() as con:
+            while True:
+                row = con.execute(
+                    f"SELECT id, run_id, key, payload, attempts FROM items WHERE {where} ORDER BY id LIMIT 1",
+                    params,
+                ).fetchone()
+                if row is None:
+                    return None
+                item_id, run_id, key, payload, attempts = row
+                if attempts >= self.max_attempts:
+                    con.execute(
+                        "UPDATE items SET state = 'failed', error = 'lease expired too often', updated = ? WHERE id = ?",
+                        (now, item_id),
+                    )
+                    continue
+                con.execute(
+                    "UPDATE items SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (worker, now + float(lease_s), now, item_id),
+                )
+                return {
+                    "id": item_id,
+                    "run_id": run_id,
+                    "key": key,
+                    "payload": json.loads(payload),
+                    "attempt": attempts + 1,
+                }
+
+    def _update_own(self, item_id: int, worker: str, sql: str, params: tuple) -> bool:
+        with self._tx() as con:
+            cur = con.execute(
+                f"UPDATE items SET {sql} WHERE id = ? AND worker = ? AND state = 'leased'",
+                params + (item_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def heartbeat(self, item_id: int, worker: str, lease_s: float, now: Optional[float] = None) -> bool:
+        """Extend the lease. False when the item is no longer ours (expired and re-leased, or cancelled)."""
+        now = time.time() if now is None else now
+        return self._update_own(item_id, worker, "lease_until = ?, updated = ?", (now + float(lease_s), now))
+
+    def complete(self, item_id: int, worker: str, result: Any) -> bool:
+        return self._update_own(
+            item_id,
+            worker,
+            "state = 'done', result = ?, lease_until = NULL, updated = ?",
+            (json.dumps(result, ensure_ascii=False, default=str), time.time()),
+        )
+
+    def fail(self, item_id: int, worker: str, error: str, retry: bool = True) -> bool:
+        """Give the item back (``retry`` and attempts left) or mark it failed."""
+        with self._tx() as con:
+            row = con.execute(
+                "SELECT attempts FROM items WHERE id = ? AND worker = ? AND state = 'leased'",
+                (item_id, worker),
+            ).fetchone()
+            if row is None:
+                return False
+            state = "pending" if retry and row[0] < self.max_attempts else "failed"
+            con.execute(
+                "UPDATE items SET state = ?, error = ?, worker = NULL, lease_until = NULL, updated = ? WHERE id = ?",
+                (state, str(error)[:500], time.time(), item_id),
+            )
+            return True
+
+    def cancel(self, run_id: str) -> int:
+        """Cancel items of ``run_id`` that are not finished (leased items are dropped on their next heartbeat)."""
+        with self._tx() as con:
+            cur = con.execute(
+                "UPDATE items SET state = 'cancelled', updated = ? WHERE run_id = ? AND state IN ('pending', 'leased')",
+                (time.time(), str(run_id)),
+            )
+            return cur.rowcount
+
+    def counts(self, run_id: str) -> Dict[str, int]:
+        with self._tx() as con:
+            rows = con.execute("SELECT state, COUNT(*) FROM items WHERE run_id = ? GROUP BY state", (str(run_id),)).fetchall()
+        return {state: n for state, n in rows}
+
+    def results(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._tx() as con:
+            rows = con.execute(
+                "SELECT key, payload, state, worker, attempts, result, error FROM items WHERE run_id = ? ORDER BY key",
+                (str(run_id),),
+            ).fetchall()
+        out = []
+        for key, payload, state, worker, attempts, result, error in rows:
+            out.append({
+                "key": key,
+                "payload": json.loads(payload),
+                "state": state,
+                "worker": worker,
+                "attempts": attempts,
+                "result": json.loads(result) if result else None,
+                "error": error,
+            })
+        return out
+
+
+def open_work_queue(path: str, max_attempts: int = 3) -> WorkQueue:
+    """The default backend: a SQLite file at ``path``."""
+    return SqliteWorkQueue(path, max_attempts=max_attempts)
@@ -12,6 +12,7 @@ def _parse_args(argv):
     ap.add_argument("--auto", action="store_true")
     ap.add_argument("--headless", action="store_true")
     ap.add_argument("--concurrency", type=int, default=None)
+    ap.add_argument("--preset-parallel", dest="preset_parallel", type=int, default=None)  # presets scraped at once (pages still capped by --concurrency)
     ap.add_argument("--preset", type=str, default="")  # backward compat (comma-separated)
     ap.add_argument("--presets", type=str, default="")  # preferred (comma-separated)
     ap.add_argument("--headful", action="store_true")  # run with visible browser (may help if headless blocked)
@@ -21,6 +22,18 @@ def _parse_args(argv):
     ap.add_argument("--force-today", action="store_true")
     ap.add_argument("--run-job", action="store_true")
     ap.add_argument("--job-file", type=str, default="")
+    ap.add_argument("--resume", type=str, default="")  # interrupted run dir (path or run_YYYYmmdd_HHMMSS)
+    ap.add_argument("--time-budget", dest="time_budget", type=float, default=None)  # minutes; remaining low-priority gids are deferred to the next run
+    ap.add_argument("--shards", type=int, default=1)  # split presets across N worker processes (same run_dir)
+    ap.add_argument("--shard-worker", dest="shard_worker", type=str, default="")  # internal: run_dir of the parent (--shards)
+    ap.add_argument("--shard", type=str, default="")  # internal: "k/N"
+    ap.add_argument("--queue", type=str, default="")  # shared work queue (SQLite file or folder); presets are taken by --queue-worker processes
+    ap.add_argument("--local-workers", dest="local_workers", type=int, default=0)  # with --queue: also start N workers on this machine
+    ap.add_argument("--queue-worker", dest="queue_worker", type=str, default="")  # take presets from this queue until idle
+    ap.add_argument("--queue-run", dest="queue_run", type=str, default="")  # internal: only this run's items (local workers)
+    ap.add_argument("--browser-daemon", dest="browser_daemon", action="store_true")  # keep a warmed browser running; runs attach to it over CDP
+    ap.add_argument("--stop-browser-daemon", dest="stop_browser_daemon", action="store_true")
+    ap.add_argument("--daemon-port", dest="daemon_port", type=int, default=None)  # CDP port (default auto.browser_daemon_port)
     ap.add_argument("--help", action="store_true")
     ap.add_argument("--retention-months", type=int, default=None)
     ap.add_argument("--retention-max-lines", type=int, default=None)
@@ -75,6 +88,13 @@ def _resolve_options(args, job_state, cfg):
     else:
         concurrency = int(auto_cfg.get("concurrency", 3) or 3)
 
+    if args.preset_parallel is not None:
+        preset_parallel = int(args.preset_parallel)
+    elif job_state and job_state.get("preset_parallel") is not None:
+        preset_parallel = int(job_state.get("preset_parallel") or 1)
+    else:
+        preset_parallel = int(auto_cfg.get("preset_parallel", 1) or 1)
+
     if args.headful:
         headless = False
     elif args.headless:
@@ -116,6 +136,7 @@ def _resolve_options(args, job_state, cfg):
         "preset_names": preset_names,
         "jobs": jobs,
         "concurrency": concurrency,
+        "preset_parallel": preset_parallel,
         "headless": headless,
         "minimize_browser": minimize_browser,
         "once_per_day": once_per_day,
@@ -151,12 +172,134 @@ if __name__ == "__main__":
             "    python main.py --auto --headless --preset \"A店,B店\" --concurrency 2 --notify\n\n"
             "  自動設定の既定値は score_data/config.json の auto.* で指定できます。\n"
             "    auto.presets / auto.headful / auto.concurrency / auto.once_per_day\n\n"
+            "  時間予算（分）を超えたら残りの gid を次回へ回す（優先度の高い gid から取得）:\n"
+            "    python main.py --auto --headless --time-budget 45\n\n"
+            "  中断した実行の再開（取得済み gid / 完了済みプリセットは飛ばす）:\n"
+            "    python main.py --resume score_data\\runs\\run_YYYYmmdd_HHMMSS\n\n"
+            "  プリセットを N 個のプロセスに分けて並行実行（結果は同じ run フォルダにまとめる）:\n"
+            "    python main.py --run-job --shards 3\n\n"
+            "  複数マシンで分担（共有フォルダのキューにプリセットを積み、各マシンのワーカーが取る）:\n"
+            "    python main.py --run-job --queue \\\\server\\share\\pwq --local-workers 1\n"
+            "    python main.py --queue-worker \\\\server\\share\\pwq --headless   (他のマシンで)\n\n"
+            "  ブラウザを起動したまま待機（auto.browser_daemon=true なら以降の実行は起動を省いてこれに接続。止める時は --stop-browser-daemon）:\n"
+            "    python main.py --browser-daemon --headless\n\n"
             "※ タスクスケジューラで『毎日1回』起動すれば、score_data/daily/YYYY-MM-DD に1日1回のスナップが残ります。\n※ 6ヶ月以上前のruns/daily/history/logは自動で削除/圧縮(行数制限)されます（--no-retentionで無効化可）。\n"
             "※ 通知を確実に出すには、タスクは『ユーザーがログオンしている場合のみ実行』推奨。"
         )
         raise SystemExit(0)
 
-    if args.run_job:
+    time_budget_s = (args.time_budget * 60.0) if args.time_budget else None
+    shards = max(1, int(args.shards or 1))
+    if args.stop_browser_daemon:
+        write_stop_flag("stop", os.path.join(STATE_DIR, BROWSER_DAEMON_STOP_NAME))
+        print("ブラウザデーモンに停止を要求しました。")
+    elif args.browser_daemon:
+        cfg = load_config()
+        options = _resolve_options(args, None, cfg)
+        asyncio.run(
+            run_browser_daemon(
+                headless=options["headless"],
+                minimize_browser=options["minimize_browser"],
+                port=args.daemon_port,
+            )
+        )
+    elif args.queue_worker:
+        # キューのワーカー: 共有キューからプリセットを 1 件ずつ取り、結果をキューへ返す
+        cfg = load_config()
+        options = _resolve_options(args, None, cfg)
+        slot = (0, 1)
+        if args.shard:
+            try:
+                slot = tuple(int(x) for x in args.shard.split("/", 1))
+            except Exception:
+                print(f"--shard は k/N で指定してください: {args.shard}")
+                raise SystemExit(2)
+        asyncio.run(
+            run_queue_worker(
+                args.queue_worker,
+                run_id=args.queue_run or None,
+                slot=slot,
+                headless=options["headless"],
+                minimize_browser=options["minimize_browser"],
+            )
+        )
+    elif args.shard_worker:
+        # --shards の子プロセス: 親が書いた run_dir/job.json の設定で、受け持ちのプリセットだけ取る
+        cfg = load_config()
+        run_dir = args.shard_worker
+        job_state = read_job_state(os.path.join(run_dir, "job.json"))
+        if not job_state:
+            print(f"job.json が見つかりません: {run_dir}")
+            raise SystemExit(1)
+        try:
+            shard_i, shard_n = [int(x) for x in args.shard.split("/", 1)]
+        except Exception:
+            print(f"--shard は k/N で指定してください: {args.shard}")
+            raise SystemExit(2)
+        options = _resolve_options(args, job_state, cfg)
+        asyncio.run(
+            run_job(
+                preset_names=options["preset_names"],
+                jobs=options["jobs"],
+                headless=options["headless"],
+                minimize_browser=options["minimize_browser"],
+                concurrency=options["concurrency"],
+                trigger_context=options["trigger_context"],
+                force_today=args.force_today,
+                preset_parallel=options["preset_parallel"],
+                resume_dir=run_dir,
+                time_budget_s=job_state.get("time_budget_s"),
+                shard=(shard_i, shard_n),
+            )
+        )
+    elif args.resume:
+        cfg = load_config()
+        resume_dir = args.resume
+        if not os.path.isdir(resume_dir):
+            resume_dir = os.path.join(RUNS_DIR, args.resume)
+        if not os.path.isdir(resume_dir):
+            print(f"run フォルダが見つかりません: {args.resume}")
+            raise SystemExit(1)
+        job_state = read_job_state(os.path.join(resume_dir, "job.json"))
+        if not job_state:
+            print(f"job.json が見つかりません: {resume_dir}")
+            raise SystemExit(1)
+
+        options = _resolve_options(args, job_state, cfg)
+        trigger = options["trigger_context"]
+        if trigger.startswith("auto"):
+            asyncio.run(
+                run_auto_once(
+                    preset_names=options["preset_names"],
+                    headless=options["headless"],
+                    minimize_browser=options["minimize_browser"],
+                    concurrency=options["concurrency"],
+                    do_notify=options["do_notify"],
+                    force_today=args.force_today,
+                    retention_months=options["retention_months"],
+                    retention_max_lines=options["retention_max_lines"],
+                    retention_disabled=args.no_retention,
+                    trigger_context=trigger,
+                    resume_dir=resume_dir,
+                    time_budget_s=time_budget_s,
+                )
+            )
+        else:
+            asyncio.run(
+                run_job(
+                    preset_names=options["preset_names"],
+                    jobs=options["jobs"],
+                    headless=options["headless"],
+                    minimize_browser=options["minimize_browser"],
+                    concurrency=options["concurrency"],
+                    trigger_context=trigger,
+                    force_today=args.force_today,
+                    preset_parallel=options["preset_parallel"],
+                    resume_dir=resume_dir,
+                    time_budget_s=time_budget_s,
+                )
+            )
+    elif args.run_job:
         cfg = load_config()
         job_path = args.job_file or job_state_path()
         job_state = read_job_state(job_path)
@@ -183,6 +326,40 @@ if __name__ == "__main__":
                     retention_max_lines=options["retention_max_lines"],
                     retention_disabled=args.no_retention,
                     trigger_context=trigger,
+                    time_budget_s=time_budget_s,
+                    shards=shards,
+                    queue=args.queue or None,
+                    local_workers=args.local_workers,
+                )
+            )
+        elif args.queue:
+            asyncio.run(
+                run_job_queued(
+                    args.queue,
+                    preset_names=options["preset_names"],
+                    jobs=options["jobs"],
+                    headless=options["headless"],
+                    minimize_browser=options["minimize_browser"],
+                    concurrency=options["concurrency"],
+                    trigger_context=trigger,
+                    force_today=args.force_today,
+                    time_budget_s=time_budget_s,
+                    local_workers=args.local_workers,
+                )
+            )
+        elif shards > 1:
+            asyncio.run(
+                run_job_sharded(
+                    shards,
+                    preset_names=options["preset_names"],
+                    jobs=options["jobs"],
+                    headless=options["headless"],
+                    minimize_browser=options["minimize_browser"],
+                    concurrency=options["concurrency"],
+                    trigger_context=trigger,
+                    force_today=args.force_today,
+                    preset_parallel=options["preset_parallel"],
+                    time_budget_s=time_budget_s,
                 )
             )
         else:
@@ -195,6 +372,8 @@ if __name__ == "__main__":
                     concurrency=options["concurrency"],
                     trigger_context=trigger,
                     force_today=args.force_today,
+                    preset_parallel=options["preset_parallel"],
+                    time_budget_s=time_budget_s,
                 )
             )
     elif args.auto:
@@ -219,6 +398,10 @@ if __name__ == "__main__":
                 retention_max_lines=options["retention_max_lines"],
                 retention_disabled=args.no_retention,
                 trigger_context=options["trigger_context"],
+                time_budget_s=time_budget_s,
+                shards=shards,
+                queue=args.queue or None,
+                local_workers=args.local_workers,
             )
         )
     else:
@@ -1,18 +1,44 @@
-import re, sys, json, time, threading, webbrowser, os, shutil, math
+import re, sys, json, time, threading, webbrowser, os, shutil, math, weakref, hashlib, queue, socket, contextlib, copy
 import datetime
 import calendar
 from collections import deque
 from dataclasses import dataclass
 from urllib.parse import urlparse, urljoin
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
+from core.asset_cache import ASSET_CACHE_DIR_NAME, AssetCache, is_cacheable_response
+from core.browser_daemon import (
+    BROWSER_DAEMON_FILE_NAME,
+    BROWSER_DAEMON_STOP_NAME,
+    cdp_version,
+    clear_daemon_state,
+    read_daemon_state,
+    write_daemon_state,
+)
+from core.cancel import CancelToken
+from core.calendar_parse import (
+    diff_calendar_stats,
+    find_calendar_iframe_src,
+    find_error_message,
+    has_calendar_table,
+    parse_calendar_files,
+    parse_calendar_html,
+)
+from core.checkpoint import RunCheckpoint, load_checkpoint, load_job_rows
+from core.list_cache import LIST_CACHE_FILE_NAME, ListCache, list_page_fingerprint
+from core.proc_mem import process_tree_rss
+from core.negative_cache import NEGATIVE_CACHE_FILE_NAME, NegativeCache, is_negative_reason
+from core.retry_queue import RetryQueue
+from core.work_queue import WORK_QUEUE_FILE_NAME, open_work_queue
 from core.state import (
     clear_stop_flag,
     job_state_path,
     progress_state_path,
     read_job_state,
+    stop_flag_path,
     stop_requested,
     write_job_state,
     write_progress_state,
+    write_stop_flag,
 )
 
 # ======== 内部設定（基本いじらなくてOK）========
@@ -39,6 +65,14 @@ BLOCK_URL_SUBSTR = [
     "rubiconproject", "adnxs", "gsspat", "sc-analytics", "d-markets",
     "translate.google.com",
 ]
+# ページ種別ごとのブロック方針（リクエスト元 frame の URL で判定）
+# - reservation: 予約ページ本体はスタイルと他ドメインのスクリプトも不要（カレンダー iframe は別 frame）
+# - calendar: カレンダー iframe は描画に要るものを通す
+ROUTE_PROFILES = {
+    "list": {"types": BLOCK_RESOURCE_TYPES, "third_party_scripts": False},
+    "reservation": {"types": BLOCK_RESOURCE_TYPES | {"stylesheet"}, "third_party_scripts": True},
+    "calendar": {"types": BLOCK_RESOURCE_TYPES, "third_party_scripts": False},
+}
 
 DATA_ROOT = os.path.join(BASE_DIR, "score_data")
 STATE_DIR = os.path.join(DATA_ROOT, "state")
@@ -273,37 +307,6 @@ def _probe_login_like_iframe_sync(page):
             login_like = True
     return login_like, iframe_src, iframe_h, iframe_frame_url
 
-async def _probe_login_like_iframe_async(page):
-    iframe_src = ""
-    iframe_h = 0.0
-    iframe_frame_url = ""
-    login_like = False
-    try:
-        ih = await page.query_selector("iframe[name='pcreserveiframe'], iframe#pcreserveiframe, iframe[src*='yoyaku.cityheaven.net'], iframe[src*='A6ShopReservation']")
-    except Exception:
-        ih = None
-    if ih:
-        try:
-            iframe_src = (await ih.get_attribute("src")) or ""
-        except Exception:
-            iframe_src = ""
-        try:
-            iframe_h = float(await ih.evaluate("el => el.getBoundingClientRect().height") or 0.0)
-        except Exception:
-            iframe_h = 0.0
-        try:
-            fr = await ih.content_frame()
-        except Exception:
-            fr = None
-        if fr:
-            try:
-                iframe_frame_url = fr.url or ""
-            except Exception:
-                iframe_frame_url = ""
-        if iframe_src and any(kw in iframe_src for kw in _LOGIN_IFRAME_KEYWORDS) and iframe_h <= 300:
-            login_like = True
-    return login_like, iframe_src, iframe_h, iframe_frame_url
-
 def _detail_log_enabled() -> bool:
     for key in _DETAIL_LOG_ENV_KEYS:
         val = os.environ.get(key, "")
@@ -808,106 +811,140 @@ def _is_not_reservable_page_sync(page) -> tuple[bool, str]:
 
     return False, ""
 
-async def _is_not_reservable_page_async(page) -> tuple[bool, str]:
-    """
-    非同期版: 例外ページ（「該当の女の子は予約できません」等）を検出して、カレンダー待ちタイムアウトを回避する。
-    エラーメッセージが iframe 内に出るケースがあるため、frames も走査する。
-    """
-    async def _check_ctx(ctx, label: str, require_reserve_ui: bool) -> tuple[bool, str]:
+_RESERVATION_FRAME_TOKENS = ("yoyaku.cityheaven.net", "/A6ShopReservation", "/calendar/", "/error/", "EFRESV")
+_PROBE_TEXT_MAX_CHARS = 20000
+
+# 予約ページの判定材料（例外メッセージ/本文/iframe/リンク/時間表）を 1 回の evaluate でまとめて取る
+_PAGE_SIGNALS_JS = r"""
+([maxChars, withPage]) => {
+  const timeRe = /^\s*\d{1,2}:\d{2}/;
+  const text = (el) => ((el && el.innerText) || "").trim();
+  const out = {};
+  const err = document.querySelector("div.error-msg");
+  out.err_msg = text(err).slice(0, maxChars);
+  out.body_txt = (document.body ? (document.body.innerText || "") : "").trim().slice(0, maxChars);
+  out.has_table = false;
+  for (const t of Array.from(document.querySelectorAll("table"))) {
+    const rows = Array.from(t.querySelectorAll("tr"));
+    if (rows.some(r => timeRe.test((r.querySelector("td,th")?.innerText || "").trim()))) { out.has_table = true; break; }
+  }
+  if (!withPage) return out;
+  const ih = document.querySelector("iframe[name='pcreserveiframe'], iframe#pcreserveiframe, iframe[src*='yoyaku.cityheaven.net'], iframe[src*='A6ShopReservation']");
+  out.iframe = !!ih;
+  out.iframe_src = ih ? (ih.getAttribute("src") || "") : "";
+  out.iframe_src_abs = ih ? (ih.src || "") : "";
+  out.iframe_name = ih ? (ih.getAttribute("name") || ih.id || "") : "";
+  out.iframe_h = ih ? (ih.getBoundingClientRect().height || 0) : 0;
+  out.has_reserve_ui = !!document.querySelector("#shop-reservation, iframe[name='pcreserveiframe'], iframe#pcreserveiframe");
+  const hrefRe = /A6ShopReservation|Reservation|reserve|calendar|yoyaku/;
+  out.link = Array.from(document.querySelectorAll("a")).some(a => hrefRe.test(a.getAttribute("href") || "") || (a.textContent || "").includes("予約"));
+  out.iframe_hint = (!out.iframe && !out.link) ? (document.documentElement.outerHTML || "").includes("pcreserveiframe") : false;
+  return out;
+}
+"""
+
+def _pick_reserve_frame(page, name: str = "", src_abs: str = ""):
+    fr = None
+    for nm in (name, "pcreserveiframe"):
+        if fr or not nm:
+            continue
         try:
-            cur_url = (ctx.url or "")
+            fr = page.frame(name=nm)
         except Exception:
-            cur_url = ""
-        if cur_url and ("yoyaku.cityheaven.net/error" in cur_url or "EFRESV" in cur_url):
-            return True, f"{label}:url_error"
-
+            fr = None
+    if not fr and src_abs:
         try:
-            err = await ctx.query_selector("div.error-msg")
+            fr = next((f for f in page.frames if (f.url or "") == src_abs), None)
         except Exception:
-            err = None
-
-        msg = ""
-        if err:
-            try:
-                msg = await ctx.locator("div.error-msg").first.inner_text(timeout=500)
-            except Exception:
-                try:
-                    msg = (await err.text_content()) or ""
-                except Exception:
-                    msg = ""
-            msg = (msg or "").strip()
-
-        body_txt = ""
-        if not msg:
-            try:
-                body_txt = await ctx.locator("body").inner_text(timeout=300)
-            except Exception:
-                body_txt = ""
-            body_txt = (body_txt or "").strip()
-
-        hit_txt = msg or body_txt
-        if not hit_txt:
-            return False, ""
-
-        if "予約できません" not in hit_txt and "予約できない" not in hit_txt and "予約不可" not in hit_txt:
-            return False, ""
-
-        if require_reserve_ui:
-            try:
-                has_reserve_ui = bool(await page.query_selector("#shop-reservation"))
-            except Exception:
-                has_reserve_ui = False
-            if not has_reserve_ui:
-                try:
-                    has_reserve_ui = bool(await page.query_selector("iframe[name='pcreserveiframe'], iframe#pcreserveiframe"))
-                except Exception:
-                    has_reserve_ui = False
-            if not has_reserve_ui:
-                return False, ""
-
-        helpers = []
-        for kw in ("別の女の子", "お手数ですが", "該当の女の子"):
-            if kw in hit_txt:
-                helpers.append(kw)
-        reason = f"{label}:予約できません"
-        if helpers:
-            reason = f"{reason}/" + ",".join(helpers)
-        return True, reason
-
-    ok, reason = await _check_ctx(page, "page", True)
-    if ok:
-        if _detail_log_enabled():
-            try:
-                log_event("DBG", "skip not-reservable", reason=reason, url=(page.url or ""))
-            except Exception:
-                pass
-        return True, reason
+            fr = None
+    return fr
 
+async def _collect_page_signals_async(page) -> dict:
+    """
+    予約ページの判定材料を 1 往復で集める（iframe はクロスオリジンなので frame ごとに 1 回、並行実行）。
+    _is_not_reservable_page_async / _reservation_page_probe_async はこの結果だけで判定する。
+    """
+    try:
+        page_url = page.url or ""
+    except Exception:
+        page_url = ""
+    targets = []
     try:
         frames = list(page.frames)
+        main = page.main_frame
     except Exception:
         frames = []
-
+        main = None
     for fr in frames:
+        if fr == main:
+            continue
         try:
             fr_url = (fr.url or "")
             fr_name = (fr.name or "")
         except Exception:
-            fr_url = ""
-            fr_name = ""
-        if fr_url and ("yoyaku.cityheaven.net" in fr_url or "/A6ShopReservation" in fr_url or "/calendar/" in fr_url or "/error/" in fr_url or "EFRESV" in fr_url):
-            ok, reason = await _check_ctx(fr, f"frame[{fr_name or 'noname'}]", False)
-        elif fr_name and ("pcreserveiframe" in fr_name):
-            ok, reason = await _check_ctx(fr, f"frame[{fr_name}]", False)
-        else:
             continue
+        # 無関係な frame をむやみに叩かない（速度と安定性）
+        if (fr_url and any(tok in fr_url for tok in _RESERVATION_FRAME_TOKENS)) or ("pcreserveiframe" in fr_name):
+            targets.append((fr, fr_url, fr_name))
+
+    async def _eval(ctx, with_page: bool):
+        try:
+            return await ctx.evaluate(_PAGE_SIGNALS_JS, [_PROBE_TEXT_MAX_CHARS, with_page]) or {}
+        except Exception:
+            return {}
+
+    results = await asyncio.gather(_eval(page, True), *[_eval(fr, False) for fr, _, _ in targets])
+    sig = dict(results[0])
+    sig["url"] = page_url
+    sig["frames"] = []
+    for (fr, fr_url, fr_name), res in zip(targets, results[1:]):
+        sig["frames"].append({"frame": fr, "url": fr_url, "name": fr_name, **res})
+    return sig
+
+def _not_reservable_text_hit(label: str, url: str, err_msg: str, body_txt: str) -> tuple[bool, str]:
+    if url and ("yoyaku.cityheaven.net/error" in url or "EFRESV" in url):
+        return True, f"{label}:url_error"
+    hit_txt = (err_msg or "").strip() or (body_txt or "").strip()
+    if not hit_txt:
+        return False, ""
+    if "予約できません" not in hit_txt and "予約できない" not in hit_txt and "予約不可" not in hit_txt:
+        return False, ""
+    helpers = []
+    for kw in ("別の女の子", "お手数ですが", "該当の女の子"):
+        if kw in hit_txt:
+            helpers.append(kw)
+    reason = f"{label}:予約できません"
+    if helpers:
+        reason = f"{reason}/" + ",".join(helpers)
+    return True, reason
+
+async def _is_not_reservable_page_async(page, signals: dict = None) -> tuple[bool, str]:
+    """
+    非同期版: 例外ページ（「該当の女の子は予約できません」等）を検出して、カレンダー待ちタイムアウトを回避する。
+    エラーメッセージが iframe 内に出るケースがあるため、frames も走査する。
+    signals（_collect_page_signals_async の結果）があれば DOM には触れない。
+    """
+    sig = signals if signals is not None else await _collect_page_signals_async(page)
+    page_url = sig.get("url") or ""
+
+    ok, reason = _not_reservable_text_hit("page", page_url, sig.get("err_msg"), sig.get("body_txt"))
+    if ok and (not reason.endswith(":url_error")) and (not sig.get("has_reserve_ui")):
+        ok, reason = False, ""
+    if ok:
+        if _detail_log_enabled():
+            log_event("DBG", "skip not-reservable", reason=reason, url=page_url)
+        return True, reason
 
+    frames = list(sig.get("frames") or [])
+    if page_url and any(tok in page_url for tok in _RESERVATION_FRAME_TOKENS):
+        # page.frames には main frame も含まれる（従来どおり予約UIの有無を問わずに判定）
+        frames.insert(0, {"url": page_url, "name": "", "err_msg": sig.get("err_msg"), "body_txt": sig.get("body_txt")})
+    for f in frames:
+        fr_name = f.get("name") or ""
+        ok, reason = _not_reservable_text_hit(f"frame[{fr_name or 'noname'}]", f.get("url") or "", f.get("err_msg"), f.get("body_txt"))
         if ok:
             if _detail_log_enabled():
-                try:
-                    log_event("DBG", "skip not-reservable(in-frame)", reason=reason, url=(page.url or ""), frame_url=fr_url, frame_name=fr_name)
-                except Exception:
-                    pass
+                log_event("DBG", "skip not-reservable(in-frame)", reason=reason, url=page_url, frame_url=f.get("url") or "", frame_name=fr_name)
             return True, reason
 
     return False, ""
@@ -1007,97 +1044,37 @@ def _reservation_page_probe_sync(page):
         "iframe_frame_url": iframe_frame_url,
     }
 
-async def _reservation_page_probe_async(page):
-    iframe = False
-    link = False
-    text_hit = False
-    iframe_hint = False
-    error_page = False
-    has_calendar_table = False
-    login_like = False
-    iframe_src = ""
-    iframe_h = 0.0
-    iframe_frame_url = ""
-    try:
-        cur_url = page.url or ""
-        if "yoyaku.cityheaven.net/error" in cur_url:
-            error_page = True
-    except Exception:
-        cur_url = ""
-    try:
-        iframe = bool(await page.query_selector("iframe[name='pcreserveiframe'], iframe#pcreserveiframe, iframe[src*='yoyaku.cityheaven.net'], iframe[src*='A6ShopReservation']"))
-    except Exception:
-        iframe = False
-    login_like, iframe_src, iframe_h, iframe_frame_url = await _probe_login_like_iframe_async(page)
-    try:
-        link = bool(await page.query_selector("a[href*='A6ShopReservation'], a[href*='Reservation'], a[href*='reserve'], a[href*='calendar'], a[href*='yoyaku'], a:has-text('ネット予約'), a:has-text('WEB予約'), a:has-text('予約')"))
-    except Exception:
-        link = False
-    if not iframe and not link:
-        try:
-            html = await page.content()
-            iframe_hint = "pcreserveiframe" in (html or "")
-        except Exception:
-            iframe_hint = False
+async def _reservation_page_probe_async(page, signals: dict = None):
+    sig = signals if signals is not None else await _collect_page_signals_async(page)
+    cur_url = sig.get("url") or ""
+    error_page = "yoyaku.cityheaven.net/error" in cur_url
+    iframe = bool(sig.get("iframe"))
+    link = bool(sig.get("link"))
+    iframe_hint = bool(sig.get("iframe_hint"))
+    iframe_src = sig.get("iframe_src") or ""
     try:
-        body_txt = await page.locator("body").inner_text(timeout=500)
+        iframe_h = float(sig.get("iframe_h") or 0.0)
     except Exception:
-        body_txt = ""
-    if body_txt:
-        for kw in _RESERVATION_BLOCK_TEXTS:
-            if kw in body_txt:
-                text_hit = True
-                break
+        iframe_h = 0.0
+    body_txt = sig.get("body_txt") or ""
+    text_hit = any(kw in body_txt for kw in _RESERVATION_BLOCK_TEXTS) if body_txt else False
+    login_like = bool(iframe_src and any(kw in iframe_src for kw in _LOGIN_IFRAME_KEYWORDS) and iframe_h <= 300)
+
+    iframe_frame_url = ""
+    has_calendar_table = False
     if iframe:
-        try:
-            fr = page.frame(name="pcreserveiframe")
-        except Exception:
-            fr = None
-        if not fr:
-            try:
-                ih = await page.query_selector("iframe[name='pcreserveiframe']") or await page.query_selector("iframe#pcreserveiframe")
-                if ih:
-                    fr = await ih.content_frame()
-            except Exception:
-                fr = None
+        fr = _pick_reserve_frame(page, sig.get("iframe_name") or "", sig.get("iframe_src_abs") or "")
         if fr:
             try:
-                has_calendar_table = bool(await fr.evaluate(r"""
-(() => {
-  const timeRe = /^\s*\d{1,2}:\d{2}/;
-  const tables = Array.from(document.querySelectorAll("table"));
-  if (!tables.length) return false;
-  for (const t of tables) {
-    const rows = Array.from(t.querySelectorAll("tr"));
-    if (rows.some(r => timeRe.test((r.querySelector("td,th")?.innerText || "").trim()))) return true;
-  }
-  return false;
-})()
-"""))
-            except Exception:
-                has_calendar_table = False
-            try:
-                iframe_frame_url = fr.url or iframe_frame_url
-                if iframe_frame_url and ("yoyaku.cityheaven.net/error" in iframe_frame_url or "EFRESV" in iframe_frame_url):
-                    error_page = True
+                iframe_frame_url = fr.url or ""
             except Exception:
-                pass
+                iframe_frame_url = ""
+            f_sig = next((f for f in sig.get("frames") or [] if f.get("frame") is fr), None)
+            has_calendar_table = bool(f_sig and f_sig.get("has_table"))
+            if iframe_frame_url and ("yoyaku.cityheaven.net/error" in iframe_frame_url or "EFRESV" in iframe_frame_url):
+                error_page = True
     if not has_calendar_table:
-        try:
-            has_calendar_table = bool(await page.evaluate(r"""
-(() => {
-  const timeRe = /^\s*\d{1,2}:\d{2}/;
-  const tables = Array.from(document.querySelectorAll("table"));
-  if (!tables.length) return false;
-  for (const t of tables) {
-    const rows = Array.from(t.querySelectorAll("tr"));
-    if (rows.some(r => timeRe.test((r.querySelector("td,th")?.innerText || "").trim()))) return true;
-  }
-  return false;
-})()
-"""))
-        except Exception:
-            has_calendar_table = False
+        has_calendar_table = bool(sig.get("has_table"))
     not_reservable = ((text_hit and not has_calendar_table) or error_page or login_like)
     return {
         "iframe": iframe,
@@ -1152,6 +1129,33 @@ def _calendar_sanity(stats: dict):
         return False, "td_count_too_large"
     return True, "ok"
 
+def _log_calendar_parity(js_stats: dict, frame_html: str, preset: str = None, gid: str = None, frame_url: str = None):
+    py_stats = parse_calendar_html(frame_html or "")
+    diffs = diff_calendar_stats(js_stats, py_stats)
+    log_event(
+        "WARN" if diffs else "DBG",
+        "calendar parity",
+        preset=preset,
+        gid=gid,
+        frame_url=frame_url,
+        match=not diffs,
+        diffs=diffs[:20],
+    )
+    return not diffs
+
+def _check_calendar_parity_sync(fr, js_stats: dict, preset: str = None, gid: str = None, frame_url: str = None):
+    """CAL_PARITY_CHECK=1 のとき、ページ内JSの集計と Python パーサの集計を突き合わせてログに残す"""
+    try:
+        return _log_calendar_parity(js_stats, fr.content() or "", preset, gid, frame_url)
+    except Exception:
+        return None
+
+async def _check_calendar_parity_async(fr, js_stats: dict, preset: str = None, gid: str = None, frame_url: str = None):
+    try:
+        return _log_calendar_parity(js_stats, (await fr.content()) or "", preset, gid, frame_url)
+    except Exception:
+        return None
+
 def _calendar_debug_dir():
     ensure_data_dirs()
     base = _CURRENT_RUN_DIR or LOG_DIR
@@ -2011,6 +2015,8 @@ def _count_calendar_stats_by_slots_core(page, stop_evt: threading.Event, progres
   return out;
 })()
 """)
+                if _env_flag("CAL_PARITY_CHECK") and isinstance(stats, dict) and stats.get("ok"):
+                    _check_calendar_parity_sync(fr, stats, preset, gid, frame_url)
                 suspicious_hit = False
                 suspicious_meta = None
                 page_html = ""
@@ -3101,6 +3107,64 @@ def save_state_snapshot(gid: str, snap: dict):
     except Exception as e:
         log_event("ERR", "save_state_snapshot failed", path=path, err=str(e)[:200])
 
+UNCHANGED_FILE = os.path.join(STATE_DIR, "unchanged.json")
+# カレンダー未変化時に state から使い回す（再計算しない）スコア系フィールド
+_REUSABLE_SCORE_KEYS = (
+    "big_score", "big_score_old", "bd_detail", "bd_level", "bd_trust", "bd_days", "bd_window",
+    "bd_service_days", "bd_obs_days", "bd_model", "bd_model_version",
+    "quality_score", "quality_lower_bound", "momentum_score", "rank_score_raw", "rank_score_lower",
+    "rank_model_version", "rank_detail",
+)
+
+def _calendar_fingerprint(stats: dict, stats_by_date: dict = None) -> str:
+    """_calendar_signature + stats_by_date の内容ハッシュ（カレンダーが前回と同じかの判定用）"""
+    if not isinstance(stats, dict) or not stats.get("ok"):
+        return ""
+    payload = {
+        "sig": list(_calendar_signature(stats)),
+        "by_date": stats_by_date if isinstance(stats_by_date, dict) else {},
+        "score_model": _SCORE_MODEL_NAME,
+        "bd_model": _BD_MODEL_NAME,
+        "rank_model": _RANK_MODEL_NAME,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _reusable_scoring(prev: dict, fp: str, today: str = None):
+    """
+    前回 state と指紋が一致し、同じ日に計算済みならスコア系フィールドを返す（なければ None）。
+    BD は「今日」と観測日数に依存するので、日をまたいだら必ず再計算して履歴も追記する。
+    """
+    if not fp or not isinstance(prev, dict):
+        return None
+    if prev.get("calendar_fp") != fp:
+        return None
+    scoring = prev.get("scoring")
+    if not isinstance(scoring, dict) or scoring.get("rank_score_raw") is None:
+        return None
+    today = today or time.strftime("%Y%m%d")
+    if str(prev.get("ts") or "")[:8] != today:
+        return None
+    return {k: scoring.get(k) for k in _REUSABLE_SCORE_KEYS}
+
+def _record_unchanged_observations(gids: list, preset: str = None, path: str = None):
+    """未変化 gid の観測（最終確認時刻/回数）を 1 ファイルにまとめて記録する"""
+    if not gids:
+        return
+    path = path or UNCHANGED_FILE
+    data = {}
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as r:
+                data = json.load(r) or {}
+    except Exception:
+        data = {}
+    ts = _now_ts()
+    for gid in gids:
+        cur = data.get(gid) if isinstance(data.get(gid), dict) else {}
+        data[gid] = {"ts": ts, "preset": preset, "count": int(cur.get("count", 0) or 0) + 1}
+    _atomic_write_json(path, data)
+
 def _atomic_write_text(path: str, text: str):
     tmp_path = f"{path}.tmp{os.getpid()}_{int(time.time() * 1000)}"
     try:
@@ -4219,6 +4283,32 @@ def load_config():
             "headful": False,
             "concurrency": 3,
             "min_nav_interval_ms": 650,
+            "skip_unchanged": True,
+            "negative_cache_hours": 72,
+            "negative_recheck_ratio": 0.1,
+            "list_cache_hours": 12,
+            "retry_max_attempts": 3,
+            "retry_base_delay_s": 2.0,
+            "retry_budget": 60,
+            "circuit_threshold": 3,
+            "circuit_cooldown_s": 60,
+            "route_profiles": True,
+            "asset_cache_mb": 64,
+            "asset_cache_hours": 6,
+            "nav_adaptive": True,
+            "nav_interval_floor_ms": 250,
+            "nav_interval_max_ms": 8000,
+            "preset_parallel": 1,
+            "calendar_engine": "browser",
+            "browser_recycle_pages": 0,
+            "browser_recycle_minutes": 0,
+            "browser_rss_limit_mb": 0,
+            "browser_page_limit": 0,
+            "browser_daemon": False,
+            "browser_daemon_port": 9333,
+            "queue_lease_s": 300,
+            "queue_max_attempts": 2,
+            "queue_idle_exit_s": 600,
             "force_overwrite_today": False,
             "once_per_day": True,
             "minimize_browser": False,
@@ -4336,7 +4426,7 @@ class AsyncNavLimiter:
         self._lock = asyncio.Lock()
         self._t_last = 0.0
 
-    async def wait_turn(self):
+    async def wait_turn(self, url: str = None):
         async with self._lock:
             now = time.perf_counter()
             dt = now - self._t_last
@@ -4344,26 +4434,352 @@ class AsyncNavLimiter:
                 await asyncio.sleep(self.min_interval - dt)
             self._t_last = time.perf_counter()
 
-async def async_goto_retry(page, url: str, wait_until="domcontentloaded", tries=2, preset: str = None, gid: str = None):
-    if not _valid_url(url):
-        if _detail_log_enabled():
-            log_event(
-                "INFO",
-                "skip invalid url",
-                preset=preset,
-                gid=gid,
-                url=(url or ""),
-            )
-            _detail_log_skip(preset, gid, "invalid_url")
-        return False
-    for _ in range(tries):
+NAV_RATE_FILE = os.path.join(STATE_DIR, "nav_rate.json")
+
+class AsyncAdaptiveNavLimiter:
+    """
+    goto間隔をサイトの反応に合わせて調整する（ホスト単位のトークンバケット + AIMD）
+    - 正常応答が続けば少しずつ速く（加算）
+    - ブロック兆候（suspicious/BlockedBySiteError/遅延の急増）で大きく遅く（乗算）
+    - 学習した間隔は NAV_RATE_FILE に保存し、次回はそこから始める
+    """
+    def __init__(self, min_interval_ms: int = 650, floor_ms: int = 250, max_interval_ms: int = 8000,
+                 burst: float = 1.0, state_path: str = None):
+        self.start_interval = max(0.05, float(min_interval_ms) / 1000.0)
+        self.floor = max(0.05, float(floor_ms) / 1000.0)
+        self.ceil = max(self.floor, float(max_interval_ms) / 1000.0)
+        self.burst = max(1.0, float(burst))
+        self.additive = 0.05        # 正常応答ごとに増やす rate（req/s）
+        self.decrease_blocked = 0.5  # ブロック兆候で rate を何倍にするか
+        self.decrease_slow = 0.8     # 遅延急増で rate を何倍にするか
+        self.state_path = state_path if state_path is not None else NAV_RATE_FILE
+        self._lock = asyncio.Lock()
+        self._hosts = {}
+        self._saved = self._load()
+
+    @staticmethod
+    def _host(url: str) -> str:
         try:
-            await page.goto(url, wait_until=wait_until, timeout=NAV_TIMEOUT_MS)
-            return True
+            return (urlparse(url or "").hostname or "").lower() or "*"
         except Exception:
-            try:
-                await page.wait_for_timeout(700)
-                await page.reload(wait_until=wait_until, timeout=NAV_TIMEOUT_MS)
+            return "*"
+
+    def _load(self) -> dict:
+        try:
+            if self.state_path and os.path.exists(self.state_path):
+                with open(self.state_path, "r", encoding="utf-8") as r:
+                    data = json.load(r) or {}
+                return data if isinstance(data, dict) else {}
+        except Exception:
+            pass
+        return {}
+
+    def _state(self, host: str) -> dict:
+        st = self._hosts.get(host)
+        if st is None:
+            interval = self.start_interval
+            try:
+                saved = self._saved.get(host) or {}
+                if saved.get("interval_ms"):
+                    interval = float(saved["interval_ms"]) / 1000.0
+            except Exception:
+                pass
+            interval = min(self.ceil, max(self.floor, interval))
+            st = {
+                "rate": 1.0 / interval,
+                "tokens": 1.0,
+                "t_last": time.perf_counter(),
+                "latency_ewma": None,
+                "ok": 0,
+                "blocked": 0,
+                "slow": 0,
+            }
+            self._hosts[host] = st
+        return st
+
+    def _clamp(self, st: dict):
+        st["rate"] = min(1.0 / self.floor, max(1.0 / self.ceil, st["rate"]))
+
+    def interval_ms(self, url: str = None) -> int:
+        return int(round(1000.0 / self._state(self._host(url))["rate"]))
+
+    async def wait_turn(self, url: str = None):
+        host = self._host(url)
+        async with self._lock:
+            st = self._state(host)
+            while True:
+                now = time.perf_counter()
+                st["tokens"] = min(self.burst, st["tokens"] + (now - st["t_last"]) * st["rate"])
+                st["t_last"] = now
+                if st["tokens"] >= 1.0:
+                    st["tokens"] -= 1.0
+                    return
+                await asyncio.sleep((1.0 - st["tokens"]) / st["rate"])
+
+    def report(self, url: str = None, ok: bool = True, latency_s: float = None, blocked: bool = False):
+        """ナビゲーション結果を反映する。blocked=True はブロック兆候"""
+        host = self._host(url)
+        st = self._state(host)
+        before = st["rate"]
+        slow = False
+        if latency_s is not None and latency_s > 0 and ok and not blocked:
+            ewma = st["latency_ewma"]
+            if ewma is not None and latency_s > max(ewma * 2.0, ewma + 2.0):
+                slow = True
+            st["latency_ewma"] = latency_s if ewma is None else (ewma * 0.8 + latency_s * 0.2)
+        if blocked:
+            st["blocked"] += 1
+            st["rate"] *= self.decrease_blocked
+            st["tokens"] = 0.0
+        elif slow:
+            st["slow"] += 1
+            st["rate"] *= self.decrease_slow
+        elif ok:
+            st["ok"] += 1
+            st["rate"] += self.additive
+        self._clamp(st)
+        if (blocked or slow) and _detail_log_enabled():
+            log_event(
+                "DBG",
+                "nav rate backoff",
+                host=host,
+                reason="blocked" if blocked else "latency",
+                interval_ms_before=int(round(1000.0 / before)),
+                interval_ms=int(round(1000.0 / st["rate"])),
+            )
+
+    def stats(self) -> dict:
+        out = {}
+        for host, st in self._hosts.items():
+            out[host] = {
+                "interval_ms": int(round(1000.0 / st["rate"])),
+                "ok": st["ok"],
+                "blocked": st["blocked"],
+                "slow": st["slow"],
+            }
+        return out
+
+    def save(self):
+        if not self.state_path or not self._hosts:
+            return
+        data = dict(self._load())
+        now = time.time()
+        for host, st in self._hosts.items():
+            interval_ms = int(round(1000.0 / st["rate"]))
+            if st["blocked"]:
+                # ブロックを受けた回は、次回も控えめな間隔から始める
+                interval_ms = max(interval_ms, int(self.start_interval * 1000))
+            data[host] = {"interval_ms": interval_ms, "updated_at": now}
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        except Exception:
+            pass
+        _atomic_write_json(self.state_path, data)
+
+def _nav_limiter_from_config(cfg: dict):
+    auto = (cfg or {}).get("auto", {}) or {}
+    min_ms = int(auto.get("min_nav_interval_ms", 650) or 650)
+    if not auto.get("nav_adaptive", True):
+        return AsyncNavLimiter(min_ms)
+    return AsyncAdaptiveNavLimiter(
+        min_interval_ms=min_ms,
+        floor_ms=int(auto.get("nav_interval_floor_ms", 250) or 250),
+        max_interval_ms=int(auto.get("nav_interval_max_ms", 8000) or 8000),
+    )
+
+# このステータスで返ってきたページはブロック兆候として扱う
+_BLOCK_HTTP_STATUSES = (403, 429, 503)
+
+class HostCircuitBreaker:
+    """
+    ホスト単位のサーキットブレーカー（closed → open → half_open → closed）
+    - closed: window_s 秒以内にブロック兆候（strong suspicious / 403・429・503 / 一覧のブロック画面）が
+      threshold 回で open
+    - open: cooldown の間は新しい遷移を止める（続けて open するたびに倍、上限 max_cooldown_s）
+    - half_open: probe を1件だけ通し、正常なら closed、ブロック兆候なら再び open
+    probe が結果を返さないまま probe_timeout_s を過ぎたら、次の待ち手が probe を引き継ぐ。
+    """
+    def __init__(self, threshold: int = 3, window_s: float = 120.0, cooldown_s: float = 60.0,
+                 max_cooldown_s: float = 600.0, max_opens: int = 4, probe_timeout_s: float = 180.0, clock=None):
+        self.threshold = max(1, int(threshold))
+        self.window_s = max(1.0, float(window_s))
+        self.cooldown_s = max(0.1, float(cooldown_s))
+        self.max_cooldown_s = max(self.cooldown_s, float(max_cooldown_s))
+        self.max_opens = max(1, int(max_opens))
+        self.probe_timeout_s = max(1.0, float(probe_timeout_s))
+        self._clock = clock or time.monotonic
+        self._hosts = {}
+        self.opened = 0
+        self.paused_s = 0.0
+
+    _host = staticmethod(AsyncAdaptiveNavLimiter._host)
+
+    def _state(self, host: str) -> dict:
+        st = self._hosts.get(host)
+        if st is None:
+            st = {"state": "closed", "strikes": [], "until": 0.0, "opens": 0, "probe_ts": None}
+            self._hosts[host] = st
+        return st
+
+    def state(self, url: str = None) -> str:
+        return self._state(self._host(url))["state"]
+
+    def gave_up(self, url: str = None) -> bool:
+        """続けて max_opens 回 open した（probe でも回復しない）"""
+        return self._state(self._host(url))["opens"] >= self.max_opens
+
+    def _open(self, host: str, st: dict, reason: str):
+        st["opens"] += 1
+        cooldown = min(self.max_cooldown_s, self.cooldown_s * (2 ** (st["opens"] - 1)))
+        st.update(state="open", until=self._clock() + cooldown, strikes=[], probe_ts=None)
+        self.opened += 1
+        log_event("WARN", "circuit open", host=host, reason=reason, cooldown_s=round(cooldown, 1), opens=st["opens"])
+
+    async def wait(self, url: str = None, cancel: CancelToken = None) -> bool:
+        """
+        遷移してよくなるまで待つ。half_open の probe 役になったら True を返す
+        （呼び出し側は結果を record(..., probe=True) で必ず返す）。
+        cancel（CancelToken）が立ったら open のままでも False で戻る（呼び出し側で cancel を見て打ち切る）。
+        """
+        host = self._host(url)
+        st = self._state(host)
+        start = self._clock()
+        woke = None
+        if cancel is not None:
+            woke = asyncio.Event()
+            cancel.subscribe(woke)
+        try:
+            while True:
+                now = self._clock()
+                if st["state"] == "closed" or (cancel is not None and cancel.is_set()):
+                    return False
+                if st["state"] == "open" and now >= st["until"]:
+                    st["state"] = "half_open"
+                    st["probe_ts"] = None
+                if st["state"] == "half_open" and (st["probe_ts"] is None or now - st["probe_ts"] > self.probe_timeout_s):
+                    st["probe_ts"] = now
+                    log_event("INFO", "circuit half-open probe", host=host, url=url)
+                    return True
+                delay = st["until"] - now if st["state"] == "open" else 0.5
+                delay = min(1.0, max(0.05, delay))
+                if woke is None:
+                    await asyncio.sleep(delay)
+                else:
+                    try:
+                        await asyncio.wait_for(woke.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            if woke is not None:
+                cancel.unsubscribe(woke)
+            self.paused_s += max(0.0, self._clock() - start)
+
+    def record(self, url: str = None, blocked: bool = None, probe: bool = False, reason: str = None):
+        """
+        遷移結果を反映する。blocked=None は判定なし（goto 失敗など。probe なら役を返すだけ）
+        """
+        host = self._host(url)
+        st = self._state(host)
+        if blocked:
+            if st["state"] == "half_open" or probe:
+                if st["state"] != "open":
+                    self._open(host, st, reason or "probe_blocked")
+                return
+            if st["state"] != "closed":
+                return
+            now = self._clock()
+            st["strikes"] = [t for t in st["strikes"] if now - t <= self.window_s] + [now]
+            if len(st["strikes"]) >= self.threshold:
+                self._open(host, st, reason or "blocked")
+            return
+        if probe and st["state"] == "half_open":
+            if blocked is None:
+                st["probe_ts"] = None
+                return
+            st.update(state="closed", strikes=[], opens=0, probe_ts=None)
+            log_event("INFO", "circuit closed", host=host)
+
+    def trip(self, url: str = None, reason: str = "blocked"):
+        """強いブロック兆候（一覧のブロック画面など）で即座に open する"""
+        host = self._host(url)
+        st = self._state(host)
+        if st["state"] != "open":
+            self._open(host, st, reason)
+
+    def stats(self) -> dict:
+        return {host: {"state": st["state"], "opens": st["opens"]} for host, st in self._hosts.items()}
+
+@contextlib.asynccontextmanager
+async def _breaker_slot(breaker, sem: asyncio.Semaphore, url: str, cancel: CancelToken = None):
+    """
+    ページ枠（sem）を取ってから遷移してよいか見直す。枠待ちの間に open / half_open になっていたら
+    枠を返して待ち直す（probe 役を持っていない限り、open 中に遷移しない）。probe 役かどうかを返す。
+    cancel が立ったら待ち直さずに枠を渡す（中で cancel を見て遷移せずに抜けること）。
+    """
+    while True:
+        probe = await breaker.wait(url, cancel=cancel) if breaker is not None else False
+        await sem.acquire()
+        if probe or breaker is None or breaker.state(url) == "closed" or (cancel is not None and cancel.is_set()):
+            break
+        sem.release()
+    try:
+        yield probe
+    finally:
+        sem.release()
+
+def _circuit_breaker_from_config(cfg: dict):
+    auto = (cfg or {}).get("auto", {}) or {}
+    threshold = int(auto.get("circuit_threshold", 3) or 0)
+    cooldown_s = float(auto.get("circuit_cooldown_s", 60) or 0)
+    if threshold <= 0 or cooldown_s <= 0:
+        return None
+    return HostCircuitBreaker(threshold=threshold, cooldown_s=cooldown_s)
+
+def _nav_report(nav_limiter, url: str, ok: bool = True, latency_s: float = None, blocked: bool = False):
+    report = getattr(nav_limiter, "report", None)
+    if report is None:
+        return
+    try:
+        report(url, ok=ok, latency_s=latency_s, blocked=blocked)
+    except Exception:
+        pass
+
+# page ごとの直近の goto のレスポンスステータス
+_NAV_STATUS = weakref.WeakKeyDictionary()
+
+def _last_nav_status(page):
+    try:
+        return _NAV_STATUS.get(page)
+    except Exception:
+        return None
+
+async def async_goto_retry(page, url: str, wait_until="domcontentloaded", tries=2, preset: str = None, gid: str = None):
+    if not _valid_url(url):
+        if _detail_log_enabled():
+            log_event(
+                "INFO",
+                "skip invalid url",
+                preset=preset,
+                gid=gid,
+                url=(url or ""),
+            )
+            _detail_log_skip(preset, gid, "invalid_url")
+        return False
+    for n in range(tries):
+        try:
+            resp = await page.goto(url, wait_until=wait_until, timeout=NAV_TIMEOUT_MS)
+            try:
+                _NAV_STATUS[page] = resp.status if resp is not None else None
+            except Exception:
+                pass
+            return True
+        except Exception:
+            if n + 1 >= tries:
+                # 最後の試行の後の reload は結果を使わないので省く
+                break
+            try:
+                await page.wait_for_timeout(700)
+                await page.reload(wait_until=wait_until, timeout=NAV_TIMEOUT_MS)
             except Exception:
                 pass
     return False
@@ -4561,7 +4977,187 @@ async def _dump_list_debug_async(page, preset_name: str, list_url: str, note: st
         pass
 
 
-async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = None, preset: str = None, gid: str = None):
+_CAL_QUIET_MS = 250
+_CAL_STABLE_TIMEOUT_MS = 3000
+_CAL_FRAME_HOST_TOKENS = ("yoyaku.cityheaven.net", "/A6ShopReservation", "/calendar/")
+# 予約カレンダー(iframe)内で MutationObserver を張り、表が quietMs 変化しなくなったら
+# light probe の結果を返す（timeoutMs 内に静止しなければ stable:false）
+_CAL_LIGHT_STABLE_JS = r"""
+([quietMs, timeoutMs]) => new Promise((resolve) => {
+  const timeRe = /^\s*\d{1,2}:\d{2}/;
+  const light = () => {
+    const tables = Array.from(document.querySelectorAll("table"));
+    if (!tables.length) return { ok:false, reason:"no table" };
+    let table = null;
+    for (const t of tables) {
+      const rows = Array.from(t.querySelectorAll("tr"));
+      if (rows.some(r => timeRe.test((r.querySelector("td,th")?.innerText || "").trim()))) { table = t; break; }
+    }
+    table = table || tables[0];
+    const rows = Array.from(table.querySelectorAll("tr"));
+    const dataRows = rows.filter(r => {
+      const first = r.querySelector("td,th");
+      if (!first) return false;
+      return timeRe.test(first.innerText.trim());
+    });
+    if (!dataRows.length) return { ok:false, reason:"no time rows" };
+    let maxCols = 0;
+    let tdCount = 0;
+    for (const r of dataRows) {
+      const tds = Array.from(r.children).filter(el => el.tagName === "TD" || el.tagName === "TH").slice(1);
+      let cols = 0;
+      tdCount += tds.length;
+      for (const td of tds) {
+        const cs = parseInt(td.getAttribute("colspan") || "1", 10) || 1;
+        cols += cs;
+      }
+      if (cols > maxCols) maxCols = cols;
+    }
+    if (maxCols <= 0) return { ok:false, reason:"no cols" };
+    return { ok:true, time_rows:dataRows.length, td_count:tdCount, max_cols:maxCols };
+  };
+  let done = false;
+  let quietTimer = null;
+  let hardTimer = null;
+  let obs = null;
+  const finish = (stable) => {
+    if (done) return;
+    done = true;
+    if (obs) obs.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(hardTimer);
+    const r = light();
+    r.stable = !!(stable && r.ok);
+    resolve(r);
+  };
+  const arm = () => {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(() => {
+      if (light().ok) finish(true);
+      else if (!obs) finish(false);
+    }, quietMs);
+  };
+  try {
+    obs = new MutationObserver(arm);
+    obs.observe(document.documentElement || document, { childList:true, subtree:true, attributes:true, characterData:true });
+  } catch (e) {
+    obs = null;
+  }
+  hardTimer = setTimeout(() => finish(false), timeoutMs);
+  arm();
+})
+"""
+
+def _calendar_stats_from_captured(page, frame_url: str):
+    """
+    route でキャプチャしたカレンダー(iframe)の生 HTML から集計する（DOM の往復なし）。
+    サニティ不合格・全部「―」・キャプチャなしは None を返し、呼び出し側は DOM 経路を続ける。
+    """
+    frame_html = _captured_doc(page, frame_url)
+    if not frame_html:
+        return None
+    try:
+        msg = find_error_message(frame_html)
+        if msg:
+            return {"ok": False, "reason": "not_reservable(error_msg_in_frame)", "frame_url": frame_url, "msg": msg[:160]}
+        stats = parse_calendar_html(frame_html)
+        sanity_ok, _ = _calendar_sanity(stats)
+        if (not sanity_ok) or _looks_like_all_dash(stats):
+            return None
+        try:
+            page_url = page.url
+        except Exception:
+            page_url = ""
+        detect = _detect_suspicious_markers(_captured_doc(page, page_url) or "", frame_html)
+    except Exception:
+        return None
+    if detect.get("suspicious_hit"):
+        # 疑わしい場合は従来どおり DOM 経路で確認・ダンプする
+        return None
+    stats["engine"] = "captured"
+    stats["suspicious_hit"] = False
+    stats["suspicious_markers_hit"] = []
+    stats["suspicious_vendor"] = None
+    stats["suspicious_excerpt"] = ""
+    stats["suspicious_strength"] = None
+    stats["_detail"] = {"sanity_retries": 0, "sanity_last_reason": None}
+    return stats
+
+class _CalendarFrameWatcher:
+    """
+    予約カレンダー待ちの固定スリープの代わり。
+    frameattached / framenavigated / 予約ドメインの response が来たら待ちを打ち切る。
+    cancel（CancelToken）が立った時も待ちを打ち切り、cancelled が True になる。
+    """
+    def __init__(self, page, cancel: CancelToken = None):
+        self.page = page
+        self._evt = asyncio.Event()
+        self._handlers = []
+        self.cancel = cancel
+        if cancel is not None:
+            cancel.subscribe(self._evt)
+        self._on("frameattached", self._on_frame)
+        self._on("framenavigated", self._on_frame)
+        self._on("response", self._on_response)
+
+    def _on(self, event: str, fn):
+        try:
+            self.page.on(event, fn)
+            self._handlers.append((event, fn))
+        except Exception:
+            pass
+
+    def _on_frame(self, frame):
+        try:
+            if frame == self.page.main_frame:
+                return
+        except Exception:
+            pass
+        self._evt.set()
+
+    def _on_response(self, response):
+        try:
+            url = response.url or ""
+        except Exception:
+            url = ""
+        if any(tok in url for tok in _CAL_FRAME_HOST_TOKENS):
+            self._evt.set()
+
+    async def wait(self, timeout_ms: int) -> int:
+        """イベントが来るか timeout_ms 経過まで待ち、実際に待った ms を返す"""
+        t0 = time.monotonic()
+        try:
+            await asyncio.wait_for(self._evt.wait(), timeout=max(0, timeout_ms) / 1000.0)
+        except asyncio.TimeoutError:
+            pass
+        except Exception:
+            pass
+        if not self.cancelled:
+            self._evt.clear()
+        return int((time.monotonic() - t0) * 1000)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel is not None and self.cancel.is_set()
+
+    def close(self):
+        if self.cancel is not None:
+            self.cancel.unsubscribe(self._evt)
+        for event, fn in self._handlers:
+            try:
+                self.page.remove_listener(event, fn)
+            except Exception:
+                pass
+        self._handlers = []
+
+async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = None, preset: str = None, gid: str = None, cancel: CancelToken = None):
+    watcher = _CalendarFrameWatcher(page, cancel=cancel)
+    try:
+        return await _count_calendar_stats_by_slots_async_loop(page, watcher, max_wait_ms=max_wait_ms, preset=preset, gid=gid)
+    finally:
+        watcher.close()
+
+async def _count_calendar_stats_by_slots_async_loop(page, watcher, max_wait_ms: int = None, preset: str = None, gid: str = None):
     waited = 0
     if max_wait_ms is None:
         max_wait_ms = min(CAL_WAIT_MS, CAL_WAIT_LONG_MS)
@@ -4583,7 +5179,10 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
     frame_names = []
     frame_urls = []
     suspicious_dumped = False
+    captured_tried = set()
     while waited <= max_wait_ms:
+        if watcher.cancelled:
+            return {"ok": False, "reason": "cancelled"}, last_frame_url
         fr = None
         frame_url = ""
         try:
@@ -4596,6 +5195,13 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
                         return {"ok": False, "reason": "not_reservable(frame_url_error)", "frame_url": frame_url}, frame_url
                 except Exception:
                     pass
+                if frame_url and frame_url not in captured_tried:
+                    captured_tried.add(frame_url)
+                    captured = _calendar_stats_from_captured(page, frame_url)
+                    if captured is not None:
+                        if _detail_log_enabled():
+                            log_event("DBG", "calendar captured", preset=preset, gid=gid, frame_url=frame_url, reason=captured.get("reason"))
+                        return captured, frame_url
                 try:
                     err_in_fr = await fr.query_selector("div.error-msg")
                 except Exception:
@@ -4729,47 +5335,12 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
                     skip, why = await _is_not_reservable_page_async(page)
                     if skip:
                         return {"ok": False, "reason": f"not_reservable({why})"}, None
-                    await page.wait_for_timeout(slow_step_ms)
-                    waited += slow_step_ms
+                    waited += await watcher.wait(slow_step_ms)
                     continue
-                light = await fr.evaluate(r"""
-(() => {
-  const timeRe = /^\s*\d{1,2}:\d{2}/;
-  const tables = Array.from(document.querySelectorAll("table"));
-  if (!tables.length) return { ok:false, reason:"no table" };
-
-  let table = null;
-  for (const t of tables) {
-    const rows = Array.from(t.querySelectorAll("tr"));
-    if (rows.some(r => timeRe.test((r.querySelector("td,th")?.innerText || "").trim()))) { table = t; break; }
-  }
-  table = table || tables[0];
-
-  const rows = Array.from(table.querySelectorAll("tr"));
-  const dataRows = rows.filter(r => {
-    const first = r.querySelector("td,th");
-    if (!first) return false;
-    return timeRe.test(first.innerText.trim());
-  });
-  if (!dataRows.length) return { ok:false, reason:"no time rows" };
-
-  let maxCols = 0;
-  let tdCount = 0;
-  for (const r of dataRows) {
-    const tds = Array.from(r.children).filter(el => el.tagName === "TD" || el.tagName === "TH").slice(1);
-    let cols = 0;
-    tdCount += tds.length;
-    for (const td of tds) {
-      const cs = parseInt(td.getAttribute("colspan") || "1", 10) || 1;
-      cols += cs;
-    }
-    if (cols > maxCols) maxCols = cols;
-  }
-  if (maxCols <= 0) return { ok:false, reason:"no cols" };
-
-  return { ok:true, time_rows:dataRows.length, td_count:tdCount, max_cols:maxCols };
-})()
-""")
+                stable_timeout_ms = max(_CAL_QUIET_MS, min(_CAL_STABLE_TIMEOUT_MS, max_wait_ms - waited))
+                stable_start = time.monotonic()
+                light = await fr.evaluate(_CAL_LIGHT_STABLE_JS, [_CAL_QUIET_MS, stable_timeout_ms])
+                waited += int((time.monotonic() - stable_start) * 1000)
                 if not (isinstance(light, dict) and light.get("ok")):
                     if _detail_log_enabled():
                         log_event(
@@ -4786,8 +5357,7 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
                     skip, why = await _is_not_reservable_page_async(page)
                     if skip:
                         return {"ok": False, "reason": f"not_reservable({why})"}, None
-                    await page.wait_for_timeout(slow_step_ms)
-                    waited += slow_step_ms
+                    waited += await watcher.wait(slow_step_ms)
                     continue
                 stable_attempts += 1
                 light_sig = (light.get("td_count", 0), light.get("time_rows", 0), light.get("max_cols", 0))
@@ -4796,6 +5366,9 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
                 else:
                     light_stable_hits = 1
                 last_light_sig = light_sig
+                if light.get("stable"):
+                    # MutationObserver で静止を確認済み（200ms 間隔の再プローブは不要）
+                    light_stable_hits = max(light_stable_hits, light_stable_required)
                 if _detail_log_enabled():
                     log_event(
                         "DBG",
@@ -4811,14 +5384,12 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
                     )
                 if light_stable_hits < light_stable_required:
                     if not slow_mode:
-                        await page.wait_for_timeout(200)
-                        waited += 200
+                        waited += await watcher.wait(200)
                         continue
                     skip, why = await _is_not_reservable_page_async(page)
                     if skip:
                         return {"ok": False, "reason": f"not_reservable({why})"}, None
-                    await page.wait_for_timeout(slow_step_ms)
-                    waited += slow_step_ms
+                    waited += await watcher.wait(slow_step_ms)
                     continue
 
                 stats = await fr.evaluate(r"""
@@ -5053,19 +5624,30 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
   return out;
 })()
 """)
+                if _env_flag("CAL_PARITY_CHECK") and isinstance(stats, dict) and stats.get("ok"):
+                    await _check_calendar_parity_async(fr, stats, preset, gid, frame_url)
                 suspicious_hit = False
                 suspicious_meta = None
                 page_html = ""
                 frame_html = ""
                 try:
-                    probe = await _light_probe_suspicious_async(page, fr)
+                    captured_page = _captured_doc(page, page.url)
+                    captured_frame = _captured_doc(page, frame_url)
+                    if captured_frame is not None:
+                        # route でキャプチャ済みの本文があればそれを直接走査（content() の直列化を省く）
+                        probe = {"hit": True}
+                    else:
+                        probe = await _light_probe_suspicious_async(page, fr)
                     if probe.get("hit"):
-                        page_html = (await page.content()) or ""
-                        frame_html = (await fr.content()) or ""
+                        page_html = captured_page if captured_page is not None else ((await page.content()) or "")
+                        frame_html = captured_frame if captured_frame is not None else ((await fr.content()) or "")
                         detect = _detect_suspicious_markers(page_html, frame_html)
                         if detect.get("suspicious_hit"):
                             suspicious_hit = True
                             suspicious_meta = detect
+                        elif captured_frame is not None:
+                            suspicious_hit = False
+                            suspicious_meta = detect
                         else:
                             suspicious_hit = True
                             suspicious_meta = {
@@ -5155,8 +5737,7 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
                             skip, why = await _is_not_reservable_page_async(page)
                             if skip:
                                 return {"ok": False, "reason": f"not_reservable({why})"}, None
-                            await page.wait_for_timeout(slow_step_ms)
-                            waited += slow_step_ms
+                            waited += await watcher.wait(slow_step_ms)
                             continue
                         if _looks_like_all_dash(stats):
                             if isinstance(stats, dict):
@@ -5208,8 +5789,7 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
         skip, why = await _is_not_reservable_page_async(page)
         if skip:
             return {"ok": False, "reason": f"not_reservable({why})"}, None
-        await page.wait_for_timeout(slow_step_ms)
-        waited += slow_step_ms
+        waited += await watcher.wait(slow_step_ms)
 
     if last_stats:
         if isinstance(last_stats, dict):
@@ -5281,17 +5861,23 @@ async def _count_calendar_stats_by_slots_async_core(page, max_wait_ms: int = Non
         pass
     return {"ok": False, "reason": "calendar iframe not detected(timeout)", "frame_names": frame_names, "frame_urls": frame_urls}, None
 
-async def count_calendar_stats_by_slots_async(page, preset: str = None, gid: str = None):
+async def count_calendar_stats_by_slots_async(page, preset: str = None, gid: str = None, cancel: CancelToken = None, signals: dict = None):
+    """
+    signals は呼び出し側が遷移直後に集めた _collect_page_signals_async の結果（あれば集め直さない）。
+    初回の判定だけに使い、再確認（login_like / text_hit / スクロール）はその時点で集め直す。
+    """
     short_ms = min(CAL_WAIT_MS, CAL_WAIT_SHORT_MS)
     long_ms = min(CAL_WAIT_MS, CAL_WAIT_LONG_MS)
 
-    skip, why = await _is_not_reservable_page_async(page)
+    if signals is None:
+        signals = await _collect_page_signals_async(page)
+    skip, why = await _is_not_reservable_page_async(page, signals=signals)
     if skip:
         _detail_log_skip(preset, gid, f"not_reservable({why})")
         _detail_log_iframe_wait(preset, gid, short_ms, long_ms, "skip")
         return {"ok": False, "reason": f"not_reservable({why})"}, None
 
-    probe = await _reservation_page_probe_async(page)
+    probe = await _reservation_page_probe_async(page, signals=signals)
     _detail_log_probe(
         preset,
         gid,
@@ -5406,7 +5992,7 @@ async def count_calendar_stats_by_slots_async(page, preset: str = None, gid: str
             _detail_log_iframe_wait(preset, gid, short_ms, long_ms, "skip")
             return {"ok": False, "reason": "not_reservable"}, None
 
-    stats, frame_url = await _count_calendar_stats_by_slots_async_core(page, short_ms, preset=preset, gid=gid)
+    stats, frame_url = await _count_calendar_stats_by_slots_async_core(page, short_ms, preset=preset, gid=gid, cancel=cancel)
     if stats and isinstance(stats, dict) and stats.get("ok"):
         _detail_log_iframe_wait(preset, gid, short_ms, long_ms, "short")
         return stats, frame_url
@@ -5520,12 +6106,296 @@ async def count_calendar_stats_by_slots_async(page, preset: str = None, gid: str
         _detail_log_iframe_wait(preset, gid, short_ms, long_ms, "short")
         return stats, frame_url
 
-    stats, frame_url = await _count_calendar_stats_by_slots_async_core(page, long_ms, preset=preset, gid=gid)
+    stats, frame_url = await _count_calendar_stats_by_slots_async_core(page, long_ms, preset=preset, gid=gid, cancel=cancel)
     _detail_log_iframe_wait(preset, gid, short_ms, long_ms, "long")
     return stats, frame_url
 
-async def _make_async_context(headless: bool, minimize_browser: bool = False):
+def _calendar_engine() -> str:
+    cfg = load_config()
+    engine = str((cfg.get("auto", {}) or {}).get("calendar_engine", "browser") or "browser").strip().lower()
+    return engine if engine in ("browser", "http") else "browser"
+
+async def _http_get_text(request_ctx, url: str, referer: str = None):
+    headers = {"Referer": referer} if referer else None
+    resp = await request_ctx.get(url, headers=headers, timeout=NAV_TIMEOUT_MS)
+    if not resp.ok:
+        return None, resp.url or url, f"http_{resp.status}"
+    return (await resp.text()) or "", resp.url or url, ""
+
+def _http_not_reservable(label: str, html: str, url: str) -> str:
+    """
+    HTTP で取った予約ページ/カレンダーの例外表示（「予約できません」等）の理由。なければ ''。
+    DOM 経路の probe と同じく、時間割の表があれば予約不可にはしない。
+    """
+    err_msg = find_error_message(html) if "error-msg" in (html or "") else ""
+    ok, why = _not_reservable_text_hit(label, url, err_msg, "")
+    if not ok or (not why.endswith(":url_error") and has_calendar_table(html)):
+        return ""
+    return why
+
+async def _count_calendar_stats_http(request_ctx, res_url: str, preset: str = None, gid: str = None, nav_limiter=None):
+    """
+    ブラウザなしの高速経路: A6ShopReservation と予約カレンダー(iframe)の HTML を直接取得して Python で集計する。
+    サニティチェック等を通らなければ (None, None) を返し、呼び出し側は Playwright 経路にフォールバックする。
+    予約不可の例外ページはここで判定して {"ok": False, "reason": "not_reservable(...)"} を返す（ブラウザ経路に回さない）。
+    nav_limiter があれば GET ごとに wait_turn し、結果とレイテンシを report する。
+    """
+    async def _get(url, referer=None):
+        if nav_limiter is None:
+            return await _http_get_text(request_ctx, url, referer=referer)
+        await nav_limiter.wait_turn(url)
+        t0 = time.monotonic()
+        res = await _http_get_text(request_ctx, url, referer=referer)
+        _nav_report(nav_limiter, url, ok=res[0] is not None, latency_s=time.monotonic() - t0)
+        return res
+
+    reason = ""
+    try:
+        page_html, page_url, reason = await _get(res_url)
+        if page_html is not None:
+            frame_src = find_calendar_iframe_src(page_html, page_url)
+            why = "" if frame_src else _http_not_reservable("page", page_html, page_url)
+            if why:
+                return {"ok": False, "reason": f"not_reservable({why})", "engine": "http"}, None
+            if not frame_src:
+                reason = "iframe_src_missing"
+            else:
+                frame_html, frame_url, reason = await _get(frame_src, referer=page_url)
+                why = _http_not_reservable("frame[pcreserveiframe]", frame_html, frame_url) if frame_html is not None else ""
+                if why:
+                    return {"ok": False, "reason": f"not_reservable({why})", "engine": "http"}, frame_url
+                if frame_html is not None:
+                    stats = parse_calendar_html(frame_html)
+                    detect = _detect_suspicious_markers(page_html, frame_html)
+                    sanity_ok, sanity_reason = _calendar_sanity(stats)
+                    if detect.get("suspicious_hit"):
+                        reason = "suspicious"
+                    elif not sanity_ok:
+                        reason = f"sanity:{sanity_reason}"
+                    elif _looks_like_all_dash(stats):
+                        # JS 描画待ちの可能性があるのでブラウザで確認する
+                        reason = "all_dash"
+                    else:
+                        stats["engine"] = "http"
+                        stats["suspicious_hit"] = False
+                        stats["suspicious_markers_hit"] = []
+                        stats["suspicious_vendor"] = None
+                        stats["suspicious_excerpt"] = ""
+                        stats["suspicious_strength"] = None
+                        stats["_detail"] = {"sanity_retries": 0, "sanity_last_reason": None}
+                        return stats, frame_url
+    except Exception as e:
+        reason = f"error:{str(e)[:120]}"
+    if _detail_log_enabled():
+        log_event("DBG", "calendar http fallback", preset=preset, gid=gid, url=res_url, reason=reason)
+    return None, None
+
+# route ハンドラで取得した予約ページ/カレンダー(iframe)の生 HTML（page ごと）
+_DOC_CAPTURE = weakref.WeakKeyDictionary()
+_DOC_CAPTURE_TOKENS = ("yoyaku.cityheaven.net", "/a6shopreservation", "/calendar/")
+_DOC_CAPTURE_MAX_PER_PAGE = 8
+
+def _should_capture_doc(url: str) -> bool:
+    u = (url or "").lower()
+    return any(tok in u for tok in _DOC_CAPTURE_TOKENS)
+
+def _capture_doc_body(page, url: str, body: bytes):
+    if page is None or not url or body is None:
+        return
+    try:
+        docs = _DOC_CAPTURE.setdefault(page, {})
+    except Exception:
+        return
+    docs.pop(url, None)
+    docs[url] = body
+    while len(docs) > _DOC_CAPTURE_MAX_PER_PAGE:
+        docs.pop(next(iter(docs)), None)
+
+def _captured_doc(page, url: str):
+    """キャプチャ済みの HTML を返す（なければ None）。url は完全一致 → フラグメント除去で照合"""
+    if page is None or not url:
+        return None
+    try:
+        docs = _DOC_CAPTURE.get(page)
+    except Exception:
+        return None
+    if not docs:
+        return None
+    body = docs.get(url)
+    if body is None:
+        body = docs.get(url.split("#", 1)[0])
+    if body is None:
+        return None
+    try:
+        return body.decode("utf-8", errors="ignore")
+    except Exception:
+        return None
+
+def _clear_captured_docs(page):
+    try:
+        _DOC_CAPTURE.pop(page, None)
+    except Exception:
+        pass
+
+_ROUTE_RESERVATION_TOKENS = ("/a6shopreservation",)
+_ROUTE_CALENDAR_TOKENS = ("yoyaku.cityheaven.net", "/calendar/")
+# ブロックしたリクエストの推定サイズ（実際には取得しないので種別ごとの目安）
+_ROUTE_EST_BYTES = {"image": 40000, "media": 300000, "font": 60000, "stylesheet": 30000, "script": 80000}
+
+def _route_profile_name(frame_url: str) -> str:
+    u = (frame_url or "").lower()
+    if any(t in u for t in _ROUTE_CALENDAR_TOKENS):
+        return "calendar"
+    if any(t in u for t in _ROUTE_RESERVATION_TOKENS):
+        return "reservation"
+    return "list"
+
+# 2 文字の国別 TLD の下の属性型ドメイン（co.jp / ne.jp / com.au 等）。この下のラベルまでを 1 サイトとみなす
+_SECOND_LEVEL_LABELS = {"co", "ne", "or", "ac", "ad", "ed", "go", "gr", "lg", "com", "net", "org", "gov", "edu"}
+
+def _site_domain(url: str) -> str:
+    """登録可能ドメイン（example.com / example.co.jp）。*.co.jp 同士を同じサイト扱いにしない"""
+    host = (urlparse(url or "").hostname or "").lower().rstrip(".")
+    labels = host.split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_LABELS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+class RouteStats:
+    """
+    route 層の集計（run 単位）とプロファイルの検証
+    - プロファイルごとのブロック件数/推定削減バイト数
+    - そのプロファイルで開いたページのカレンダーサニティ合格率。min_samples 件以上で
+      min_pass_rate を下回ったら、その run の残りは "list"（従来のブロック方針）に戻す
+    """
+    def __init__(self, min_samples: int = 20, min_pass_rate: float = 0.9):
+        self.min_samples = max(1, int(min_samples))
+        self.min_pass_rate = float(min_pass_rate)
+        self.enabled = True
+        self.reset()
+
+    def reset(self):
+        self.blocked = {}
+        self.sanity = {}
+        self.disabled = set()
+
+    def profile(self, name: str) -> dict:
+        if not self.enabled or name in self.disabled:
+            name = "list"
+        return ROUTE_PROFILES.get(name) or ROUTE_PROFILES["list"]
+
+    def note_blocked(self, profile: str, resource_type: str):
+        b = self.blocked.setdefault(profile, {"requests": 0, "bytes_est": 0})
+        b["requests"] += 1
+        b["bytes_est"] += _ROUTE_EST_BYTES.get(resource_type, 5000)
+
+    def note_sanity(self, profile: str, ok: bool):
+        if not self.enabled or profile in self.disabled:
+            return
+        st = self.sanity.setdefault(profile, [0, 0])
+        st[0] += 1 if ok else 0
+        st[1] += 1
+        if profile != "list" and st[1] >= self.min_samples and st[0] / st[1] < self.min_pass_rate:
+            self.disabled.add(profile)
+            log_event("WARN", "route profile disabled", profile=profile, sanity_pass_rate=round(st[0] / st[1], 3), samples=st[1])
+
+    def summary(self) -> dict:
+        out = {}
+        for name in sorted(set(self.blocked) | set(self.sanity)):
+            b = self.blocked.get(name) or {}
+            ok, total = self.sanity.get(name) or [0, 0]
+            out[name] = {
+                "blocked": b.get("requests", 0),
+                "bytes_saved_est": b.get("bytes_est", 0),
+                "sanity_pass_rate": round(ok / total, 3) if total else None,
+                "disabled": name in self.disabled,
+            }
+        return out
+
+_ROUTE_STATS = RouteStats()
+
+# 予約ページ等の静的 JS/CSS を毎回取り直さないためのローカルキャッシュ（run_job が設定）
+_ASSET_CACHE = None
+_ASSET_CACHE_TYPES = ("script", "stylesheet")
+
+def _asset_cache_from_config(cfg: dict):
+    auto = (cfg or {}).get("auto", {}) or {}
+    max_mb = float(auto.get("asset_cache_mb", 64) or 0)
+    if max_mb <= 0:
+        return None
+    return AssetCache(
+        os.path.join(DATA_ROOT, ASSET_CACHE_DIR_NAME),
+        max_bytes=int(max_mb * 1024 * 1024),
+        ttl_s=float(auto.get("asset_cache_hours", 6) or 0) * 3600.0,
+    )
+
+async def _serve_cached_asset(route, request, cache: AssetCache):
+    """静的 JS/CSS を asset cache から返す。期限切れは条件付きリクエストで確認し、304 ならそのまま使う"""
+    url = request.url
+    cached = cache.lookup(url)
+    if cached and cached["fresh"]:
+        cache.served(url, cached["body"])
+        await route.fulfill(status=200, headers=cached["headers"], body=cached["body"])
+        return
+    headers = dict(request.headers or {})
+    if cached:
+        headers.update(cache.validators(cached))
+    resp = await route.fetch(headers=headers)
+    if resp.status == 304 and cached:
+        cache.served(url, cached["body"], revalidated=True)
+        await route.fulfill(status=200, headers=cached["headers"], body=cached["body"])
+        return
+    body = await resp.body()
+    if is_cacheable_response(resp.status, resp.headers):
+        try:
+            cache.put(url, body, resp.headers)
+        except Exception:
+            pass
+    await route.fulfill(response=resp, body=body)
+
+_CONTEXT_OPTS = {
+    "locale": "ja-JP",
+    "timezone_id": "Asia/Tokyo",
+    "viewport": {"width": 1400, "height": 900},
+    "user_agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/123.0.0.0 Safari/537.36"
+    ),
+}
+_WEBDRIVER_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+BROWSER_DAEMON_STATE = os.path.join(STATE_DIR, BROWSER_DAEMON_FILE_NAME)
+# --browser-daemon に CDP で接続したコンテキスト
+# （閉じるとデーモンのブラウザごと落ちるので、自分で開いたページだけ閉じて切断する）
+_CDP_ATTACHED = weakref.WeakSet()
+
+async def _attach_browser_daemon(apw):
+    """起動済みの --browser-daemon があれば CDP で接続して (browser, context) を返す。なければ None"""
+    st = read_daemon_state(BROWSER_DAEMON_STATE)
+    if not st:
+        return None
+    endpoint = st["endpoint"]
+    browser = None
+    try:
+        browser = await apw.chromium.connect_over_cdp(endpoint, timeout=5000)
+        if not browser.contexts:
+            raise RuntimeError("daemon has no browser context")
+        context = browser.contexts[0]
+        _CDP_ATTACHED.add(context)
+        log_event("INFO", "browser daemon attached", endpoint=endpoint, pid=st.get("pid"), headless=st.get("headless"))
+        return browser, context
+    except Exception as e:
+        log_event("WARN", "browser daemon attach failed (launching)", endpoint=endpoint, err=str(e)[:200])
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        return None
+
+async def _make_async_context(headless: bool, minimize_browser: bool = False, attach_daemon: bool = False):
     """Playwright context を作る。
+    - attach_daemon で --browser-daemon が動いていれば、そのブラウザ（起動済み・プロファイル読み込み済み）に CDP で接続する
     - ルート直下に pw_profile/ があれば persistent profile を使い、Cookie/同意状態を維持する
     - なければ通常の一時コンテキスト
     """
@@ -5540,46 +6410,64 @@ async def _make_async_context(headless: bool, minimize_browser: bool = False):
     profile_dir = PROFILE_DIR
     context = None
     browser = None
-    context_opts = {
-        "locale": "ja-JP",
-        "timezone_id": "Asia/Tokyo",
-        "viewport": {"width": 1400, "height": 900},
-        "user_agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/123.0.0.0 Safari/537.36"
-        ),
-    }
+    attached = False
     try:
-        if profile_dir and os.path.isdir(profile_dir):
+        got = await _attach_browser_daemon(apw) if attach_daemon else None
+        if got:
+            browser, context = got
+            attached = True
+        elif profile_dir and os.path.isdir(profile_dir):
             # persistent context（Cookie/ローカルストレージを維持）
             context = await apw.chromium.launch_persistent_context(
                 user_data_dir=profile_dir,
                 headless=headless,
                 args=launch_args,
-                **context_opts,
+                **_CONTEXT_OPTS,
             )
             browser = context.browser
         else:
             browser = await apw.chromium.launch(headless=headless, args=launch_args)
-            context = await browser.new_context(**context_opts)
+            context = await browser.new_context(**_CONTEXT_OPTS)
 
         allow_images = str(os.environ.get("ALLOW_IMAGES", "")).strip().lower() not in ("", "0", "false", "no", "off")
-        effective_block_types = set(BLOCK_RESOURCE_TYPES)
-        if allow_images:
-            effective_block_types.discard("image")
 
         async def _route(route, request):
             try:
                 rt = request.resource_type
                 url = (request.url or "").lower()
-                if rt in effective_block_types:
+                try:
+                    frame_url = request.frame.url or ""
+                except Exception:
+                    frame_url = ""
+                profile_name = _route_profile_name(frame_url)
+                profile = _ROUTE_STATS.profile(profile_name)
+                block = rt in profile["types"] and not (allow_images and rt == "image")
+                if not block and rt == "script" and profile.get("third_party_scripts") and frame_url:
+                    block = _site_domain(url) != _site_domain(frame_url)
+                if block:
+                    _ROUTE_STATS.note_blocked(profile_name, rt)
                     await route.abort()
                     return
                 for s in BLOCK_URL_SUBSTR:
                     if s in url:
+                        _ROUTE_STATS.note_blocked(profile_name, rt)
                         await route.abort()
                         return
+                cache = _ASSET_CACHE
+                if cache is not None and rt in _ASSET_CACHE_TYPES and request.method == "GET":
+                    await _serve_cached_asset(route, request, cache)
+                    return
+                if rt == "document" and _should_capture_doc(url):
+                    # 予約ページ/カレンダーの本文をここで保持して、後段の content()/evaluate を省く
+                    resp = await route.fetch()
+                    body = await resp.body()
+                    if resp.ok:
+                        try:
+                            _capture_doc_body(request.frame.page, request.url, body)
+                        except Exception:
+                            pass
+                    await route.fulfill(response=resp, body=body)
+                    return
             except Exception:
                 pass
             try:
@@ -5592,14 +6480,19 @@ async def _make_async_context(headless: bool, minimize_browser: bool = False):
         except Exception:
             pass
 
-        try:
-            await context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
-        except Exception:
-            pass
+        if not attached:
+            # デーモンは起動時に入れている（接続のたびに足すと積み重なる）
+            try:
+                await context.add_init_script(_WEBDRIVER_INIT_SCRIPT)
+            except Exception:
+                pass
 
         return apw, browser, context
     except Exception:
         # 途中で失敗したら後片付け
+        if attached:
+            await _close_async_context(apw, browser, context)
+            raise
         try:
             if context:
                 await context.close()
@@ -5616,20 +6509,463 @@ async def _make_async_context(headless: bool, minimize_browser: bool = False):
             pass
         raise
 
-def _merge_rows_to_map(rows):
-    m = {}
-    for r in rows:
-        key = f'{r.get("preset","")}::{r.get("gid","")}'
-        m[key] = r
-    return m
-
-def _delta_report(prev_rows, cur_rows, top_n=5, min_conf=0):
-    pm = _merge_rows_to_map(prev_rows or [])
-    cm = _merge_rows_to_map(cur_rows or [])
-    opens = []
-    fills = []
-    bad_conf = 0
-
+async def _close_async_context(apw, browser, context, own_pages=None):
+    if context is not None and context in _CDP_ATTACHED:
+        # デーモンのコンテキスト: 自分のページ（own_pages）と route を片付けて切断するだけ
+        # （同じデーモンに繋いでいる別のシャード/ワーカーのページには触らない）
+        _CDP_ATTACHED.discard(context)
+        for page in list(own_pages or []):
+            try:
+                await page.close()
+            except Exception:
+                pass
+        try:
+            await context.unroute("**/*")
+        except Exception:
+            pass
+        try:
+            await apw.stop()
+        except Exception:
+            pass
+        return
+    try:
+        if context:
+            await context.close()
+    except Exception:
+        pass
+    try:
+        if browser:
+            await browser.close()
+    except Exception:
+        pass
+    try:
+        if apw:
+            await apw.stop()
+    except Exception:
+        pass
+
+class AsyncPagePool:
+    """
+    gid ごとの new_page/close をやめ、about:blank に戻したページを使い回す。
+    - size 件まで待機ページを保持（それ以上は close）
+    - 自分で開いたページは opened で追う（デーモン接続時の片付け・ページ数の監視用）
+    """
+    def __init__(self, context, size: int):
+        self.context = context
+        self.size = max(1, int(size or 1))
+        self._idle = []
+        self._opened = weakref.WeakSet()
+        self.hits = 0
+        self.misses = 0
+        self.discards = 0
+
+    async def acquire(self):
+        while self._idle:
+            page = self._idle.pop()
+            try:
+                if page.is_closed():
+                    continue
+            except Exception:
+                continue
+            self.hits += 1
+            return page, True
+        page = await self.context.new_page()
+        self._opened.add(page)
+        page.set_default_navigation_timeout(NAV_TIMEOUT_MS)
+        self.misses += 1
+        return page, False
+
+    def opened(self) -> list:
+        """このプールが開いて、まだ閉じていないページ（貸し出し中を含む）"""
+        out = []
+        for page in list(self._opened):
+            try:
+                if page.is_closed():
+                    continue
+            except Exception:
+                continue
+            out.append(page)
+        return out
+
+    async def _reset(self, page) -> bool:
+        _clear_captured_docs(page)
+        try:
+            if page.is_closed():
+                return False
+            await page.goto("about:blank", timeout=5000)
+            return True
+        except Exception:
+            return False
+
+    async def release(self, page):
+        if page is None:
+            return
+        ok = await self._reset(page)
+        if ok and len(self._idle) < self.size:
+            self._idle.append(page)
+            return
+        self.discards += 1
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for page in idle:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "discards": self.discards,
+            "idle": len(self._idle),
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+_BROWSER_WATCH_INTERVAL_S = 15.0
+
+class AsyncBrowserSession:
+    """
+    run_job 全体で使い回す Chromium/コンテキスト。
+    - プリセットごとの起動/終了（数秒×プリセット数）をなくす
+    - recycle_pages / recycle_minutes を超えたら、次の借用時に作り直す（0 で無効）
+    - ウォッチドッグ: ブラウザのプロセス群の RSS（/proc）と開いているページ数を定期的に見て、
+      rss_limit_mb / page_limit を超えたら新しいページの貸し出しを止め、貸し出し中のページが
+      全部戻ったところでコンテキストを作り直す（プリセットの途中でも可。0 で無効）
+    - attach_daemon: --browser-daemon が動いていれば起動せずに CDP で接続する（作り直しは切断→再接続）。
+      接続中は RSS で作り直さない（再接続してもデーモンのメモリは減らない）。ページ数は自分で開いた分だけ数える
+    """
+    def __init__(self, headless: bool, minimize_browser: bool = False, recycle_pages: int = 0, recycle_minutes: float = 0, pool_size: int = 3,
+                 rss_limit_mb: float = 0, page_limit: int = 0, attach_daemon: bool = False):
+        self.headless = headless
+        self.minimize_browser = minimize_browser
+        self.attach_daemon = bool(attach_daemon)
+        self.attached_pid = None
+        self.pool_size = max(1, int(pool_size or 1))
+        self.pool = None
+        self.recycle_pages = max(0, int(recycle_pages or 0))
+        self.recycle_minutes = max(0.0, float(recycle_minutes or 0))
+        self.rss_limit_mb = max(0.0, float(rss_limit_mb or 0))
+        self.page_limit = max(0, int(page_limit or 0))
+        self._lock = asyncio.Lock()
+        self._gate = asyncio.Event()
+        self._gate.set()
+        self._drained = asyncio.Event()
+        self._inflight = 0
+        self._watch_task = None
+        self.watchdog_recycles = 0
+        self.peak_rss_mb = 0.0
+        self._apw = None
+        self._browser = None
+        self._context = None
+        self._borrowers = 0
+        self._pages = 0
+        self._t_launch = 0.0
+        self.launches = 0
+        self.attaches = 0
+
+    @property
+    def attached(self) -> bool:
+        """--browser-daemon に CDP で接続中か"""
+        return self._context is not None and self._context in _CDP_ATTACHED
+
+    @property
+    def request(self):
+        """コンテキストの APIRequestContext（Cookie を共有する HTTP クライアント）"""
+        return self._context.request if self._context is not None else None
+
+    def _recycle_due(self) -> str:
+        if self.recycle_pages and self._pages >= self.recycle_pages:
+            return "pages"
+        if self.recycle_minutes and (time.monotonic() - self._t_launch) >= self.recycle_minutes * 60.0:
+            return "minutes"
+        return ""
+
+    async def _launch(self):
+        self._apw, self._browser, self._context = await _make_async_context(
+            headless=self.headless, minimize_browser=self.minimize_browser, attach_daemon=self.attach_daemon
+        )
+        self.pool = AsyncPagePool(self._context, self.pool_size)
+        self._pages = 0
+        self._t_launch = time.monotonic()
+        if self._context in _CDP_ATTACHED:
+            st = read_daemon_state(BROWSER_DAEMON_STATE) or {}
+            self.attached_pid = st.get("pid")
+            self.attaches += 1
+        else:
+            self.attached_pid = None
+            self.launches += 1
+
+    async def _shutdown(self):
+        apw, browser, context = self._apw, self._browser, self._context
+        pool, self.pool = self.pool, None
+        self._apw = self._browser = self._context = None
+        own_pages = []
+        if pool:
+            log_event("INFO", "page pool stats", **pool.stats())
+            own_pages = pool.opened()
+            await pool.close()
+        await _close_async_context(apw, browser, context, own_pages=own_pages)
+
+    async def acquire(self):
+        async with self._lock:
+            if self._context is not None and self._borrowers == 0:
+                why = self._recycle_due()
+                if why:
+                    log_event("INFO", "browser recycle", reason=why, pages=self._pages, age_s=round(time.monotonic() - self._t_launch, 1))
+                    await self._shutdown()
+            if self._context is None:
+                await self._launch()
+            self._borrowers += 1
+            return self._context
+
+    def release(self):
+        self._borrowers = max(0, self._borrowers - 1)
+
+    async def acquire_page(self):
+        """プールからページを借りる（ウォッチドッグの作り直し中は終わるまで待つ）"""
+        await self._gate.wait()
+        self._inflight += 1
+        try:
+            page, hit = await self.pool.acquire()
+        except Exception:
+            self._page_returned()
+            raise
+        self._pages += 1
+        self._start_watchdog()
+        return page, hit
+
+    async def acquire_request(self):
+        """
+        HTTP 経路用にコンテキストの APIRequestContext を借りる（借りている間はウォッチドッグも作り直さない）。
+        None でなければ release_request で返す
+        """
+        await self._gate.wait()
+        req = self.request
+        if req is None:
+            return None
+        self._inflight += 1
+        self._start_watchdog()
+        return req
+
+    def release_request(self):
+        self._page_returned()
+
+    async def release_page(self, page):
+        try:
+            if self.pool is not None:
+                await self.pool.release(page)
+        finally:
+            self._page_returned()
+
+    def _page_returned(self):
+        self._inflight = max(0, self._inflight - 1)
+        if self._inflight == 0:
+            self._drained.set()
+
+    def _start_watchdog(self):
+        if self._watch_task is None and (self.rss_limit_mb or self.page_limit):
+            self._watch_task = asyncio.create_task(self._watch())
+
+    def _pressure(self) -> str:
+        if self.rss_limit_mb and not self.attached:
+            rss = process_tree_rss(os.getpid())
+            if rss is not None:
+                rss_mb = rss / (1024.0 * 1024.0)
+                self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+                if rss_mb >= self.rss_limit_mb:
+                    return f"rss({int(rss_mb)}MB)"
+        if self.page_limit and self._context is not None:
+            try:
+                if self.attached and self.pool is not None:
+                    pages = len(self.pool.opened())
+                else:
+                    pages = len(self._context.pages)
+            except Exception:
+                pages = 0
+            if pages > self.page_limit:
+                return f"pages({pages})"
+        return ""
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(_BROWSER_WATCH_INTERVAL_S)
+            if self._context is None:
+                continue
+            try:
+                why = await asyncio.to_thread(self._pressure)
+                if why:
+                    await self._recycle_live(why)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_event("WARN", "browser watchdog failed", err=str(e)[:200])
+
+    async def _recycle_live(self, why: str):
+        # 新規の貸し出しを止め、貸し出し中のページが戻るのを待ってから作り直す
+        self._gate.clear()
+        try:
+            t0 = time.monotonic()
+            while self._inflight > 0:
+                self._drained.clear()
+                await self._drained.wait()
+            async with self._lock:
+                log_event(
+                    "INFO",
+                    "browser recycle",
+                    reason=why,
+                    pages=self._pages,
+                    age_s=round(time.monotonic() - self._t_launch, 1),
+                    drain_s=round(time.monotonic() - t0, 1),
+                )
+                await self._shutdown()
+                await self._launch()
+            self.watchdog_recycles += 1
+        finally:
+            self._gate.set()
+
+    async def close(self):
+        task, self._watch_task = self._watch_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+        async with self._lock:
+            await self._shutdown()
+
+def _browser_session_from_config(cfg: dict, headless: bool, minimize_browser: bool, concurrency: int = 3) -> AsyncBrowserSession:
+    auto_cfg = (cfg or {}).get("auto", {}) or {}
+    return AsyncBrowserSession(
+        headless=headless,
+        minimize_browser=minimize_browser,
+        pool_size=concurrency,
+        recycle_pages=int(auto_cfg.get("browser_recycle_pages", 0) or 0),
+        recycle_minutes=float(auto_cfg.get("browser_recycle_minutes", 0) or 0),
+        rss_limit_mb=float(auto_cfg.get("browser_rss_limit_mb", 0) or 0),
+        page_limit=int(auto_cfg.get("browser_page_limit", 0) or 0),
+        attach_daemon=bool(auto_cfg.get("browser_daemon", False)),
+    )
+
+async def run_browser_daemon(headless=True, minimize_browser=False, port=None, warm_url=None):
+    """
+    --browser-daemon: プロファイル読み込み済みの Chromium を起動したまま待機し、127.0.0.1 の CDP ポートを公開する。
+    - 起動時に warm_url（既定は最初のプリセットの一覧）を開いて年齢確認などの中間画面を抜けておく
+    - score_data/state/browser_daemon.json に pid / endpoint を書く。auto.browser_daemon=true の時、run_job はこれを見て connect_over_cdp で接続し、
+      無い・応答しない時は従来どおり自分で起動する
+    - score_data/state/browser_daemon.stop を置くか、ブラウザが閉じられたら終了する
+    """
+    cfg = load_config()
+    auto = cfg.get("auto", {}) or {}
+    port = int(port or auto.get("browser_daemon_port", 9333) or 9333)
+    ensure_data_dirs()
+    st = read_daemon_state(BROWSER_DAEMON_STATE)
+    if st and cdp_version(st["endpoint"]):
+        log_event("INFO", "browser daemon already running", pid=st.get("pid"), endpoint=st["endpoint"])
+        return st
+    stop_path = os.path.join(STATE_DIR, BROWSER_DAEMON_STOP_NAME)
+    clear_stop_flag(stop_path)
+
+    # CDP で外から繋ぐので、既定コンテキストを持つ persistent profile で起動する
+    # （pw_profile が無い時は score_data/daemon_profile を作って使う）
+    profile_dir = PROFILE_DIR if PROFILE_DIR and os.path.isdir(PROFILE_DIR) else os.path.join(DATA_ROOT, "daemon_profile")
+    os.makedirs(profile_dir, exist_ok=True)
+    launch_args = [f"--remote-debugging-port={port}", "--remote-debugging-address=127.0.0.1"]
+    if (not headless) and minimize_browser:
+        launch_args += ["--start-minimized", "--disable-infobars"]
+
+    from playwright.async_api import async_playwright
+    apw = await async_playwright().start()
+    context = None
+    try:
+        context = await apw.chromium.launch_persistent_context(
+            user_data_dir=profile_dir,
+            headless=headless,
+            args=launch_args,
+            **_CONTEXT_OPTS,
+        )
+        try:
+            await context.add_init_script(_WEBDRIVER_INIT_SCRIPT)
+        except Exception:
+            pass
+        page = context.pages[0] if context.pages else await context.new_page()
+
+        if warm_url is None:
+            try:
+                jobs = build_jobs_from_presets([x for x in str(auto.get("presets", "") or "").split(",") if x.strip()], presets_data=None)
+                warm_url = jobs[0].url if jobs else ""
+            except Exception:
+                warm_url = ""
+        if warm_url:
+            try:
+                await page.goto(warm_url, timeout=NAV_TIMEOUT_MS)
+                await page.wait_for_timeout(AFTER_GOTO_WAIT_MS)
+                accepted = await _maybe_accept_interstitial(page)
+                log_event("INFO", "browser daemon warmed", url=warm_url, interstitial=accepted)
+            except Exception as e:
+                log_event("WARN", "browser daemon warm-up failed", url=warm_url, err=str(e)[:200])
+            try:
+                await page.goto("about:blank", timeout=5000)
+            except Exception:
+                pass
+
+        endpoint = f"http://127.0.0.1:{port}"
+        if not cdp_version(endpoint, timeout_s=5.0):
+            raise RuntimeError(f"CDP endpoint not reachable: {endpoint}")
+        st = {
+            "pid": os.getpid(),
+            "port": port,
+            "endpoint": endpoint,
+            "headless": headless,
+            "profile": profile_dir,
+            "started_at": _now_ts(),
+        }
+        write_daemon_state(BROWSER_DAEMON_STATE, st)
+        log_event("INFO", "browser daemon ready", **st)
+
+        closed = asyncio.Event()
+        context.on("close", lambda *_: closed.set())
+        while not closed.is_set() and not stop_requested(stop_path):
+            try:
+                await asyncio.wait_for(closed.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                pass
+        return st
+    finally:
+        clear_daemon_state(BROWSER_DAEMON_STATE, pid=os.getpid())
+        clear_stop_flag(stop_path)
+        try:
+            if context is not None:
+                await context.close()
+        except Exception:
+            pass
+        try:
+            await apw.stop()
+        except Exception:
+            pass
+        log_event("INFO", "browser daemon stopped", pid=os.getpid())
+
+def _merge_rows_to_map(rows):
+    m = {}
+    for r in rows:
+        key = f'{r.get("preset","")}::{r.get("gid","")}'
+        m[key] = r
+    return m
+
+def _delta_report(prev_rows, cur_rows, top_n=5, min_conf=0):
+    pm = _merge_rows_to_map(prev_rows or [])
+    cm = _merge_rows_to_map(cur_rows or [])
+    opens = []
+    fills = []
+    bad_conf = 0
+
     for k, cur in cm.items():
         conf = int(cur.get("site_confidence", 0) or 0)
         if conf < min_conf:
@@ -5676,24 +7012,233 @@ def _summarize_row_quality(rows: list) -> dict:
         counts[grade] += 1
     return counts
 
-async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurrency: int, nav_limiter: AsyncNavLimiter):
+def _negative_cache_from_config(cfg: dict):
+    auto = (cfg or {}).get("auto", {}) or {}
+    hours = float(auto.get("negative_cache_hours", 72) or 0)
+    if hours <= 0:
+        return None
+    return NegativeCache(
+        os.path.join(STATE_DIR, NEGATIVE_CACHE_FILE_NAME),
+        ttl_hours=hours,
+        recheck_ratio=float(auto.get("negative_recheck_ratio", 0.1) or 0),
+    )
+
+def _retry_queue_from_config(cfg: dict):
+    auto = (cfg or {}).get("auto", {}) or {}
+    attempts = int(auto.get("retry_max_attempts", 3) or 0)
+    budget = int(auto.get("retry_budget", 60) or 0)
+    if attempts <= 0 or budget <= 0:
+        return None
+    return RetryQueue(
+        max_attempts=attempts,
+        base_delay_s=float(auto.get("retry_base_delay_s", 2.0) or 0),
+        budget=budget,
+    )
+
+DEFERRED_FILE = os.path.join(STATE_DIR, "deferred.json")
+
+def _calendar_volatility(prev: dict, stats_by_date: dict) -> float:
+    """
+    前回 state からの stats_by_date の変化率（共通日付のうち bell/maru/tel が変わった割合）を
+    前回値と半々で平滑化した値（0.0〜1.0）。前回が無ければ 0.5。
+    """
+    if not isinstance(prev, dict):
+        return 0.5
+    prev_by_date = prev.get("stats_by_date") if isinstance(prev.get("stats_by_date"), dict) else {}
+    cur_by_date = stats_by_date if isinstance(stats_by_date, dict) else {}
+    common = [d for d in cur_by_date if d in prev_by_date]
+    if common:
+        changed = 0
+        for d in common:
+            a = prev_by_date.get(d) or {}
+            b = cur_by_date.get(d) or {}
+            if any((a.get(k) or 0) != (b.get(k) or 0) for k in ("bell", "maru", "tel")):
+                changed += 1
+        change = changed / float(len(common))
+    else:
+        change = 0.5
+    try:
+        prev_vol = float(prev.get("calendar_volatility"))
+    except Exception:
+        prev_vol = change
+    return round(_clamp01(0.5 * prev_vol + 0.5 * change), 4)
+
+class GidScheduler:
+    """
+    gid の取得順（期待値の高い順）と、実行時間の予算（--time-budget）を管理する。
+    優先度 = 前回 rank percentile / カレンダーの変化しやすさ / 最終取得からの経過 の加重和。
+    未取得の gid と、前回予算切れで見送った gid は先頭に回す。
+    """
+    W_RANK = 0.5
+    W_VOLATILITY = 0.3
+    W_STALENESS = 0.2
+    STALE_SAT_HOURS = 72.0
+
+    def __init__(self, time_budget_s: float = None, deferred_path: str = None):
+        self.deadline = (time.monotonic() + float(time_budget_s)) if time_budget_s else None
+        self.deferred_path = deferred_path if deferred_path is not None else DEFERRED_FILE
+        self._deferred = self._load()
+        self._changed = set()
+        self.deferred_now = 0
+
+    def _load(self) -> dict:
+        try:
+            if self.deferred_path and os.path.exists(self.deferred_path):
+                with open(self.deferred_path, "r", encoding="utf-8") as r:
+                    data = json.load(r) or {}
+                return data if isinstance(data, dict) else {}
+        except Exception:
+            pass
+        return {}
+
+    def priority(self, key: str, snap: dict, now: float = None) -> float:
+        if key in self._deferred:
+            return 2.0
+        if not isinstance(snap, dict):
+            return 1.5
+        now = time.time() if now is None else now
+        try:
+            rank_pct = _clamp01(float(snap.get("rank_percentile") or 0.0))
+        except Exception:
+            rank_pct = 0.0
+        try:
+            vol = _clamp01(float(snap.get("calendar_volatility")))
+        except Exception:
+            vol = 0.5
+        try:
+            ts = time.mktime(time.strptime(str(snap.get("ts") or ""), "%Y%m%d_%H%M%S"))
+            age_h = max(0.0, (now - ts) / 3600.0)
+        except Exception:
+            age_h = self.STALE_SAT_HOURS
+        stale = min(1.0, age_h / self.STALE_SAT_HOURS)
+        return self.W_RANK * rank_pct + self.W_VOLATILITY * vol + self.W_STALENESS * stale
+
+    def order(self, store_base: str, gids: list) -> list:
+        scored = []
+        for idx, gid in enumerate(gids):
+            key = f"{store_base}::{gid}"
+            scored.append((-self.priority(key, load_state_snapshot(gid)), idx, gid))
+        scored.sort()
+        return [gid for _, _, gid in scored]
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def defer(self, key: str, preset: str = None):
+        self._deferred[key] = {"ts": _now_ts(), "preset": preset}
+        self._changed.add(key)
+        self.deferred_now += 1
+
+    def done(self, key: str):
+        if self._deferred.pop(key, None) is not None:
+            self._changed.add(key)
+
+    def save(self):
+        if not self._changed or not self.deferred_path:
+            return
+        # --shards の他プロセスが保存した分は残し、この実行で変えた gid だけ反映する
+        data = self._load()
+        for key in self._changed:
+            if key in self._deferred:
+                data[key] = self._deferred[key]
+            else:
+                data.pop(key, None)
+        _atomic_write_json(self.deferred_path, data)
+        self._changed.clear()
+
+def _list_cache_from_config(cfg: dict):
+    auto = (cfg or {}).get("auto", {}) or {}
+    hours = float(auto.get("list_cache_hours", 12) or 0)
+    if hours <= 0:
+        return None
+    return ListCache(os.path.join(STATE_DIR, LIST_CACHE_FILE_NAME), ttl_hours=hours)
+
+def _copy_calendar_row(row: dict, **overrides) -> dict:
+    """収集行のコピー（stats / stats_by_date は深いコピー）。overrides で preset/list_url/name 等を差し替え"""
+    out = dict(row)
+    out["stats"] = copy.deepcopy(row.get("stats") or {})
+    if "stats_by_date" in row:
+        out["stats_by_date"] = copy.deepcopy(row.get("stats_by_date"))
+    out.update(overrides)
+    return out
+
+async def _dedup_scrape(calendar_cache: dict, key: str, scrape, is_negative=None, cancelled=None):
+    """
+    同じ run 内で同じ gid を1回だけ取得する。戻り値は (row, shared)。
+    shared=True は別プリセットの取得結果（呼び出し側でコピーして使う）。
+    取得元の結果は成功行、または予約不可/カレンダー無しの確定（False）だけを共有する。
+    goto 失敗・リトライ送り・予算切れ・中断で None だった gid は、待っていた側が自分で取り直す。
+    """
+    while True:
+        fut = calendar_cache.get(key)
+        if fut is None:
+            break
+        shared = await asyncio.shield(fut)
+        if shared:
+            return shared, True
+        if shared is False:
+            return None, True
+        if calendar_cache.get(key) is fut:
+            calendar_cache.pop(key, None)
+        if cancelled is not None and cancelled():
+            return None, False
+    fut = asyncio.get_running_loop().create_future()
+    calendar_cache[key] = fut
+    row = None
+    try:
+        row = await scrape()
+        return row, False
+    finally:
+        if not fut.done():
+            # 後段のスコアリングで row は書き換わるので、取得直後の状態を共有する
+            if row:
+                fut.set_result(_copy_calendar_row(row))
+            else:
+                fut.set_result(False if is_negative is not None and is_negative() else None)
+
+async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurrency: int, nav_limiter, session: AsyncBrowserSession = None, page_sem: asyncio.Semaphore = None, checkpoint: RunCheckpoint = None, job_index: int = None, done_rows: dict = None, finalizer: "RowFinalizer" = None, calendar_cache: dict = None, negative_cache: NegativeCache = None, list_cache: ListCache = None, scheduler: GidScheduler = None, retry_queue: RetryQueue = None, breaker: HostCircuitBreaker = None, cancel: CancelToken = None):
+    """
+    cancel（CancelToken）が立ったら新しい gid に着手せず、取得中のページは閉じて打ち切る。
+    それまでに取れた行はそのまま返す（呼び出し側で cancel.is_set() を見て部分結果として扱う）。
+    """
     store_base = store_base_from_list_url(job.url)
-    apw, browser, context = await _make_async_context(headless=headless, minimize_browser=minimize_browser)
+    own_session = session is None
+    if own_session:
+        session = AsyncBrowserSession(headless=headless, minimize_browser=minimize_browser, pool_size=concurrency)
+    # ブレーカーが open の間は一覧にも行かない（half_open なら一覧の取得が probe になる）
+    list_probe = await breaker.wait(job.url, cancel=cancel) if breaker is not None else False
+    await session.acquire()
+    page = None
+    closer = None
     try:
-        page = await context.new_page()
-        page.set_default_navigation_timeout(NAV_TIMEOUT_MS)
+        page, _ = await session.acquire_page()
         perf_records = [] if _detail_log_enabled() else None
 
         girl_ids = []
         girl_name = {}
 
         cur = job.url
+        page_no = 0
+        page1_fp = ""
+        list_cache_hit = False
+        # 一覧を最後まで（次ページ無し or max_items）辿れた時だけ list_cache に入れる
+        list_complete = False
         while cur and len(girl_ids) < job.max_items:
-            await nav_limiter.wait_turn()
+            if cancel is not None and cancel.is_set():
+                break
+            page_no += 1
+            await nav_limiter.wait_turn(cur)
+            list_start = time.monotonic()
             ok = await async_goto_retry(page, cur, wait_until="domcontentloaded", tries=2)
+            _nav_report(nav_limiter, cur, ok=ok, latency_s=time.monotonic() - list_start)
             if not ok:
                 log_event("WARN", "list goto failed", url=cur)
                 break
+            status = _last_nav_status(page)
+            if status in _BLOCK_HTTP_STATUSES:
+                _nav_report(nav_limiter, cur, ok=False, blocked=True)
+                if breaker is not None:
+                    breaker.record(cur, blocked=True, reason=f"http_{status}")
 
             try:
                 await page.wait_for_selector("a[href*='girlid-']", timeout=12000)
@@ -5723,11 +7268,36 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
                     if len(girl_ids) >= job.max_items:
                         break
 
+            # 1ページ目が前回と同じなら、2ページ目以降は前回の一覧を使う（鮮度は list_cache_hours）
+            if page_no == 1 and list_cache is not None and pairs:
+                page1_fp = list_page_fingerprint(pairs)
+                cached = list_cache.get(job.url, page1_fp, job.max_items)
+                if cached:
+                    for gid, name in cached:
+                        if gid not in girl_name:
+                            girl_name[gid] = name
+                        if gid not in girl_ids and len(girl_ids) < job.max_items:
+                            girl_ids.append(gid)
+                    list_cache_hit = True
+                    log_event("INFO", "list cache hit", preset=job.name, gids=len(girl_ids))
+                    break
+
             nxt = await async_get_next_list_url(page)
             if not nxt or nxt == cur:
+                list_complete = True
                 break
             cur = nxt
 
+        if cancel is not None and cancel.is_set():
+            if breaker is not None:
+                breaker.record(job.url, None, probe=list_probe)
+            return [], []
+
+        # goto 失敗で途中までしか取れなかった一覧を入れると、短い一覧が list_cache_hours の間使われる
+        list_complete = list_complete or len(girl_ids) >= job.max_items
+        if list_cache is not None and girl_ids and page1_fp and not list_cache_hit and list_complete:
+            list_cache.put(job.url, page1_fp, [[gid, girl_name.get(gid, "")] for gid in girl_ids], job.max_items)
+
         if not girl_ids:
             log_event("ERR", "no girl_ids", list_url=job.url, preset=job.name)
             # capture debug artifacts
@@ -5739,16 +7309,84 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
             try:
                 html = await page.content()
                 if ("detected as abnormal" in html) or ("Please try again later" in html) or ("Your current behavior" in html):
+                    _nav_report(nav_limiter, job.url, ok=False, blocked=True)
+                    if breaker is not None:
+                        breaker.trip(job.url, reason="list_blocked")
                     raise BlockedBySiteError("blocked_by_site")
             except BlockedBySiteError:
                 raise
             except Exception:
                 pass
+            if breaker is not None:
+                breaker.record(job.url, None, probe=list_probe)
             return [], []
+        if breaker is not None:
+            breaker.record(job.url, blocked=False, probe=list_probe)
+
+        # page_sem があれば run 全体の同時ページ数（複数プリセットで共有）に従う
+        # 一覧ページは以降使わないので、ワーカー用の待機ページとして返す
+        list_page, page = page, None
+        await session.release_page(list_page)
+
+        sem = page_sem or asyncio.Semaphore(max(1, int(concurrency)))
+        use_http = _calendar_engine() == "http"
+
+        dedup_hits = []
+        negative_skips = []
+        # gid ごとの最終 reason（dedup の共有判定に使う）
+        gid_reason = {}
+        retry_gids = set()
+        # 取得中のページ（cancel で閉じる）
+        live_pages = set()
+
+        async def _close_on_cancel():
+            await cancel.wait()
+            for p in list(live_pages):
+                try:
+                    await p.close()
+                except Exception:
+                    pass
+
+        closer = asyncio.create_task(_close_on_cancel()) if cancel is not None else None
 
-        sem = asyncio.Semaphore(max(1, int(concurrency)))
+        def _cancelled() -> bool:
+            return cancel is not None and cancel.is_set()
 
         async def _worker(gid: str):
+            if _cancelled():
+                return None
+            # 前回まで予約不可/カレンダー無しだった gid は TTL の間スキップ（一部は抽選で再確認）
+            if negative_cache is not None:
+                skip, ent = negative_cache.should_skip(f"{store_base}::{gid}")
+                if skip:
+                    negative_skips.append(gid)
+                    if _detail_log_enabled():
+                        log_event("DBG", "negative cache skip", preset=job.name, gid=gid, reason=ent.get("reason"), hits=ent.get("hits"))
+                    return None
+            # 同じ run の別プリセットで取得中/取得済みの gid は、その結果を待って使い回す
+            if calendar_cache is None:
+                return await _scrape_gid(gid)
+            row, shared = await _dedup_scrape(
+                calendar_cache,
+                f"{store_base}::{gid}",
+                lambda: _scrape_gid(gid),
+                is_negative=lambda: is_negative_reason(gid_reason.get(gid)),
+                cancelled=_cancelled,
+            )
+            if not shared or not row:
+                return row
+            dedup_hits.append(gid)
+            if _detail_log_enabled():
+                log_event("DBG", "calendar dedup", preset=job.name, gid=gid, source_preset=row.get("preset"))
+            return _copy_calendar_row(
+                row,
+                name=girl_name.get(gid, row.get("name") or "（名前不明）"),
+                preset=job.name,
+                list_url=job.url,
+                dedup_from=row.get("preset"),
+            )
+
+        async def _scrape_gid(gid: str):
             name = girl_name.get(gid, "（名前不明）")
             detail_url = f"{store_base}/girlid-{gid}/"
             res_url = f"{store_base}/A6ShopReservation/?girl_id={gid}"
@@ -5756,34 +7394,93 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
             goto_s = 0.0
             iframe_wait_s = 0.0
             count_s = 0.0
+            http_s = 0.0
+            engine = "browser"
             stats = None
             frame_url = None
-
-            async with sem:
-                p2 = await context.new_page()
-                p2.set_default_navigation_timeout(NAV_TIMEOUT_MS)
-                try:
-                    await nav_limiter.wait_turn()
-                    goto_start = time.monotonic()
-                    ok = await async_goto_retry(p2, res_url, wait_until="domcontentloaded", tries=2, preset=job.name, gid=gid)
-                    goto_s = time.monotonic() - goto_start
-                    if not ok:
+            cb_blocked = None
+            cb_reason = None
+            # open 中はページ枠を握らずに待ち、枠を取った後にもう一度見直す
+            async with _breaker_slot(breaker, sem, res_url, cancel=cancel) as cb_probe:
+                if _cancelled():
+                    if breaker is not None:
+                        breaker.record(res_url, None, probe=cb_probe)
+                    return None
+                if scheduler is not None:
+                    if scheduler.expired():
+                        # 予算切れ: 残り（優先度の低い順に残っている）gid は次回へ回す
+                        scheduler.defer(f"{store_base}::{gid}", job.name)
+                        if breaker is not None:
+                            breaker.record(res_url, None, probe=cb_probe)
                         return None
-                    skip, why = await _is_not_reservable_page_async(p2)
-                    if skip:
-                        stats = {"ok": False, "reason": f"not_reservable({why})"}
-                        return None
-                    iframe_start = time.monotonic()
-                    await p2.wait_for_timeout(AFTER_GOTO_WAIT_MS)
-                    iframe_wait_s = time.monotonic() - iframe_start
-                    count_start = time.monotonic()
-                    stats, frame_url = await count_calendar_stats_by_slots_async(p2, preset=job.name, gid=gid)
-                    count_s = time.monotonic() - count_start
+                p2 = None
+                pool_hit = None
+                try:
+                    # コンテキストは作り直されることがあるので、その都度 session から借りる
+                    http_request = await session.acquire_request() if use_http else None
+                    if http_request is not None:
+                        try:
+                            http_start = time.monotonic()
+                            stats, frame_url = await _count_calendar_stats_http(http_request, res_url, preset=job.name, gid=gid, nav_limiter=nav_limiter)
+                            http_s = time.monotonic() - http_start
+                        finally:
+                            session.release_request()
+                        if stats is not None:
+                            engine = "http"
+                            cb_blocked = False
+                    if stats is None:
+                        p2, pool_hit = await session.acquire_page()
+                        live_pages.add(p2)
+                        await nav_limiter.wait_turn(res_url)
+                        goto_start = time.monotonic()
+                        # retry_queue があればその場で reload せず、プリセットの最後にバックオフ付きで取り直す
+                        tries = 1 if retry_queue is not None else 2
+                        ok = await async_goto_retry(p2, res_url, wait_until="domcontentloaded", tries=tries, preset=job.name, gid=gid)
+                        goto_s = time.monotonic() - goto_start
+                        _nav_report(nav_limiter, res_url, ok=ok, latency_s=goto_s)
+                        if ok:
+                            status = _last_nav_status(p2)
+                            cb_blocked = status in _BLOCK_HTTP_STATUSES
+                            if cb_blocked:
+                                cb_reason = f"http_{status}"
+                                _nav_report(nav_limiter, res_url, ok=False, blocked=True)
+                        if not ok:
+                            if _cancelled():
+                                return None
+                            if retry_queue is not None:
+                                if retry_queue.push(job.name, gid):
+                                    retry_gids.add(gid)
+                                else:
+                                    log_event("WARN", "retry given up", preset=job.name, gid=gid, attempts=retry_queue.attempts(job.name, gid))
+                            return None
+                        # 予約不可ならここで抜ける（待ちを払わない）。集めた signals は集計側の初回判定にも使う
+                        signals = await _collect_page_signals_async(p2)
+                        skip, why = await _is_not_reservable_page_async(p2, signals=signals)
+                        if skip:
+                            stats = {"ok": False, "reason": f"not_reservable({why})"}
+                            return None
+                        iframe_start = time.monotonic()
+                        await p2.wait_for_timeout(AFTER_GOTO_WAIT_MS)
+                        iframe_wait_s = time.monotonic() - iframe_start
+                        count_start = time.monotonic()
+                        stats, frame_url = await count_calendar_stats_by_slots_async(p2, preset=job.name, gid=gid, cancel=cancel, signals=signals)
+                        count_s = time.monotonic() - count_start
+                        if isinstance(stats, dict) and stats.get("engine"):
+                            engine = stats.get("engine")
                     if not stats or not isinstance(stats, dict):
                         return None
+                    if _cancelled() and not stats.get("ok"):
+                        return None
+                    if stats.get("suspicious_hit") and stats.get("suspicious_strength") == "strong":
+                        _nav_report(nav_limiter, res_url, ok=False, blocked=True)
+                        cb_blocked = True
+                        cb_reason = "suspicious"
                     reason = stats.get("reason") if isinstance(stats, dict) else ""
                     if (not stats.get("ok")) and (reason == "iframe_missing" or str(reason).startswith("not_reservable")):
                         return None
+                    if scheduler is not None and stats.get("ok"):
+                        # 取れた時だけ「前回見送り」の印を外す（失敗・リトライ送りなら次回も先頭に回す）
+                        scheduler.done(f"{store_base}::{gid}")
                     return {
                         "gid": gid,
                         "name": name,
@@ -5795,6 +7492,9 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
                         "list_url": job.url,
                     }
                 finally:
+                    if _cancelled() and not (isinstance(stats, dict) and stats.get("ok")):
+                        # 打ち切りで取れなかった gid は予約不可/ブロックの判定に使わない
+                        stats, cb_blocked = None, None
                     total_s = time.monotonic() - start_total
                     if _detail_log_enabled():
                         detail = stats.get("_detail", {}) if isinstance(stats, dict) else {}
@@ -5805,6 +7505,7 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
                         total_slots = stats.get("total_slots") if isinstance(stats, dict) else None
                         td_count = stats.get("td_count") if isinstance(stats, dict) else None
                         segments = {
+                            "http": http_s,
                             "goto": goto_s,
                             "iframe_wait": iframe_wait_s,
                             "count": count_s,
@@ -5819,6 +7520,8 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
                             gid=gid,
                             url=res_url,
                             total_s=round(total_s, 3),
+                            engine=engine,
+                            http_s=round(http_s, 3),
                             goto_s=round(goto_s, 3),
                             iframe_wait_s=round(iframe_wait_s, 3),
                             count_s=round(count_s, 3),
@@ -5830,6 +7533,7 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
                             max_cols=max_cols,
                             total_slots=total_slots,
                             td_count=td_count,
+                            pool_hit=pool_hit,
                         )
                         if perf_records is not None:
                             perf_records.append({
@@ -5837,22 +7541,101 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
                                 "url": res_url,
                                 "total_s": round(total_s, 3),
                                 "slowest_segment": slowest_segment,
+                                "pool_hit": pool_hit,
+                                "engine": engine,
                             })
-                    try:
-                        await p2.close()
-                    except Exception:
-                        pass
-
-        tasks = [asyncio.create_task(_worker(gid)) for gid in girl_ids]
+                    if isinstance(stats, dict):
+                        gid_reason[gid] = stats.get("reason")
+                    if negative_cache is not None and isinstance(stats, dict):
+                        negative_cache.observe(f"{store_base}::{gid}", bool(stats.get("ok")), stats.get("reason"))
+                    if breaker is not None:
+                        breaker.record(res_url, cb_blocked, probe=cb_probe, reason=cb_reason)
+                    if engine == "browser" and isinstance(stats, dict) and not is_negative_reason(stats.get("reason")):
+                        # 予約ページの route プロファイルで描画が崩れていないか（サニティ再試行なしで取れたか）
+                        detail = stats.get("_detail") or {}
+                        _ROUTE_STATS.note_sanity("reservation", bool(stats.get("ok")) and not detail.get("sanity_retries"))
+                    if p2 is not None:
+                        live_pages.discard(p2)
+                        await session.release_page(p2)
+
+        # --resume: チェックポイント済みの gid は取り直さない
         results = []
+        done_rows = done_rows or {}
+        resumed = [gid for gid in girl_ids if gid in done_rows]
+        for gid in resumed:
+            results.append(done_rows[gid])
+            if finalizer is not None:
+                await asyncio.to_thread(finalizer.add, done_rows[gid])
+        if resumed:
+            log_event("INFO", "resume skip gids", preset=job.name, skipped=len(resumed), remaining=len(girl_ids) - len(resumed))
+        pending = [gid for gid in girl_ids if gid not in done_rows]
+        if scheduler is not None:
+            pending = scheduler.order(store_base, pending)
+        if negative_cache is not None:
+            # 再確認に回った negative gid は後回し（生きている gid を先に取る）
+            pending.sort(key=lambda g: negative_cache.get(f"{store_base}::{g}") is not None)
+
+        async def _collect(r):
+            if not r or not isinstance(r, dict):
+                return
+            results.append(r)
+            if checkpoint is not None:
+                try:
+                    checkpoint.add_row(job_index or 0, job.name, r)
+                except Exception as e:
+                    log_event("ERR", "checkpoint write failed", preset=job.name, gid=r.get("gid"), err=str(e)[:200])
+            if finalizer is not None:
+                # スコアリング（履歴読み込み含む）は残りのワーカーのネットワーク待ちと並行して進める
+                try:
+                    await asyncio.to_thread(finalizer.add, r)
+                except Exception as e:
+                    log_event("WARN", "stream finalize failed", preset=job.name, gid=r.get("gid"), err=str(e)[:200])
+
+        tasks = [asyncio.create_task(_worker(gid)) for gid in pending]
         for t in asyncio.as_completed(tasks):
-            r = await t
-            if r and isinstance(r, dict):
-                results.append(r)
+            try:
+                r = await t
+            except Exception:
+                # 閉じたページでの例外は打ち切りによるもの（この gid は次回の --resume で取る）
+                if _cancelled():
+                    continue
+                raise
+            await _collect(r)
+        if _cancelled():
+            log_event("INFO", "job cancelled", preset=job.name, got=len(results), gids=len(girl_ids))
+            if retry_queue is not None:
+                retry_queue.take(job.name)
+
+        # goto に失敗した gid はここでまとめて取り直す（バックオフ待ちの間はページ枠を握らない）
+        if retry_queue is not None and retry_queue.pending(job.name):
+            recovered = []
+
+            async def _retry(gid: str):
+                r = await _scrape_gid(gid)
+                if r:
+                    recovered.append(gid)
+                    retry_gids.discard(gid)
+                await _collect(r)
+
+            log_event("INFO", "retry drain start", preset=job.name, pending=retry_queue.pending(job.name))
+            calls = await retry_queue.drain(job.name, _retry)
+            log_event(
+                "INFO",
+                "retry drain summary",
+                preset=job.name,
+                retries=calls,
+                recovered=len(recovered),
+                failed=len(retry_gids),
+                budget_left=max(0, retry_queue.budget - retry_queue.pushed),
+            )
 
         prev_rows = []
+        writer = finalizer.writer if finalizer is not None else None
         for r in results:
             gid = r.get("gid","")
+            if gid and writer is not None and writer.pending(gid):
+                # 別プリセットが同じ gid の state を書いている途中なら書き終わりを待つ
+                await asyncio.to_thread(writer.wait_gid, gid)
             prev = load_state_snapshot(gid) if gid else None
             prev_rows.append(prev)
 
@@ -5865,40 +7648,113 @@ async def async_scrape_job(job, headless: bool, minimize_browser: bool, concurre
                 count=len(perf_records),
                 top5=top5,
             )
+        if _detail_log_enabled():
+            if session.pool is not None:
+                log_event("INFO", "page pool stats", preset=job.name, **session.pool.stats())
+        if dedup_hits:
+            log_event("INFO", "calendar dedup summary", preset=job.name, reused=len(dedup_hits), gids=len(girl_ids))
+        if negative_skips:
+            log_event("INFO", "negative cache summary", preset=job.name, skipped=len(negative_skips), gids=len(girl_ids))
 
         return results, prev_rows
     finally:
-        try:
-            await context.close()
-        except Exception:
-            pass
-        try:
-            if browser:
-                await browser.close()
-        except Exception:
-            pass
-        try:
-            await apw.stop()
-        except Exception:
-            pass
+        if closer is not None:
+            closer.cancel()
+        if page is not None:
+            await session.release_page(page)
+        session.release()
+        if own_session:
+            await session.close()
+
+class FinalizeWriter:
+    """
+    history/state の書き込みを専用スレッドで順番に実行する（スクレイピングと並行）。
+    submit した順に実行されるので、チェックポイントの job_done は書き込みの後ろに積む。
+    gid の history/state を書く処理は submit_gid で積み、読む側は wait_gid(gid) で書き終わりを待つ
+    （別プリセットが同じ gid を書いている途中の state を読まないように）。
+    """
+    def __init__(self):
+        self._q = queue.Queue()
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._thread = threading.Thread(target=self._loop, name="finalize-writer", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            item = self._q.get()
+            try:
+                if item is None:
+                    return
+                fn, args, kw, gid = item
+                try:
+                    fn(*args, **kw)
+                except Exception as e:
+                    log_event("ERR", "finalize writer failed", fn=getattr(fn, "__name__", str(fn)), err=str(e)[:200])
+                finally:
+                    if gid:
+                        with self._cond:
+                            n = self._pending.get(gid, 0) - 1
+                            if n > 0:
+                                self._pending[gid] = n
+                            else:
+                                self._pending.pop(gid, None)
+                            self._cond.notify_all()
+            finally:
+                self._q.task_done()
+
+    def submit(self, fn, *args, **kw):
+        self._q.put((fn, args, kw, None))
+
+    def submit_gid(self, gid: str, fn, *args, **kw):
+        """gid の history/state を書く処理を積む（終わるまで wait_gid(gid) は待つ）"""
+        if gid:
+            with self._cond:
+                self._pending[gid] = self._pending.get(gid, 0) + 1
+        self._q.put((fn, args, kw, gid or None))
 
-def finalize_rows(collected_rows: list, prev_rows: list, run_dir: str, job, job_i: int):
-    if not collected_rows:
-        log_event("WARN", "finalize_rows empty", preset=job.name, run_dir=os.path.basename(run_dir))
-        save_job_outputs(run_dir, job, job_i, [], prev_rows or [])
-        return []
+    def pending(self, gid: str) -> bool:
+        with self._cond:
+            return bool(self._pending.get(gid))
+
+    def wait_gid(self, gid: str, timeout: float = None) -> bool:
+        """gid の書き込みが積まれていれば終わるまで待つ（書き込みスレッド以外から呼ぶ）"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending.get(gid), timeout=timeout)
 
-    max_bell = 0
-    for r in collected_rows:
-        b = (r.get("stats", {}) or {}).get("bell", 0) or 0
-        if b > max_bell:
-            max_bell = b
+    def flush(self):
+        self._q.join()
 
-    hist_cache = {}
-    out = []
-    for r in collected_rows:
+    def close(self):
+        self.flush()
+        self._q.put(None)
+        self._thread.join(timeout=30)
+
+def _call_now(fn, *args, **kw):
+    fn(*args, **kw)
+
+class RowFinalizer:
+    """
+    1 プリセット分の行を、届いた順にスコアリングする（health/signal/score/BD/rank）。
+    バッチ相対の rank percentile だけは finish() で全件そろってから付け、
+    history/state の書き込みは writer（FinalizeWriter）に任せる。
+    """
+    def __init__(self, job, writer: FinalizeWriter = None):
+        self.job = job
+        self.writer = writer
+        self.rows = []
+        self.max_bell = 0
+        self.unchanged_gids = []
+        self.skip_unchanged = bool(load_config().get("auto", {}).get("skip_unchanged", True))
+        self._hist_cache = {}
+
+    def add(self, r: dict) -> dict:
+        job = self.job
         gid = r.get("gid","")
         stats = r.get("stats", {}) or {}
+        b = stats.get("bell", 0) or 0
+        if b > self.max_bell:
+            self.max_bell = b
         stats_by_date = None
         if isinstance(stats, dict):
             stats_by_date = stats.get("stats_by_date")
@@ -5907,11 +7763,14 @@ def finalize_rows(collected_rows: list, prev_rows: list, run_dir: str, job, job_
         if isinstance(stats_by_date, dict):
             r["stats_by_date"] = stats_by_date
 
+        if gid and self.writer is not None:
+            self.writer.wait_gid(gid)
         prev = load_state_snapshot(gid) if gid else None
         prev_stats = (prev.get("stats") if isinstance(prev, dict) else None) if prev else None
         r["prev_stats"] = prev_stats
         r["delta_pop"] = calc_delta_popularity(prev_stats, stats)
         r.setdefault("delta", r.get("delta_pop"))
+        r["calendar_volatility"] = _calendar_volatility(prev, stats_by_date)
 
         diag = _row_quality_diag_from_stats(
             stats,
@@ -5927,16 +7786,27 @@ def finalize_rows(collected_rows: list, prev_rows: list, run_dir: str, job, job_
         r["signal_strength"] = signal_strength
         r["signal_detail"] = signal_detail
 
-        r["score"] = calc_score(stats, max_bell)
+        r["score"] = calc_score(stats, self.max_bell)
         r["score_model"] = _SCORE_MODEL_NAME
 
+        r["calendar_fp"] = _calendar_fingerprint(stats, stats_by_date)
+        reuse = _reusable_scoring(prev, r["calendar_fp"]) if (self.skip_unchanged and gid) else None
+        if reuse is not None:
+            # カレンダーが前回（同日）と同じ: 履歴読み込み・BD/rank 計算・履歴/state 書き込みを省く
+            r.update(reuse)
+            r["calendar_unchanged"] = True
+            r["spike"] = r.get("score", 0) - r.get("big_score", r.get("score", 0))
+            self.unchanged_gids.append(gid)
+            self.rows.append(r)
+            return r
+
         try:
             if gid:
-                if gid in hist_cache:
-                    hist = hist_cache[gid]
+                if gid in self._hist_cache:
+                    hist = self._hist_cache[gid]
                 else:
                     hist = load_history(gid, limit=200)
-                    hist_cache[gid] = hist
+                    self._hist_cache[gid] = hist
             else:
                 hist = []
             big_score, detail = _calc_bigdata_score_detail(stats, hist, cur_stats_by_date=stats_by_date)
@@ -5964,101 +7834,164 @@ def finalize_rows(collected_rows: list, prev_rows: list, run_dir: str, job, job_
             log_event("WARN", "calc_bigdata_score failed", preset=job.name, gid=gid, err=str(e)[:200])
         r["spike"] = r.get("score", 0) - r.get("big_score", r.get("score", 0))
 
-        out.append(r)
+        self.rows.append(r)
+        return r
+
+    def finish(self, run_dir: str, job_i: int, prev_rows: list, after=None):
+        """
+        percentile を付けて history/state/job 出力を書く（writer があれば非同期）。
+        after(rows) は書き込みがすべて終わった後に writer 上で呼ばれる。
+        """
+        job = self.job
+        out = self.rows
+        submit = self.writer.submit if self.writer is not None else _call_now
+        if not out:
+            log_event("WARN", "finalize_rows empty", preset=job.name, run_dir=os.path.basename(run_dir))
+            save_job_outputs(run_dir, job, job_i, [], prev_rows or [])
+            if after is not None:
+                submit(after, out)
+            return []
+
+        _assign_rank_percentiles(out)
+        _assign_rank_percentiles(out, score_key="rank_score_lower", percentile_key="rank_percentile_lower")
+
+        for r in out:
+            if r.get("calendar_unchanged") or not r.get("gid"):
+                continue
+            if self.writer is not None:
+                self.writer.submit_gid(r["gid"], _persist_scored_row, r, job.name)
+            else:
+                _persist_scored_row(r, job.name)
 
-    _assign_rank_percentiles(out)
-    _assign_rank_percentiles(out, score_key="rank_score_lower", percentile_key="rank_percentile_lower")
+        if self.unchanged_gids:
+            submit(_record_unchanged_observations, list(self.unchanged_gids), preset=job.name)
+            log_event("INFO", "finalize unchanged", preset=job.name, unchanged=len(self.unchanged_gids), rows=len(out))
 
-    for r in out:
-        gid = r.get("gid","")
-        stats = r.get("stats", {}) or {}
-        stats_by_date = r.get("stats_by_date") if isinstance(r.get("stats_by_date"), dict) else None
-        if gid:
-            try:
-                append_history(gid, {
-                    "ts": _now_ts(),
-                    "preset": job.name,
-                    "gid": gid,
-                    "name": r.get("name",""),
-                    "score": r.get("score",0),
-                    "big_score": r.get("big_score", r.get("score",0)),
-                    "big_score_old": r.get("big_score_old"),
-                    "score_model": _SCORE_MODEL_NAME,
-                    "bd_model": r.get("bd_model"),
-                    "bd_model_version": r.get("bd_model_version"),
-                    "bd_level": r.get("bd_level"),
-                    "bd_trust": r.get("bd_trust"),
-                    "bd_days": r.get("bd_days"),
-                    "bd_window": r.get("bd_window"),
-                    "bd_service_days": r.get("bd_service_days"),
-                    "bd_obs_days": r.get("bd_obs_days"),
-                    "quality_score": r.get("quality_score"),
-                    "quality_lower_bound": r.get("quality_lower_bound"),
-                    "momentum_score": r.get("momentum_score"),
-                    "rank_score_raw": r.get("rank_score_raw"),
-                    "rank_score_lower": r.get("rank_score_lower"),
-                    "rank_percentile": r.get("rank_percentile"),
-                    "rank_percentile_lower": r.get("rank_percentile_lower"),
-                    "rank_model_version": r.get("rank_model_version"),
-                    "rank_detail": r.get("rank_detail"),
-                    "spike": r.get("spike"),
-                    "site_confidence": r.get("site_confidence", 0),
-                    "scrape_health": r.get("scrape_health", r.get("site_confidence", 0)),
-                    "signal_strength": r.get("signal_strength"),
-                    "stats": stats,
-                    "stats_by_date": stats_by_date,
-                })
-            except Exception as e:
-                log_event("ERR", "append_history failed", preset=job.name, gid=gid, err=str(e)[:200])
+        save_job_outputs(run_dir, job, job_i, out, prev_rows or [])
+        if after is not None:
+            submit(after, out)
+        return out
 
-        if gid:
-            try:
-                save_state_snapshot(gid, {
-                    "ts": _now_ts(),
-                    "gid": gid,
-                    "name": r.get("name",""),
-                    "preset": job.name,
-                    "stats": stats,
-                    "stats_by_date": stats_by_date,
-                    "score": r.get("score"),
-                    "big_score": r.get("big_score"),
-                    "big_score_old": r.get("big_score_old"),
-                    "bd_window": r.get("bd_window"),
-                    "quality_score": r.get("quality_score"),
-                    "quality_lower_bound": r.get("quality_lower_bound"),
-                    "momentum_score": r.get("momentum_score"),
-                    "rank_score_raw": r.get("rank_score_raw"),
-                    "rank_score_lower": r.get("rank_score_lower"),
-                    "rank_percentile": r.get("rank_percentile"),
-                    "rank_percentile_lower": r.get("rank_percentile_lower"),
-                    "rank_model_version": r.get("rank_model_version"),
-                    "scrape_health": r.get("scrape_health", r.get("site_confidence", 0)),
-                    "signal_strength": r.get("signal_strength"),
-                })
-            except Exception as e:
-                log_event("ERR", "save_state_snapshot failed", preset=job.name, gid=gid, err=str(e)[:200])
+def _persist_scored_row(r: dict, preset: str):
+    gid = r.get("gid","")
+    stats = r.get("stats", {}) or {}
+    stats_by_date = r.get("stats_by_date") if isinstance(r.get("stats_by_date"), dict) else None
+    try:
+        append_history(gid, {
+            "ts": _now_ts(),
+            "preset": preset,
+            "gid": gid,
+            "name": r.get("name",""),
+            "score": r.get("score",0),
+            "big_score": r.get("big_score", r.get("score",0)),
+            "big_score_old": r.get("big_score_old"),
+            "score_model": _SCORE_MODEL_NAME,
+            "bd_model": r.get("bd_model"),
+            "bd_model_version": r.get("bd_model_version"),
+            "bd_level": r.get("bd_level"),
+            "bd_trust": r.get("bd_trust"),
+            "bd_days": r.get("bd_days"),
+            "bd_window": r.get("bd_window"),
+            "bd_service_days": r.get("bd_service_days"),
+            "bd_obs_days": r.get("bd_obs_days"),
+            "quality_score": r.get("quality_score"),
+            "quality_lower_bound": r.get("quality_lower_bound"),
+            "momentum_score": r.get("momentum_score"),
+            "rank_score_raw": r.get("rank_score_raw"),
+            "rank_score_lower": r.get("rank_score_lower"),
+            "rank_percentile": r.get("rank_percentile"),
+            "rank_percentile_lower": r.get("rank_percentile_lower"),
+            "rank_model_version": r.get("rank_model_version"),
+            "rank_detail": r.get("rank_detail"),
+            "spike": r.get("spike"),
+            "site_confidence": r.get("site_confidence", 0),
+            "scrape_health": r.get("scrape_health", r.get("site_confidence", 0)),
+            "signal_strength": r.get("signal_strength"),
+            "stats": stats,
+            "stats_by_date": stats_by_date,
+        })
+    except Exception as e:
+        log_event("ERR", "append_history failed", preset=preset, gid=gid, err=str(e)[:200])
 
-    save_job_outputs(run_dir, job, job_i, out, prev_rows or [])
+    try:
+        save_state_snapshot(gid, {
+            "ts": _now_ts(),
+            "gid": gid,
+            "name": r.get("name",""),
+            "preset": preset,
+            "stats": stats,
+            "stats_by_date": stats_by_date,
+            "score": r.get("score"),
+            "big_score": r.get("big_score"),
+            "big_score_old": r.get("big_score_old"),
+            "bd_window": r.get("bd_window"),
+            "quality_score": r.get("quality_score"),
+            "quality_lower_bound": r.get("quality_lower_bound"),
+            "momentum_score": r.get("momentum_score"),
+            "rank_score_raw": r.get("rank_score_raw"),
+            "rank_score_lower": r.get("rank_score_lower"),
+            "rank_percentile": r.get("rank_percentile"),
+            "rank_percentile_lower": r.get("rank_percentile_lower"),
+            "rank_model_version": r.get("rank_model_version"),
+            "scrape_health": r.get("scrape_health", r.get("site_confidence", 0)),
+            "signal_strength": r.get("signal_strength"),
+            "calendar_fp": r.get("calendar_fp"),
+            "calendar_volatility": r.get("calendar_volatility"),
+            "scoring": {k: r.get(k) for k in _REUSABLE_SCORE_KEYS},
+        })
+    except Exception as e:
+        log_event("ERR", "save_state_snapshot failed", preset=preset, gid=gid, err=str(e)[:200])
 
-    return out
+def finalize_rows(collected_rows: list, prev_rows: list, run_dir: str, job, job_i: int):
+    finalizer = RowFinalizer(job)
+    for r in collected_rows or []:
+        finalizer.add(r)
+    return finalizer.finish(run_dir, job_i, prev_rows)
 
-async def run_job(preset_names=None, jobs=None, headless=True, minimize_browser=True, concurrency=3, trigger_context="auto", force_today=False, job_state_file=None, progress_file=None, stop_file=None):
+async def run_job(preset_names=None, jobs=None, headless=True, minimize_browser=True, concurrency=3, trigger_context="auto", force_today=False, job_state_file=None, progress_file=None, stop_file=None, preset_parallel=None, resume_dir=None, time_budget_s=None, shard=None, job_indices=None):
+    """
+    shard=(k, n) は --shards の子プロセス用: run_dir（resume_dir）のうち (index-1) % n == k のプリセットだけ取り、
+    run 全体の出力（all_current.json 等）は親が全シャード分をまとめて書く。
+    job_indices を渡すと、shard の割り振りの代わりにその番号（1 始まり）のプリセットだけ取る（--queue-worker 用）。
+    """
+    global _ASSET_CACHE
     cfg = load_config()
     preset_names = preset_names or []
     preset_names = [x.strip() for x in preset_names if x.strip()]
 
     ensure_data_dirs()
-    run_dir = make_run_dir()
+    if shard:
+        shard_i, shard_n = int(shard[0]), max(1, int(shard[1]))
+        _prepare_shard_worker(cfg, shard_i, shard_n)
+        concurrency = max(1, int(concurrency) // shard_n)
+        progress_file = os.path.join(resume_dir, f"progress.shard{shard_i}.json")
+    if resume_dir:
+        # 中断した run_dir に追記する（チェックポイント済みの gid / 完了済みプリセットは飛ばす）
+        run_dir = os.path.abspath(resume_dir)
+        os.makedirs(os.path.join(run_dir, "jobs"), exist_ok=True)
+        resumed = load_checkpoint(run_dir)
+    else:
+        run_dir = make_run_dir()
+        resumed = {"rows": {}, "done": set()}
+    checkpoint = RunCheckpoint(run_dir, shard=shard[0] if shard else None)
+    writer = FinalizeWriter()
     set_current_run_dir(run_dir)
     run_ts = os.path.basename(run_dir).replace("run_", "")
 
+    if preset_parallel is None:
+        preset_parallel = int(cfg.get("auto", {}).get("preset_parallel", 1) or 1)
+    preset_parallel = max(1, int(preset_parallel))
+
     if _env_flag("CAL_DEBUG_ONE"):
         concurrency = 1
+        preset_parallel = 1
 
     if jobs is None:
         jobs = build_jobs_from_presets(preset_names, presets_data=None)
+    own_jobs = _shard_job_indices(len(jobs), shard=shard, job_indices=job_indices)
 
-    clear_stop_flag(stop_file)
+    if not shard:
+        clear_stop_flag(stop_file)
 
     job_payload = {
         "created_at": _now_ts(),
@@ -6068,17 +8001,23 @@ async def run_job(preset_names=None, jobs=None, headless=True, minimize_browser=
         "headless": headless,
         "minimize_browser": minimize_browser,
         "concurrency": concurrency,
+        "preset_parallel": preset_parallel,
         "run_dir": run_dir,
         "run_ts": run_ts,
     }
-    write_job_state(job_payload, job_state_file)
+    if resume_dir:
+        job_payload["resumed_at"] = _now_ts()
+    if not shard:
+        write_job_state(job_payload, job_state_file)
+        write_run_file(run_dir, "job.json", job_payload)
 
-    total_jobs = len(jobs)
+    total_jobs = len(own_jobs)
     settings_payload = {
         "preset_names": preset_names,
         "headless": headless,
         "minimize_browser": minimize_browser,
         "concurrency": concurrency,
+        "preset_parallel": preset_parallel,
         "trigger": trigger_context,
     }
     write_progress_state({
@@ -6093,17 +8032,40 @@ async def run_job(preset_names=None, jobs=None, headless=True, minimize_browser=
         "settings": settings_payload,
     }, progress_file)
 
-    log_event("INFO", "job run start", run_dir=os.path.basename(run_dir), headless=headless, concurrency=concurrency, presets=preset_names, trigger=trigger_context)
+    log_event("INFO", "job run start", run_dir=os.path.basename(run_dir), headless=headless, concurrency=concurrency, preset_parallel=preset_parallel, presets=preset_names, trigger=trigger_context)
+    if resume_dir:
+        log_event("INFO", "job run resume", run_dir=os.path.basename(run_dir), done_jobs=sorted(resumed["done"]), checkpoint_rows=sum(len(x) for x in resumed["rows"].values()))
 
-    nav_limiter = AsyncNavLimiter(int(cfg.get("auto", {}).get("min_nav_interval_ms", 650) or 650))
+    nav_limiter = _nav_limiter_from_config(cfg)
+    session = _browser_session_from_config(cfg, headless=headless, minimize_browser=minimize_browser, concurrency=concurrency)
     all_rows = []
     completed = 0
     stop_reason = ""
-    for i, job in enumerate(jobs, start=1):
-        if stop_requested(stop_file):
-            stop_reason = "stop_flag"
-            log_event("INFO", "stop flag detected", preset=job.name, run_dir=os.path.basename(run_dir))
-            break
+    # プリセットは preset_parallel 件まで並行、ページ数は全体で concurrency に制限
+    page_sem = asyncio.Semaphore(max(1, int(concurrency)))
+    preset_sem = asyncio.Semaphore(preset_parallel)
+    rows_by_job = {}
+    running = {}
+    # store_base::gid -> Future（プリセット間で同じ gid のカレンダー取得を 1 回にする）
+    calendar_cache = {}
+    negative_cache = _negative_cache_from_config(cfg)
+    list_cache = _list_cache_from_config(cfg)
+    scheduler = GidScheduler(time_budget_s=time_budget_s)
+    # goto 失敗の取り直しは run 全体で予算を共有する
+    retry_queue = _retry_queue_from_config(cfg)
+    breaker = _circuit_breaker_from_config(cfg)
+    # 停止フラグはファイル監視で受け、プリセットの途中（gid 単位・カレンダー待ち）でも打ち切る
+    cancel = CancelToken(stop_flag_path(stop_file)).start()
+    _ROUTE_STATS.reset()
+    _ROUTE_STATS.enabled = bool(cfg.get("auto", {}).get("route_profiles", True))
+    _ASSET_CACHE = _asset_cache_from_config(cfg)
+
+    def _write_running_progress():
+        cur = None
+        if running:
+            idx = max(running)
+            j = running[idx]
+            cur = {"index": idx, "name": j.name, "url": j.url, "max_items": j.max_items}
         write_progress_state({
             "status": "running",
             "trigger": trigger_context,
@@ -6111,56 +8073,182 @@ async def run_job(preset_names=None, jobs=None, headless=True, minimize_browser=
             "run_ts": run_ts,
             "completed": completed,
             "total": total_jobs,
-            "rows": len(all_rows),
-            "current_job": {"index": i, "name": job.name, "url": job.url, "max_items": job.max_items},
+            "rows": sum(len(x) for x in rows_by_job.values()),
+            "current_job": cur,
+            "running_jobs": [running[k].name for k in sorted(running)],
             "settings": settings_payload,
         }, progress_file)
-        log_event("INFO", "job start", preset=job.name, url=job.url, max_items=job.max_items)
-        try:
-            cur_rows, prev_rows = await async_scrape_job(job, headless=headless, minimize_browser=minimize_browser, concurrency=concurrency, nav_limiter=nav_limiter)
-        except BlockedBySiteError:
-            log_event("ERR", "blocked_by_site", preset=job.name, url=job.url)
-            err_row = {
-                "preset": job.name,
-                "list_url": job.url,
-                "name": "[ERROR] blocked_by_site",
-                "error": "blocked_by_site",
-                "stats": {"bell": 0, "maru": 0, "tel": 0, "bookable_slots": 0, "total_slots": 0, "excluded_slots": 0, "bell_rate_bookable": None},
-            }
-            save_job_outputs(run_dir, job, i, [err_row], [])
-            stop_reason = "blocked_by_site"
-            break
-        except Exception as e:
-            log_event("ERR", "job failed", preset=job.name, url=job.url, err=str(e)[:200])
-            err_row = {
-                "preset": job.name,
-                "list_url": job.url,
-                "name": f"[ERROR] {str(e)[:120]}",
-                "error": str(e),
-                "stats": {"bell": 0, "maru": 0, "tel": 0, "bookable_slots": 0, "total_slots": 0, "excluded_slots": 0, "bell_rate_bookable": None},
-            }
-            save_job_outputs(run_dir, job, i, [err_row], [])
+
+    async def _run_one(i: int, job):
+        nonlocal completed, stop_reason
+        if i not in own_jobs:
+            return
+        if i in resumed["done"]:
+            done = load_job_rows(run_dir, i)
+            if done is not None:
+                rows_by_job[i] = done
+                completed += 1
+                log_event("INFO", "job resumed (already done)", preset=job.name, rows=len(done))
+                return
+        async with preset_sem:
+            if stop_reason:
+                return
+            if cancel.is_set():
+                stop_reason = "stop_flag"
+                log_event("INFO", "stop flag detected", preset=job.name, run_dir=os.path.basename(run_dir))
+                return
+            if scheduler.expired():
+                log_event("INFO", "time budget exhausted (preset skipped)", preset=job.name)
+                stop_reason = stop_reason or "time_budget"
+                return
+            running[i] = job
+            _write_running_progress()
+            log_event("INFO", "job start", preset=job.name, url=job.url, max_items=job.max_items)
+            finalizer = RowFinalizer(job, writer)
+            try:
+                cur_rows, prev_rows = await async_scrape_job(
+                    job,
+                    headless=headless,
+                    minimize_browser=minimize_browser,
+                    concurrency=concurrency,
+                    nav_limiter=nav_limiter,
+                    session=session,
+                    page_sem=page_sem,
+                    checkpoint=checkpoint,
+                    job_index=i,
+                    done_rows=resumed["rows"].get(i),
+                    finalizer=finalizer,
+                    calendar_cache=calendar_cache,
+                    negative_cache=negative_cache,
+                    list_cache=list_cache,
+                    scheduler=scheduler,
+                    retry_queue=retry_queue,
+                    breaker=breaker,
+                    cancel=cancel,
+                )
+            except BlockedBySiteError:
+                log_event("ERR", "blocked_by_site", preset=job.name, url=job.url)
+                err_row = {
+                    "preset": job.name,
+                    "list_url": job.url,
+                    "name": "[ERROR] blocked_by_site",
+                    "error": "blocked_by_site",
+                    "stats": {"bell": 0, "maru": 0, "tel": 0, "bookable_slots": 0, "total_slots": 0, "excluded_slots": 0, "bell_rate_bookable": None},
+                }
+                save_job_outputs(run_dir, job, i, [err_row], [])
+                if breaker is not None and not breaker.gave_up(job.url):
+                    # ブレーカーが open 済み: 残りのプリセットは cool-down 後の probe から再開する
+                    completed += 1
+                    return
+                stop_reason = "blocked_by_site"
+                return
+            except Exception as e:
+                if cancel.is_set():
+                    # 打ち切りで閉じたページ等による例外はエラー扱いにしない
+                    stop_reason = stop_reason or "stop_flag"
+                    log_event("INFO", "job stopped", preset=job.name, err=str(e)[:200])
+                    return
+                log_event("ERR", "job failed", preset=job.name, url=job.url, err=str(e)[:200])
+                err_row = {
+                    "preset": job.name,
+                    "list_url": job.url,
+                    "name": f"[ERROR] {str(e)[:120]}",
+                    "error": str(e),
+                    "stats": {"bell": 0, "maru": 0, "tel": 0, "bookable_slots": 0, "total_slots": 0, "excluded_slots": 0, "bell_rate_bookable": None},
+                }
+                save_job_outputs(run_dir, job, i, [err_row], [])
+                completed += 1
+                return
+            finally:
+                running.pop(i, None)
+            # 行は到着順にスコアリング済み。ここでは percentile 付与と書き込み依頼だけ
+            # （job_done はこのプリセットの history/state 書き込みが終わってから記録）
+            if cancel.is_set():
+                # 途中で止めたプリセット: 取れた分だけ出力し、job_done は付けない（--resume で残りを取る）
+                rows = finalizer.finish(run_dir, i, prev_rows)
+                rows_by_job[i] = rows
+                stop_reason = stop_reason or "stop_flag"
+                log_event("INFO", "job stopped (partial rows saved)", preset=job.name, got=len(rows))
+                return
+            rows = finalizer.finish(run_dir, i, prev_rows, after=lambda out: checkpoint.mark_job_done(i, job.name, len(out)))
+            rows_by_job[i] = rows
             completed += 1
-            continue
-        rows = finalize_rows(cur_rows, prev_rows, run_dir, job, i)
-        all_rows.extend(rows)
-        completed += 1
-        log_event("INFO", "job done", preset=job.name, got=len(rows))
-        try:
-            summary = _get_suspicious_dump_summary(_current_run_id(), job.name)
-            log_event(
-                "INFO",
-                "suspicious dump summary",
-                preset=job.name,
-                saved=summary.get("saved", 0),
-                suppressed=summary.get("suppressed", 0),
-            )
-        except Exception:
-            pass
+            log_event("INFO", "job done", preset=job.name, got=len(rows))
+            try:
+                summary = _get_suspicious_dump_summary(_current_run_id(), job.name)
+                log_event(
+                    "INFO",
+                    "suspicious dump summary",
+                    preset=job.name,
+                    saved=summary.get("saved", 0),
+                    suppressed=summary.get("suppressed", 0),
+                )
+            except Exception:
+                pass
 
-    save_run_outputs(run_dir, run_ts, all_rows, force_today=force_today, cfg=cfg)
+    try:
+        outcomes = await asyncio.gather(*[_run_one(i, job) for i, job in enumerate(jobs, start=1)], return_exceptions=True)
+        for out in outcomes:
+            if isinstance(out, BaseException):
+                raise out
+        for i in sorted(rows_by_job):
+            all_rows.extend(rows_by_job[i])
+    finally:
+        cancel.close()
+        await session.close()
+        log_event("INFO", "browser session closed", launches=session.launches, attaches=session.attaches, watchdog_recycles=session.watchdog_recycles, peak_rss_mb=round(session.peak_rss_mb, 1))
+        await asyncio.to_thread(writer.close)
+        if negative_cache is not None:
+            try:
+                negative_cache.save()
+                log_event("INFO", "negative cache saved", entries=len(negative_cache), skipped=negative_cache.skipped, rechecked=negative_cache.rechecked)
+            except Exception as e:
+                log_event("ERR", "negative cache save failed", err=str(e)[:200])
+        try:
+            scheduler.save()
+            if scheduler.deferred_now:
+                log_event("INFO", "time budget deferred gids", deferred=scheduler.deferred_now)
+        except Exception as e:
+            log_event("ERR", "deferred save failed", err=str(e)[:200])
+        if _ASSET_CACHE is not None:
+            try:
+                _ASSET_CACHE.save()
+                log_event(
+                    "INFO",
+                    "asset cache saved",
+                    entries=len(_ASSET_CACHE),
+                    hits=_ASSET_CACHE.hits,
+                    revalidated=_ASSET_CACHE.revalidated,
+                    stored=_ASSET_CACHE.stored,
+                    bytes_served=_ASSET_CACHE.bytes_served,
+                )
+            except Exception as e:
+                log_event("ERR", "asset cache save failed", err=str(e)[:200])
+        route_summary = _ROUTE_STATS.summary()
+        if route_summary:
+            log_event("INFO", "route profile summary", profiles=route_summary)
+        if breaker is not None and breaker.opened:
+            log_event("INFO", "circuit breaker summary", opened=breaker.opened, paused_s=round(breaker.paused_s, 1), hosts=breaker.stats())
+        if list_cache is not None:
+            try:
+                list_cache.save()
+                log_event("INFO", "list cache saved", hits=list_cache.hits, misses=list_cache.misses)
+            except Exception as e:
+                log_event("ERR", "list cache save failed", err=str(e)[:200])
+        if shard and int(shard[1]) > 1:
+            # シャードの間隔は N 倍に広げてあるので、学習結果として保存しない（次の通常 run が N 倍から始まるため）
+            log_event("INFO", "nav rate not saved (shard)", shard=f"{shard[0]}/{shard[1]}", hosts=getattr(nav_limiter, "stats", dict)())
+        elif hasattr(nav_limiter, "save"):
+            nav_limiter.save()
+            log_event("INFO", "nav rate saved", hosts=nav_limiter.stats())
 
     status = "stopped" if stop_reason == "stop_flag" else ("blocked" if stop_reason == "blocked_by_site" else "done")
+    if shard:
+        # 親（run_job_sharded）がこれを見て終了状態をまとめ、jobs/ から全行を集める
+        write_run_file(run_dir, f"shard{shard[0]}.json", {"status": status, "stop_reason": stop_reason or None, "completed": completed, "rows": len(all_rows)})
+    else:
+        save_run_outputs(run_dir, run_ts, all_rows, force_today=force_today, cfg=cfg)
+
     write_progress_state({
         "status": status,
         "trigger": trigger_context,
@@ -6178,16 +8266,470 @@ async def run_job(preset_names=None, jobs=None, headless=True, minimize_browser=
     return {"run_dir": run_dir, "run_ts": run_ts, "rows": all_rows, "jobs": jobs, "status": status}
 
 
-async def run_auto_once(preset_names=None, headless=True, minimize_browser=True, concurrency=3, do_notify=True, force_today=False, retention_months=None, retention_max_lines=None, retention_disabled=False, trigger_context="auto"):
+def _prepare_shard_worker(cfg: dict, shard_i: int, shard_n: int):
+    """
+    --shards の子プロセスの準備
+    - ナビゲーション間隔を shard_n 倍にして、サイトから見た合計の頻度を 1 プロセスの時と揃える
+    - pw_profile は同時に 1 つの Chromium しか開けないので、shard 1 以降はコピーを使う
+      （--queue-worker は 1 件ごとに呼ばれるので、コピーはプロセスで 1 回だけ。使用中のコピーは消さない）
+    - 常駐 Chromium には接続しない（全部の子が同じブラウザに集まってしまうため）
+    """
+    global PROFILE_DIR
+    auto = cfg.setdefault("auto", {})
+    auto["browser_daemon"] = False
+    for key, default in (("min_nav_interval_ms", 650), ("nav_interval_floor_ms", 250)):
+        auto[key] = int(auto.get(key, default) or default) * shard_n
+    dst = os.path.join(DATA_ROOT, "shard_profiles", f"shard{shard_i}")
+    if shard_i > 0 and PROFILE_DIR and os.path.isdir(PROFILE_DIR) and os.path.abspath(PROFILE_DIR) != os.path.abspath(dst):
+        try:
+            shutil.rmtree(dst, ignore_errors=True)
+            shutil.copytree(PROFILE_DIR, dst, ignore=shutil.ignore_patterns("Singleton*", "*.lock", "lockfile", "Cache", "Code Cache", "GPUCache"))
+            PROFILE_DIR = dst
+        except Exception as e:
+            # 元のプロファイルは shard 0 が使っているので、コピーできなければ一時コンテキストにする
+            log_event("WARN", "shard profile copy failed", shard=shard_i, err=str(e)[:200])
+            PROFILE_DIR = ""
+
+def _shard_job_indices(n_jobs: int, shard=None, job_indices=None) -> list:
+    """このプロセスが受け持つプリセットの番号（1 始まり、jobs/NN_ の番号と同じ）"""
+    if job_indices is not None:
+        wanted = {int(x) for x in job_indices}
+        return [i for i in range(1, n_jobs + 1) if i in wanted]
+    return [i for i in range(1, n_jobs + 1) if not shard or (i - 1) % int(shard[1]) == int(shard[0])]
+
+def _merge_shard_results(run_dir: str, n_jobs: int, results: list, exit_codes: list):
+    """
+    --shards の子の結果をまとめる。戻り値は (rows, status, stop_reason, failed)
+    - rows: jobs/ の全プリセットの行（エラー行は run_job と同じく all_current.json には入れない）
+    - status: どれかが stopped なら stopped、次に blocked、それ以外は done
+    - failed: 終了コードが 0 以外か shardK.json を書かずに終わった子の番号
+    """
+    all_rows = []
+    for i in range(1, n_jobs + 1):
+        rows = load_job_rows(run_dir, i) or []
+        all_rows.extend(r for r in rows if not str(r.get("name", "")).startswith("[ERROR]"))
+    failed = [k for k, (code, res) in enumerate(zip(exit_codes, results)) if code != 0 or not res]
+    statuses = {res.get("status") for res in results}
+    status = "stopped" if "stopped" in statuses else ("blocked" if "blocked" in statuses else "done")
+    stop_reason = next((res.get("stop_reason") for res in results if res.get("stop_reason")), None)
+    if failed:
+        stop_reason = stop_reason or "shard_failed"
+    return all_rows, status, stop_reason, failed
+
+def _read_shard_file(run_dir: str, name: str) -> dict:
+    try:
+        with open(os.path.join(run_dir, name), "r", encoding="utf-8") as r:
+            data = json.load(r)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+async def run_job_sharded(shards: int, preset_names=None, jobs=None, headless=True, minimize_browser=True, concurrency=3, trigger_context="auto", force_today=False, job_state_file=None, progress_file=None, stop_file=None, preset_parallel=None, time_budget_s=None):
+    """
+    --shards N: プリセットを N 個の子プロセス（main.py --shard-worker）に振り分けて並行実行する。
+    子はそれぞれ自分のブラウザで受け持ちのプリセットを取り、jobs/NN_* とチェックポイントを同じ run_dir に書く。
+    全員が終わったら親が jobs/ から行を集めて all_current.json / daily_snapshot.json 等を書く（run_job と同じ構成）。
+    """
     cfg = load_config()
-    result = await run_job(
-        preset_names=preset_names,
-        headless=headless,
-        minimize_browser=minimize_browser,
-        concurrency=concurrency,
-        trigger_context=trigger_context,
-        force_today=force_today,
-    )
+    preset_names = [x.strip() for x in (preset_names or []) if x.strip()]
+    if jobs is None:
+        jobs = build_jobs_from_presets(preset_names, presets_data=None)
+    shards = max(1, min(int(shards), len(jobs) or 1))
+    if preset_parallel is None:
+        preset_parallel = int(cfg.get("auto", {}).get("preset_parallel", 1) or 1)
+
+    ensure_data_dirs()
+    run_dir = make_run_dir()
+    set_current_run_dir(run_dir)
+    run_ts = os.path.basename(run_dir).replace("run_", "")
+    clear_stop_flag(stop_file)
+
+    job_payload = {
+        "created_at": _now_ts(),
+        "trigger": trigger_context,
+        "preset_names": preset_names,
+        "jobs": [{"name": j.name, "url": j.url, "max_items": j.max_items} for j in jobs],
+        "headless": headless,
+        "minimize_browser": minimize_browser,
+        "concurrency": concurrency,
+        "preset_parallel": preset_parallel,
+        "shards": shards,
+        "time_budget_s": time_budget_s,
+        "run_dir": run_dir,
+        "run_ts": run_ts,
+    }
+    write_job_state(job_payload, job_state_file)
+    write_run_file(run_dir, "job.json", job_payload)
+    settings_payload = {
+        "preset_names": preset_names,
+        "headless": headless,
+        "minimize_browser": minimize_browser,
+        "concurrency": concurrency,
+        "preset_parallel": preset_parallel,
+        "shards": shards,
+        "trigger": trigger_context,
+    }
+
+    def _write_progress(status: str, rows: int, stop_reason: str = None):
+        parts = [_read_shard_file(run_dir, f"progress.shard{k}.json") for k in range(shards)]
+        payload = {
+            "status": status,
+            "trigger": trigger_context,
+            "run_dir": run_dir,
+            "run_ts": run_ts,
+            "completed": sum(int(x.get("completed", 0) or 0) for x in parts),
+            "total": len(jobs),
+            "rows": rows if rows is not None else sum(int(x.get("rows", 0) or 0) for x in parts),
+            "current_job": None,
+            "running_jobs": [name for x in parts for name in (x.get("running_jobs") or [])],
+            "settings": settings_payload,
+        }
+        if status != "running":
+            payload["stop_reason"] = stop_reason
+        write_progress_state(payload, progress_file)
+
+    log_event("INFO", "sharded run start", run_dir=os.path.basename(run_dir), shards=shards, concurrency=concurrency, presets=preset_names, trigger=trigger_context)
+    _write_progress("running", 0)
+
+    main_py = os.path.join(BASE_DIR, "main.py")
+    procs = []
+    for k in range(shards):
+        cmd = [sys.executable, main_py, "--shard-worker", run_dir, "--shard", f"{k}/{shards}", "--headless" if headless else "--headful"]
+        if force_today:
+            cmd.append("--force-today")
+        procs.append(await asyncio.create_subprocess_exec(*cmd, cwd=BASE_DIR))
+    waits = [asyncio.create_task(p.wait()) for p in procs]
+    try:
+        while not all(w.done() for w in waits):
+            await asyncio.wait(waits, timeout=2.0)
+            _write_progress("running", None)
+    except BaseException:
+        for p in procs:
+            if p.returncode is None:
+                try:
+                    p.terminate()
+                except Exception:
+                    pass
+        raise
+
+    results = [_read_shard_file(run_dir, f"shard{k}.json") for k in range(shards)]
+    exit_codes = [w.result() for w in waits]
+    all_rows, status, stop_reason, failed = _merge_shard_results(run_dir, len(jobs), results, exit_codes)
+    save_run_outputs(run_dir, run_ts, all_rows, force_today=force_today, cfg=cfg)
+    if failed:
+        log_event("ERR", "shard failed", shards=failed, exit_codes=[exit_codes[k] for k in failed])
+    _write_progress(status, len(all_rows), stop_reason)
+
+    log_event("INFO", "sharded run done", rows=len(all_rows), run_dir=os.path.basename(run_dir), status=status, shards=shards)
+    return {"run_dir": run_dir, "run_ts": run_ts, "rows": all_rows, "jobs": jobs, "status": status}
+
+def _work_queue_path(path: str) -> str:
+    """--queue にはファイルでもフォルダ（共有フォルダ等）でも渡せる。フォルダなら中の work_queue.db を使う"""
+    path = os.path.abspath(path or os.path.join(DATA_ROOT, WORK_QUEUE_FILE_NAME))
+    if os.path.isdir(path):
+        path = os.path.join(path, WORK_QUEUE_FILE_NAME)
+    return path
+
+def _queue_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _queue_item_dir(run_id: str, key: str) -> str:
+    return os.path.join(DATA_ROOT, "queue_runs", _safe_name(f"{run_id}_{key}_{os.getpid()}"))
+
+async def run_queue_worker(queue_path: str, run_id=None, slot=None, headless=True, minimize_browser=True, idle_exit_s=None):
+    """
+    --queue-worker: 共有キュー（core/work_queue）からプリセットを 1 件ずつリースして取る。
+    - 1 件ごとにローカルの作業フォルダ（score_data/queue_runs/）で run_job を回し、行は結果としてキューへ返す
+      （run 全体の出力はコーディネーター run_job_queued が書く）
+    - 取得中は lease の 1/3 ごとにハートビート。リースを失ったら（期限切れで他へ回った / 取り消し）その件は止める
+    - run_id 指定（コーディネーターが起動したローカルワーカー）はその run が片付いたら終了、
+      なしなら idle_exit_s 秒仕事がなければ終了
+    slot=(k, n) は同じマシンで n 個動かす時の番号（--shards と同じくナビ間隔 n 倍 / k>0 はプロファイルのコピー）
+    """
+    cfg = load_config()
+    auto = cfg.get("auto", {}) or {}
+    lease_s = max(30.0, float(auto.get("queue_lease_s", 300) or 300))
+    if idle_exit_s is None:
+        idle_exit_s = float(auto.get("queue_idle_exit_s", 600) or 0)
+    slot = slot or (0, 1)
+    q = await asyncio.to_thread(open_work_queue, _work_queue_path(queue_path), max_attempts=int(auto.get("queue_max_attempts", 2) or 1))
+    worker_id = _queue_worker_id()
+    ensure_data_dirs()
+    log_event("INFO", "queue worker start", worker=worker_id, queue=q.path, run_id=run_id, slot=f"{slot[0]}/{slot[1]}")
+
+    done = 0
+    idle_since = time.monotonic()
+    while True:
+        if stop_requested():
+            log_event("INFO", "queue worker stop flag", worker=worker_id)
+            break
+        item = await asyncio.to_thread(q.lease, worker_id, lease_s, run_id=run_id)
+        if item is None:
+            if run_id is not None:
+                counts = await asyncio.to_thread(q.counts, run_id)
+                if not counts.get("pending") and not counts.get("leased"):
+                    break
+            elif idle_exit_s and time.monotonic() - idle_since > idle_exit_s:
+                break
+            await asyncio.sleep(5.0)
+            continue
+
+        payload = item["payload"] or {}
+        job = Job(name=payload.get("name", ""), url=payload.get("url", ""), max_items=int(payload.get("max_items", 0) or 0))
+        local_dir = _queue_item_dir(item["run_id"], item["key"])
+        os.makedirs(os.path.join(local_dir, "jobs"), exist_ok=True)
+        local_stop = os.path.join(local_dir, "stop.flag")
+        log_event("INFO", "queue item leased", worker=worker_id, run_id=item["run_id"], key=item["key"], preset=job.name, attempt=item["attempt"])
+
+        async def _heartbeat():
+            while True:
+                await asyncio.sleep(lease_s / 3.0)
+                if not await asyncio.to_thread(q.heartbeat, item["id"], worker_id, lease_s):
+                    # 取り消し or 期限切れで他のワーカーへ回った: この件は打ち切る
+                    log_event("WARN", "queue lease lost", worker=worker_id, key=item["key"], preset=job.name)
+                    try:
+                        with open(local_stop, "w", encoding="utf-8") as f:
+                            f.write("lease lost")
+                    except Exception:
+                        pass
+                    return
+
+        hb = asyncio.create_task(_heartbeat())
+        try:
+            res = await run_job(
+                jobs=[job],
+                headless=headless,
+                minimize_browser=minimize_browser,
+                concurrency=int(payload.get("concurrency", 3) or 3),
+                trigger_context=payload.get("trigger", "queue"),
+                force_today=bool(payload.get("force_today")),
+                stop_file=local_stop,
+                preset_parallel=1,
+                resume_dir=local_dir,
+                time_budget_s=payload.get("time_budget_s"),
+                shard=slot,
+                job_indices=[1],
+            )
+        except Exception as e:
+            log_event("ERR", "queue item failed", worker=worker_id, key=item["key"], preset=job.name, err=str(e)[:200])
+            await asyncio.to_thread(q.fail, item["id"], worker_id, str(e))
+            continue
+        finally:
+            hb.cancel()
+
+        prev_rows = []
+        try:
+            with open(os.path.join(local_dir, "jobs", f"01_{_safe_name(job.name)}_prev.json"), "r", encoding="utf-8") as r:
+                prev_rows = json.load(r) or []
+        except Exception:
+            pass
+        marker = _read_shard_file(local_dir, f"shard{slot[0]}.json")
+        ok = await asyncio.to_thread(q.complete, item["id"], worker_id, {
+            "rows": load_job_rows(local_dir, 1) or [],
+            "prev_rows": prev_rows,
+            "status": marker.get("status") or res.get("status"),
+            "stop_reason": marker.get("stop_reason"),
+            "worker": worker_id,
+            "host": socket.gethostname(),
+            "data_root": DATA_ROOT,
+        })
+        if ok:
+            done += 1
+        log_event("INFO", "queue item done", worker=worker_id, key=item["key"], preset=job.name, rows=len(res.get("rows") or []), accepted=ok)
+        idle_since = time.monotonic()
+
+    log_event("INFO", "queue worker done", worker=worker_id, items=done)
+    return done
+
+async def run_job_queued(queue_path: str, preset_names=None, jobs=None, headless=True, minimize_browser=True, concurrency=3, trigger_context="auto", force_today=False, job_state_file=None, progress_file=None, stop_file=None, time_budget_s=None, local_workers=0):
+    """
+    --queue: プリセットを共有キュー（SQLite ファイル）に積み、ワーカー（main.py --queue-worker、別マシン可）に取らせる。
+    - local_workers > 0 ならこのマシンでもワーカーを起動する
+    - 全件が done / failed になったら結果を集めて jobs/NN_* と all_current.json 等を書く（run_job と同じ構成）
+    - 停止フラグで未完了の件を取り消す（取得中のワーカーは次のハートビートで止まる）
+    history / state は取ったマシンの score_data に書かれるので、別の score_data から来た行はここでも書く。
+    """
+    cfg = load_config()
+    preset_names = [x.strip() for x in (preset_names or []) if x.strip()]
+    if jobs is None:
+        jobs = build_jobs_from_presets(preset_names, presets_data=None)
+    auto = cfg.get("auto", {}) or {}
+    q = await asyncio.to_thread(open_work_queue, _work_queue_path(queue_path), max_attempts=int(auto.get("queue_max_attempts", 2) or 1))
+    local_workers = max(0, min(int(local_workers or 0), len(jobs) or 1))
+
+    ensure_data_dirs()
+    run_dir = make_run_dir()
+    set_current_run_dir(run_dir)
+    run_ts = os.path.basename(run_dir).replace("run_", "")
+    run_id = f"{socket.gethostname()}:{run_ts}"
+    clear_stop_flag(stop_file)
+
+    job_payload = {
+        "created_at": _now_ts(),
+        "trigger": trigger_context,
+        "preset_names": preset_names,
+        "jobs": [{"name": j.name, "url": j.url, "max_items": j.max_items} for j in jobs],
+        "headless": headless,
+        "minimize_browser": minimize_browser,
+        "concurrency": concurrency,
+        "queue": q.path,
+        "queue_run_id": run_id,
+        "local_workers": local_workers,
+        "time_budget_s": time_budget_s,
+        "run_dir": run_dir,
+        "run_ts": run_ts,
+    }
+    write_job_state(job_payload, job_state_file)
+    write_run_file(run_dir, "job.json", job_payload)
+    settings_payload = {
+        "preset_names": preset_names,
+        "headless": headless,
+        "minimize_browser": minimize_browser,
+        "concurrency": concurrency,
+        "queue": q.path,
+        "local_workers": local_workers,
+        "trigger": trigger_context,
+    }
+
+    def _write_progress(status: str, counts: dict, rows: int = 0, stop_reason: str = None):
+        payload = {
+            "status": status,
+            "trigger": trigger_context,
+            "run_dir": run_dir,
+            "run_ts": run_ts,
+            "completed": int(counts.get("done", 0)) + int(counts.get("failed", 0)),
+            "total": len(jobs),
+            "rows": rows,
+            "current_job": None,
+            "queue": counts,
+            "settings": settings_payload,
+        }
+        if status != "running":
+            payload["stop_reason"] = stop_reason
+        write_progress_state(payload, progress_file)
+
+    await asyncio.to_thread(q.enqueue, run_id, [
+        (f"{i:02d}", {
+            "job_index": i,
+            "name": j.name,
+            "url": j.url,
+            "max_items": j.max_items,
+            "concurrency": concurrency,
+            "trigger": trigger_context,
+            "force_today": force_today,
+            "time_budget_s": time_budget_s,
+        })
+        for i, j in enumerate(jobs, start=1)
+    ])
+    log_event("INFO", "queued run start", run_dir=os.path.basename(run_dir), run_id=run_id, queue=q.path, jobs=len(jobs), local_workers=local_workers, trigger=trigger_context)
+    _write_progress("running", await asyncio.to_thread(q.counts, run_id))
+
+    main_py = os.path.join(BASE_DIR, "main.py")
+    procs = []
+    for k in range(local_workers):
+        cmd = [sys.executable, main_py, "--queue-worker", q.path, "--queue-run", run_id, "--shard", f"{k}/{local_workers}", "--headless" if headless else "--headful"]
+        procs.append(await asyncio.create_subprocess_exec(*cmd, cwd=BASE_DIR))
+
+    stop_reason = None
+    try:
+        while True:
+            counts = await asyncio.to_thread(q.counts, run_id)
+            if not counts.get("pending") and not counts.get("leased"):
+                break
+            if stop_reason is None and stop_requested(stop_file):
+                stop_reason = "stop_flag"
+                cancelled = await asyncio.to_thread(q.cancel, run_id)
+                log_event("INFO", "stop flag detected (queue cancelled)", run_id=run_id, cancelled=cancelled)
+                continue
+            _write_progress("running", counts)
+            await asyncio.sleep(2.0)
+        for p in procs:
+            await p.wait()
+    except BaseException:
+        for p in procs:
+            if p.returncode is None:
+                try:
+                    p.terminate()
+                except Exception:
+                    pass
+        raise
+
+    # 結果をまとめる（エラー行は all_current.json には入れない）
+    here = (socket.gethostname(), os.path.abspath(DATA_ROOT))
+    all_rows = []
+    failed = []
+    statuses = set()
+    for res in await asyncio.to_thread(q.results, run_id):
+        payload = res["payload"] or {}
+        i = int(payload.get("job_index", 0) or 0)
+        job = Job(name=payload.get("name", ""), url=payload.get("url", ""), max_items=int(payload.get("max_items", 0) or 0))
+        out = res.get("result") or {}
+        if res["state"] == "done":
+            rows = out.get("rows") or []
+            statuses.add(out.get("status"))
+            if (out.get("host"), os.path.abspath(str(out.get("data_root") or ""))) != here:
+                for r in rows:
+                    if not str(r.get("name", "")).startswith("[ERROR]") and not r.get("calendar_unchanged"):
+                        _persist_scored_row(r, job.name)
+        elif res["state"] == "failed":
+            failed.append(job.name)
+            rows = [{
+                "preset": job.name,
+                "list_url": job.url,
+                "name": f"[ERROR] queue: {str(res.get('error') or '')[:120]}",
+                "error": res.get("error") or "queue_failed",
+                "stats": {"bell": 0, "maru": 0, "tel": 0, "bookable_slots": 0, "total_slots": 0, "excluded_slots": 0, "bell_rate_bookable": None},
+            }]
+        else:
+            continue
+        save_job_outputs(run_dir, job, i, rows, out.get("prev_rows") or [])
+        all_rows.extend(r for r in rows if not str(r.get("name", "")).startswith("[ERROR]"))
+    save_run_outputs(run_dir, run_ts, all_rows, force_today=force_today, cfg=cfg)
+
+    status = "stopped" if stop_reason == "stop_flag" else ("blocked" if "blocked" in statuses else "done")
+    if failed:
+        log_event("ERR", "queue items failed", run_id=run_id, presets=failed)
+    _write_progress(status, await asyncio.to_thread(q.counts, run_id), len(all_rows), stop_reason)
+
+    log_event("INFO", "queued run done", rows=len(all_rows), run_dir=os.path.basename(run_dir), status=status, failed=len(failed))
+    return {"run_dir": run_dir, "run_ts": run_ts, "rows": all_rows, "jobs": jobs, "status": status}
+
+async def run_auto_once(preset_names=None, headless=True, minimize_browser=True, concurrency=3, do_notify=True, force_today=False, retention_months=None, retention_max_lines=None, retention_disabled=False, trigger_context="auto", resume_dir=None, time_budget_s=None, shards=1, queue=None, local_workers=0):
+    cfg = load_config()
+    if queue and not resume_dir:
+        result = await run_job_queued(
+            queue,
+            preset_names=preset_names,
+            headless=headless,
+            minimize_browser=minimize_browser,
+            concurrency=concurrency,
+            trigger_context=trigger_context,
+            force_today=force_today,
+            time_budget_s=time_budget_s,
+            local_workers=local_workers,
+        )
+    elif shards and int(shards) > 1 and not resume_dir:
+        result = await run_job_sharded(
+            shards,
+            preset_names=preset_names,
+            headless=headless,
+            minimize_browser=minimize_browser,
+            concurrency=concurrency,
+            trigger_context=trigger_context,
+            force_today=force_today,
+            time_budget_s=time_budget_s,
+        )
+    else:
+        result = await run_job(
+            preset_names=preset_names,
+            headless=headless,
+            minimize_browser=minimize_browser,
+            concurrency=concurrency,
+            trigger_context=trigger_context,
+            force_today=force_today,
+            resume_dir=resume_dir,
+            time_budget_s=time_budget_s,
+        )
 
     run_dir = result["run_dir"]
     all_rows = result["rows"]
@@ -6372,6 +8914,8 @@ if __name__ == "__main__":
     parser.add_argument("--debug-score", action="store_true", help="print score/bd debug samples")
     parser.add_argument("--debug-bd", action="store_true", help="print BD unique-date debug samples")
     parser.add_argument("--debug-rank", action="store_true", help="print rank (quality/momentum) debug samples")
+    parser.add_argument("--parse-html", nargs="+", default=None, help="count calendar slots from saved frame HTML files (offline)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for --parse-html")
     args = parser.parse_args()
     if args.debug_score:
         _debug_score_print()
@@ -6379,3 +8923,9 @@ if __name__ == "__main__":
         _debug_bd_print()
     if args.debug_rank:
         _debug_rank_print()
+    if args.parse_html:
+        for item in parse_calendar_files(args.parse_html, workers=args.workers):
+            st = item["stats"]
+            st.pop("symbols", None)
+            sanity_ok, sanity_reason = _calendar_sanity(st)
+            print(json.dumps({"path": item["path"], "sanity": sanity_reason, "stats": st}, ensure_ascii=False))
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from core.asset_cache import AssetCache, is_cacheable_response, is_versioned_url
+
+URL = "https://www.example.com/js/app.js"
+
+
+class AssetCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "asset_cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_versioned_and_cacheable(self):
+        self.assertTrue(is_versioned_url("https://x/js/app.js?v=20240101"))
+        self.assertTrue(is_versioned_url("https://x/js/app.3f9a0c1d2e.js"))
+        self.assertFalse(is_versioned_url("https://x/js/app.js"))
+        self.assertFalse(is_versioned_url("https://x/js/app.js?_=1700000000"))
+        self.assertTrue(is_cacheable_response(200, {"cache-control": "max-age=60"}))
+        self.assertFalse(is_cacheable_response(200, {"cache-control": "no-store"}))
+        self.assertFalse(is_cacheable_response(404, {}))
+
+    def test_fresh_stale_and_validators(self):
+        cache = AssetCache(self.root, ttl_s=60)
+        cache.put(URL, b"js", {"Content-Type": "text/javascript", "ETag": '"a"', "Set-Cookie": "x"}, now=100.0)
+        hit = cache.lookup(URL, now=150.0)
+        self.assertEqual(hit["body"], b"js")
+        self.assertTrue(hit["fresh"])
+        self.assertEqual(hit["headers"], {"content-type": "text/javascript", "etag": '"a"'})
+        stale = cache.lookup(URL, now=200.0)
+        self.assertFalse(stale["fresh"])
+        self.assertEqual(AssetCache.validators(stale), {"if-none-match": '"a"'})
+        cache.served(URL, stale["body"], revalidated=True, now=200.0)
+        self.assertTrue(cache.lookup(URL, now=250.0)["fresh"])
+        self.assertEqual((cache.hits, cache.revalidated, cache.bytes_served), (1, 1, 2))
+        cache.put(URL + "?v=1", b"js", {}, now=0.0)
+        self.assertTrue(cache.lookup(URL + "?v=1", now=10 ** 9)["fresh"])
+
+    def test_content_addressed_lru_and_persist(self):
+        cache = AssetCache(self.root, max_bytes=10)
+        cache.put("a", b"12345", {}, now=1.0)
+        cache.put("a2", b"12345", {}, now=2.0)
+        self.assertEqual(cache.total_bytes(), 5)
+        cache.put("b", b"abcde", {}, now=3.0)
+        cache.served("a", b"12345", now=4.0)
+        cache.put("c", b"ABCDE", {}, now=5.0)
+        self.assertIsNone(cache.lookup("b"))
+        self.assertIsNotNone(cache.lookup("a"))
+        self.assertLessEqual(cache.total_bytes(), 10)
+        objects = [n for _, _, files in os.walk(os.path.join(self.root, "objects")) for n in files]
+        self.assertEqual(len(objects), 2)
+        self.assertTrue(cache.save())
+        again = AssetCache(self.root, max_bytes=10)
+        self.assertEqual(again.lookup("c")["body"], b"ABCDE")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+import scrape_core
+from core.browser_daemon import cdp_version, clear_daemon_state, pid_alive, read_daemon_state, write_daemon_state
+
+
+class _VersionHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({"Browser": "Chrome/123", "webSocketDebuggerUrl": "ws://127.0.0.1/devtools/browser/x"}).encode()
+        self.send_response(200 if self.path == "/json/version" else 404)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DaemonStateTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state", "browser_daemon.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_state_of_dead_process_is_ignored(self):
+        proc = subprocess.Popen([sys.executable, "-c", "pass"])
+        proc.wait()
+        self.assertTrue(pid_alive(os.getpid()))
+        self.assertFalse(pid_alive(proc.pid))
+        write_daemon_state(self.path, {"pid": proc.pid, "endpoint": "http://127.0.0.1:9333"})
+        self.assertIsNone(read_daemon_state(self.path))
+        write_daemon_state(self.path, {"pid": os.getpid(), "endpoint": "http://127.0.0.1:9333"})
+        self.assertEqual(read_daemon_state(self.path)["pid"], os.getpid())
+
+    def test_clear_only_removes_own_state(self):
+        write_daemon_state(self.path, {"pid": os.getpid(), "endpoint": "http://127.0.0.1:9333"})
+        clear_daemon_state(self.path, pid=os.getpid() + 1)
+        self.assertTrue(os.path.exists(self.path))
+        clear_daemon_state(self.path, pid=os.getpid())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_cdp_version_probe(self):
+        server = HTTPServer(("127.0.0.1", 0), _VersionHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+            self.assertEqual(cdp_version(endpoint)["Browser"], "Chrome/123")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIsNone(cdp_version(endpoint, timeout_s=0.5))
+
+
+class _FakePage:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeContext:
+    def __init__(self, pages):
+        self.pages = pages
+        self.closed = False
+        self.unrouted = False
+
+    async def unroute(self, url):
+        self.unrouted = True
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeApw:
+    def __init__(self):
+        self.stopped = False
+
+    async def stop(self):
+        self.stopped = True
+
+
+class AttachedCloseTests(unittest.TestCase):
+    def test_detach_closes_only_own_pages(self):
+        warm, own, other = _FakePage(), _FakePage(), _FakePage()
+        ctx = _FakeContext([warm])
+        scrape_core._CDP_ATTACHED.add(ctx)
+        # other: 同じデーモンに繋いでいる別のシャード/ワーカーが開いたページ
+        ctx.pages += [own, other]
+        apw = _FakeApw()
+        asyncio.run(scrape_core._close_async_context(apw, None, ctx, own_pages=[own]))
+        self.assertEqual((warm.closed, own.closed, other.closed), (False, True, False))
+        self.assertTrue(ctx.unrouted)
+        self.assertFalse(ctx.closed)
+        self.assertTrue(apw.stopped)
+        self.assertNotIn(ctx, scrape_core._CDP_ATTACHED)
+
+    def test_launched_context_is_closed(self):
+        ctx = _FakeContext([])
+        asyncio.run(scrape_core._close_async_context(_FakeApw(), None, ctx))
+        self.assertTrue(ctx.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
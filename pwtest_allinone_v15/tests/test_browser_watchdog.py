@@ -0,0 +1,211 @@
+import asyncio
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+import scrape_core
+from core.proc_mem import process_tree_rss
+
+
+def _fake_proc(root, pid, ppid, rss_pages, comm="chrome"):
+    d = os.path.join(root, str(pid))
+    os.makedirs(d)
+    with open(os.path.join(d, "stat"), "w") as f:
+        f.write(f"{pid} ({comm}) S {ppid} 1 1 0\n")
+    with open(os.path.join(d, "statm"), "w") as f:
+        f.write(f"100 {rss_pages} 10 1 0 50 0\n")
+
+
+class ProcessTreeRssTests(unittest.TestCase):
+    def test_sums_descendants_only(self):
+        with tempfile.TemporaryDirectory() as root:
+            _fake_proc(root, 10, 1, 999)        # python (root)
+            _fake_proc(root, 11, 10, 5, "node")  # driver
+            _fake_proc(root, 12, 11, 7, "chrome (gpu) x")
+            _fake_proc(root, 13, 12, 3)
+            _fake_proc(root, 20, 1, 500)        # unrelated
+            os.makedirs(os.path.join(root, "self"))
+            self.assertEqual(process_tree_rss(10, proc_root=root, page_size=1), 15)
+            self.assertEqual(process_tree_rss(13, proc_root=root, page_size=1), 0)
+        self.assertIsNone(process_tree_rss(1, proc_root=os.path.join(tempfile.gettempdir(), "no-such-proc")))
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def set_default_navigation_timeout(self, ms):
+        pass
+
+    async def goto(self, url, timeout=None):
+        return None
+
+    def remove_listener(self, event, fn):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.request = object()
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+class _FakeContextTestCase(unittest.TestCase):
+    def setUp(self):
+        self._orig = (scrape_core._make_async_context, scrape_core._close_async_context)
+        self.contexts = []
+
+        async def make(headless, minimize_browser=False, attach_daemon=False):
+            ctx = FakeContext()
+            self.contexts.append(ctx)
+            return None, None, ctx
+
+        async def close(apw, browser, context, own_pages=None):
+            return None
+
+        scrape_core._make_async_context = make
+        scrape_core._close_async_context = close
+
+    def tearDown(self):
+        scrape_core._make_async_context, scrape_core._close_async_context = self._orig
+
+
+class BrowserSessionTests(_FakeContextTestCase):
+    def test_presets_share_one_context(self):
+        async def scenario():
+            session = scrape_core.AsyncBrowserSession(headless=True)
+            a = await session.acquire()
+            b = await session.acquire()
+            session.release()
+            session.release()
+            c = await session.acquire()
+            session.release()
+            await session.close()
+            return a, b, c, session.launches
+
+        a, b, c, launches = asyncio.run(scenario())
+        self.assertIs(a, b)
+        self.assertIs(b, c)
+        self.assertEqual(launches, 1)
+
+    def test_recycle_waits_until_borrowers_reach_zero(self):
+        async def scenario():
+            session = scrape_core.AsyncBrowserSession(headless=True, recycle_pages=1)
+            first = await session.acquire()
+            page, _ = await session.acquire_page()
+            await session.release_page(page)
+            # 他のプリセットが借りている間は recycle_pages を超えても作り直さない
+            second = await session.acquire()
+            self.assertIs(second, first)
+            session.release()
+            session.release()
+            third = await session.acquire()
+            session.release()
+            await session.close()
+            return first, third, session.launches
+
+        first, third, launches = asyncio.run(scenario())
+        self.assertIsNot(third, first)
+        self.assertEqual(launches, 2)
+
+
+class BrowserWatchdogTests(_FakeContextTestCase):
+
+    def test_recycle_waits_for_inflight_pages(self):
+        async def scenario():
+            session = scrape_core.AsyncBrowserSession(headless=True, pool_size=2, page_limit=1)
+            await session.acquire()
+            page, _ = await session.acquire_page()
+            self.assertEqual(session._pressure(), "")
+            await session.acquire_page()
+            self.assertEqual(session._pressure(), "pages(2)")
+            recycle = asyncio.create_task(session._recycle_live("pages(2)"))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(session.acquire_page())
+            await asyncio.sleep(0.01)
+            # 貸し出し中のページが戻るまでは作り直さず、新しい貸し出しも待たせる
+            self.assertFalse(recycle.done())
+            self.assertFalse(waiter.done())
+            await session.release_page(page)
+            await session.release_page(session._context.pages[1])
+            await recycle
+            new_page, hit = await waiter
+            self.assertEqual(len(self.contexts), 2)
+            self.assertIn(new_page, self.contexts[1].pages)
+            self.assertEqual((session.watchdog_recycles, session.launches), (1, 2))
+            await session.release_page(new_page)
+            session.release()
+            await session.close()
+
+        asyncio.run(scenario())
+
+
+    def test_attached_session_skips_rss_and_counts_own_pages(self):
+        async def scenario():
+            session = scrape_core.AsyncBrowserSession(headless=True, pool_size=2, rss_limit_mb=0.001, page_limit=1)
+            ctx = await session.acquire()
+            scrape_core._CDP_ATTACHED.add(ctx)
+            ctx.pages.append(FakePage())  # 同じデーモンの別ワーカーのページ
+            page, _ = await session.acquire_page()
+            # 再接続してもデーモンのメモリは減らないので RSS では作り直さない
+            self.assertEqual(session._pressure(), "")
+            await session.acquire_page()
+            self.assertEqual(session._pressure(), "pages(2)")
+            self.assertEqual(len(session.pool.opened()), 2)
+            scrape_core._CDP_ATTACHED.discard(ctx)
+            self.assertEqual(session._pressure(), "pages(3)")
+            session.release()
+            await session.close()
+
+        asyncio.run(scenario())
+
+    def test_recycle_waits_for_http_requests(self):
+        async def scenario():
+            session = scrape_core.AsyncBrowserSession(headless=True, pool_size=1, page_limit=1)
+            await session.acquire()
+            req = await session.acquire_request()
+            self.assertIs(req, self.contexts[0].request)
+            recycle = asyncio.create_task(session._recycle_live("pages(2)"))
+            await asyncio.sleep(0.01)
+            # HTTP 取得中は request コンテキストを捨てない
+            self.assertFalse(recycle.done())
+            session.release_request()
+            await recycle
+            self.assertIs(await session.acquire_request(), self.contexts[1].request)
+            session.release_request()
+            session.release()
+            await session.close()
+
+        asyncio.run(scenario())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+from scrape_core import _copy_calendar_row, _dedup_scrape
+
+KEY = "https://www.example.com/shop::1"
+
+
+def _row(preset="A"):
+    return {"gid": "1", "preset": preset, "stats": {"ok": True, "stats_by_date": {"10/1": {"booked": 3}}}}
+
+
+class DedupScrapeTests(unittest.TestCase):
+    def _run(self, *scrapes, is_negative=None):
+        calls = []
+
+        def make(n, fn):
+            async def scrape():
+                calls.append(n)
+                await asyncio.sleep(0.01)
+                return fn()
+            return scrape
+
+        async def scenario():
+            cache = {}
+            tasks = [
+                asyncio.create_task(_dedup_scrape(cache, KEY, make(n, fn), is_negative=is_negative))
+                for n, fn in enumerate(scrapes)
+            ]
+            return await asyncio.gather(*tasks)
+
+        return asyncio.run(scenario()), calls
+
+    def test_waiters_share_successful_row(self):
+        results, calls = self._run(_row, _row, _row)
+        self.assertEqual(calls, [0])
+        self.assertEqual(results[0][1], False)
+        self.assertTrue(all(shared for _, shared in results[1:]))
+        self.assertEqual(results[1][0]["stats"], _row()["stats"])
+
+    def test_waiter_scrapes_itself_when_owner_returns_none(self):
+        results, calls = self._run(lambda: None, lambda: _row("B"), lambda: _row("C"))
+        # 取得元の None（goto 失敗・リトライ送り等）は共有せず、次の1件が取り直す
+        self.assertEqual(calls, [0, 1])
+        self.assertEqual(results[0], (None, False))
+        self.assertEqual(results[1][0]["preset"], "B")
+        self.assertEqual(results[2][0]["preset"], "B")
+        self.assertTrue(results[2][1])
+
+    def test_definitive_negative_is_shared(self):
+        results, calls = self._run(lambda: None, _row, is_negative=lambda: True)
+        self.assertEqual(calls, [0])
+        self.assertEqual(results[1], (None, True))
+
+
+class CopyCalendarRowTests(unittest.TestCase):
+    def test_nested_stats_are_copied(self):
+        src = _row()
+        out = _copy_calendar_row(src, preset="B")
+        out["stats"]["stats_by_date"]["10/1"]["booked"] = 99
+        self.assertEqual(src["stats"]["stats_by_date"]["10/1"]["booked"], 3)
+        self.assertEqual(out["preset"], "B")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import asyncio
+import sys
+import threading
+import types
+import unittest
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+from scrape_core import _calendar_stats_from_captured, _capture_doc_body, _clear_captured_docs, _count_calendar_stats_http
+
+
+def _calendar_html(marks=("×", "○", "TEL", "―", "×", "○", "×")):
+    head = "<tr><th>時間</th>" + "".join(f"<th>1/{10 + i}(水)</th>" for i in range(7)) + "</tr>"
+    rows = []
+    for h in range(34):
+        cells = "".join(f"<td>{m}</td>" for m in marks)
+        rows.append(f"<tr><td>{10 + h // 2}:{'30' if h % 2 else '00'}</td>{cells}</tr>")
+    return f"<html><body><p>2024年1月</p><table>{head}{''.join(rows)}</table></body></html>"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    pages = {}
+
+    def do_GET(self):
+        body = self.pages.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Resp:
+    def __init__(self, status, url, text):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.url = url
+        self._text = text
+
+    async def text(self):
+        return self._text
+
+
+class _UrllibRequest:
+    """Stand-in for Playwright's APIRequestContext.get()."""
+
+    async def get(self, url, headers=None, timeout=None):
+        def _fetch():
+            req = urllib.request.Request(url, headers=headers or {})
+            try:
+                with urllib.request.urlopen(req, timeout=5) as r:
+                    return _Resp(r.status, r.geturl(), r.read().decode("utf-8"))
+            except urllib.error.HTTPError as e:
+                return _Resp(e.code, url, "")
+
+        return await asyncio.to_thread(_fetch)
+
+
+class _Limiter:
+    def __init__(self):
+        self.turns = []
+        self.reports = []
+
+    async def wait_turn(self, url=None):
+        self.turns.append(url)
+
+    def report(self, url=None, ok=True, latency_s=None, blocked=False):
+        self.reports.append((url, ok))
+
+
+class CalendarHttpTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        _StubHandler.pages = {
+            "/shop/A6ShopReservation/?girl_id=1": '<html><body><iframe name="pcreserveiframe" src="/calendar/1"></iframe></body></html>',
+            "/calendar/1": _calendar_html(),
+            "/shop/A6ShopReservation/?girl_id=2": "<html><body>no calendar</body></html>",
+            "/shop/A6ShopReservation/?girl_id=3": '<html><body><iframe name="pcreserveiframe" src="/calendar/3"></iframe></body></html>',
+            "/calendar/3": "<html><body><table><tr><td>10:00</td><td>×</td></tr></table></body></html>",
+            "/shop/A6ShopReservation/?girl_id=4": '<html><body><div class="error-msg">該当の女の子は予約できません</div></body></html>',
+            "/shop/A6ShopReservation/?girl_id=5": '<html><body><iframe name="pcreserveiframe" src="/calendar/5"></iframe></body></html>',
+            "/calendar/5": '<html><body><div class="error-msg">只今予約できません</div></body></html>',
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _run(self, gid, nav_limiter=None):
+        return asyncio.run(_count_calendar_stats_http(_UrllibRequest(), f"{self.base}/shop/A6ShopReservation/?girl_id={gid}", nav_limiter=nav_limiter))
+
+    def test_fetches_and_counts_calendar(self):
+        stats, frame_url = self._run(1)
+        self.assertTrue(stats["ok"])
+        self.assertEqual(stats["engine"], "http")
+        self.assertEqual(frame_url, f"{self.base}/calendar/1")
+        self.assertEqual(stats["total_slots"], 238)
+        self.assertEqual(stats["bell"], 34 * 3)
+        self.assertEqual(stats["maru"], 34 * 2)
+        self.assertEqual(stats["tel"], 34)
+        self.assertEqual(stats["dash"], 34)
+        self.assertEqual(stats["header_dates"], 7)
+        self.assertEqual(stats["stats_by_date"]["2024-01-10"], {"bell": 34, "maru": 0, "tel": 0, "other": 0})
+
+    def test_missing_iframe_falls_back(self):
+        self.assertEqual(self._run(2), (None, None))
+
+    def test_sanity_failure_falls_back(self):
+        self.assertEqual(self._run(3), (None, None))
+
+    def test_not_reservable_is_detected_without_browser(self):
+        stats, frame_url = self._run(4)
+        self.assertEqual(stats["reason"], "not_reservable(page:予約できません/該当の女の子)")
+        self.assertFalse(stats["ok"])
+        self.assertIsNone(frame_url)
+        stats, frame_url = self._run(5)
+        self.assertEqual(stats["reason"], "not_reservable(frame[pcreserveiframe]:予約できません)")
+        self.assertEqual(frame_url, f"{self.base}/calendar/5")
+
+    def test_waits_for_a_turn_before_each_get(self):
+        limiter = _Limiter()
+        stats, _ = self._run(1, nav_limiter=limiter)
+        self.assertTrue(stats["ok"])
+        self.assertEqual(limiter.turns, [f"{self.base}/shop/A6ShopReservation/?girl_id=1", f"{self.base}/calendar/1"])
+        self.assertEqual([(url, ok) for url, ok in limiter.reports], [(u, True) for u in limiter.turns])
+
+
+class _Page:
+    url = "https://www.example.com/shop/A6ShopReservation/?girl_id=1"
+
+
+class CapturedCalendarTests(unittest.TestCase):
+    def test_counts_from_captured_frame_body(self):
+        page = _Page()
+        frame_url = "https://yoyaku.cityheaven.net/calendar/1"
+        self.assertIsNone(_calendar_stats_from_captured(page, frame_url))
+        _capture_doc_body(page, frame_url, _calendar_html().encode("utf-8"))
+        stats = _calendar_stats_from_captured(page, frame_url + "#top")
+        self.assertEqual(stats["engine"], "captured")
+        self.assertEqual(stats["bell"], 34 * 3)
+        _clear_captured_docs(page)
+        self.assertIsNone(_calendar_stats_from_captured(page, frame_url))
+
+    def test_captured_error_page_is_not_reservable(self):
+        page = _Page()
+        frame_url = "https://yoyaku.cityheaven.net/calendar/2"
+        _capture_doc_body(page, frame_url, '<div class="error-msg">受付終了</div>'.encode("utf-8"))
+        stats = _calendar_stats_from_captured(page, frame_url)
+        self.assertEqual(stats["reason"], "not_reservable(error_msg_in_frame)")
+
+
+if __name__ == "__main__":
+    unittest.main()
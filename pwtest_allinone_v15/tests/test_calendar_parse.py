@@ -0,0 +1,84 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from core.calendar_parse import (
+    diff_calendar_stats,
+    find_calendar_iframe_src,
+    find_error_message,
+    has_calendar_table,
+    parse_calendar_files,
+    parse_calendar_html,
+)
+
+TODAY = datetime.date(2024, 12, 20)
+
+SPAN_HTML = """
+<html><body><div>2024年12月</div>
+<table>
+  <tr><th>時間</th><th>12/31(火)</th><th colspan="2">1/1(水)</th></tr>
+  <tr><td>10:00</td><td rowspan="2">×</td><td>○</td><td class="tel">TEL</td></tr>
+  <tr><td>10:30</td><td colspan="2">―</td></tr>
+  <tr><td>11:00</td><td>○</td><td data-name_message="お電話にてお問い合わせください"></td><td><img src="/img/bell.png"></td></tr>
+</table></body></html>
+"""
+
+
+class CalendarParseTests(unittest.TestCase):
+    def test_rowspan_colspan_and_dates(self):
+        st = parse_calendar_html(SPAN_HTML, today=TODAY)
+        self.assertTrue(st["ok"])
+        self.assertEqual(st["time_rows"], 3)
+        self.assertEqual(st["max_cols"], 3)
+        self.assertEqual(st["td_count"], 7)
+        self.assertEqual(st["bell"], 3)
+        self.assertEqual(st["maru"], 2)
+        self.assertEqual(st["tel"], 1)
+        self.assertEqual(st["dash"], 2)
+        self.assertEqual(st["excluded_slots"], 1)
+        self.assertEqual(st["total_slots"], 8)
+        self.assertEqual(st["slots_unique"], 8)
+        self.assertEqual(st["header_dates"], 2)
+        self.assertEqual(st["symbols"]["―"], 2)
+        self.assertEqual(st["stats_by_date"]["2024-12-31"], {"bell": 2, "maru": 1, "tel": 0, "other": 0})
+        self.assertEqual(st["stats_by_date"]["2025-01-01"], {"bell": 1, "maru": 1, "tel": 1, "other": 3})
+
+    def test_unclosed_cells(self):
+        html = "<table><tr><td>10:00<td>×<td>○<tr><td>10:30<td>○<td>○</table>"
+        st = parse_calendar_html(html, today=TODAY)
+        self.assertEqual((st["time_rows"], st["max_cols"], st["bell"], st["maru"]), (2, 2, 1, 3))
+
+    def test_no_time_rows(self):
+        st = parse_calendar_html("<table><tr><td>a</td><td>b</td></tr></table>", today=TODAY)
+        self.assertEqual(st, {"ok": False, "reason": "no time rows"})
+        self.assertFalse(has_calendar_table("<p>none</p>"))
+
+    def test_iframe_and_error_helpers(self):
+        html = '<iframe src="//x/ad"></iframe><iframe id="pcreserveiframe" src="/calendar/9"></iframe>'
+        self.assertEqual(find_calendar_iframe_src(html, "https://www.example.com/shop/"), "https://www.example.com/calendar/9")
+        self.assertEqual(find_error_message('<div class="box error-msg"> 予約できません </div>'), "予約できません")
+
+    def test_diff_reports_mismatches(self):
+        st = parse_calendar_html(SPAN_HTML, today=TODAY)
+        self.assertEqual(diff_calendar_stats(st, dict(st)), [])
+        other = dict(st, bell=0, stats_by_date={})
+        diffs = diff_calendar_stats(st, other)
+        self.assertIn("bell:3!=0", diffs)
+        self.assertIn("stats_by_date[2024-12-31]", diffs)
+
+    def test_parse_files_in_worker_processes(self):
+        with tempfile.TemporaryDirectory() as d:
+            paths = []
+            for i in range(2):
+                p = os.path.join(d, f"frame_{i}.html")
+                with open(p, "w", encoding="utf-8") as f:
+                    f.write(SPAN_HTML)
+                paths.append(p)
+            out = parse_calendar_files(paths, workers=2, today=TODAY)
+        self.assertEqual([x["path"] for x in out], paths)
+        self.assertTrue(all(x["stats"]["bell"] == 3 for x in out))
+
+
+if __name__ == "__main__":
+    unittest.main()
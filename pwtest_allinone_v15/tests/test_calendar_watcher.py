@@ -0,0 +1,87 @@
+import asyncio
+import sys
+import time
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+from scrape_core import _CalendarFrameWatcher
+
+
+class _Frame:
+    pass
+
+
+class _Response:
+    def __init__(self, url):
+        self.url = url
+
+
+class _Page:
+    def __init__(self):
+        self.main_frame = _Frame()
+        self.handlers = {}
+
+    def on(self, event, fn):
+        self.handlers.setdefault(event, []).append(fn)
+
+    def remove_listener(self, event, fn):
+        self.handlers[event].remove(fn)
+
+    def emit(self, event, arg):
+        for fn in list(self.handlers.get(event, [])):
+            fn(arg)
+
+
+class CalendarFrameWatcherTests(unittest.TestCase):
+    def _run(self, fire):
+        async def scenario():
+            page = _Page()
+            watcher = _CalendarFrameWatcher(page)
+            fire(asyncio.get_running_loop(), page)
+            t0 = time.monotonic()
+            waited = await watcher.wait(300)
+            elapsed_ms = (time.monotonic() - t0) * 1000
+            watcher.close()
+            return waited, elapsed_ms, page.handlers
+
+        return asyncio.run(scenario())
+
+    def test_event_ends_wait_and_charges_real_time(self):
+        waited, elapsed_ms, handlers = self._run(lambda loop, page: page.emit("frameattached", _Frame()))
+        # イベント済みなら待たない。最低値を上乗せせず実時間だけ数える
+        self.assertLess(waited, 20)
+        self.assertLessEqual(waited, elapsed_ms + 1)
+        self.assertTrue(all(not fns for fns in handlers.values()))
+
+    def test_calendar_response_wakes_early(self):
+        def fire(loop, page):
+            loop.call_later(0.05, page.emit, "response", _Response("https://www.example.com/other.js"))
+            loop.call_later(0.1, page.emit, "response", _Response("https://yoyaku.cityheaven.net/calendar/1"))
+
+        waited, elapsed_ms, _ = self._run(fire)
+        self.assertGreaterEqual(waited, 90)
+        self.assertLess(waited, 250)
+
+    def test_main_frame_and_timeout(self):
+        waited, _, _ = self._run(lambda loop, page: page.emit("framenavigated", page.main_frame))
+        self.assertGreaterEqual(waited, 290)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+import scrape_core
+from core.cancel import CancelToken
+
+
+class CancelTokenTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state", "stop.flag")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fires_on_stop_file(self, backend):
+        async def scenario():
+            token = CancelToken(self.path, poll_s=0.05, backend=backend).start()
+            evt = asyncio.Event()
+            token.subscribe(evt)
+            try:
+                await asyncio.sleep(0.1)
+                self.assertFalse(token.is_set())
+                t0 = time.monotonic()
+                with open(self.path, "w") as f:
+                    f.write("stop")
+                await asyncio.wait_for(token.wait(), timeout=5.0)
+                self.assertTrue(evt.is_set())
+                self.assertEqual(token.reason, "stop_file")
+                return time.monotonic() - t0
+            finally:
+                token.close()
+
+        return asyncio.run(scenario())
+
+    def test_native_watcher_fires(self):
+        self.assertLess(self._fires_on_stop_file(None), 2.0)
+
+    def test_poll_fallback_fires(self):
+        self.assertLess(self._fires_on_stop_file("poll"), 2.0)
+
+    def test_existing_file_and_manual_cancel(self):
+        async def scenario():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as f:
+                f.write("stop")
+            token = CancelToken(self.path).start()
+            self.assertTrue(token.is_set())
+            os.remove(self.path)
+            token = CancelToken(self.path, backend="poll").start()
+            token.cancel("manual")
+            token.cancel("again")
+            await asyncio.wait_for(token.wait(), timeout=1.0)
+            evt = asyncio.Event()
+            token.subscribe(evt)
+            token.close()
+            return token.reason, evt.is_set()
+
+        self.assertEqual(asyncio.run(scenario()), ("manual", True))
+
+
+class _FakePage:
+    def on(self, event, fn):
+        pass
+
+    def remove_listener(self, event, fn):
+        pass
+
+
+class CalendarWaitCancelTests(unittest.TestCase):
+    def test_cancel_cuts_calendar_wait_short(self):
+        async def scenario():
+            with tempfile.TemporaryDirectory() as tmp:
+                token = CancelToken(os.path.join(tmp, "stop.flag"), backend="poll").start()
+                watcher = scrape_core._CalendarFrameWatcher(_FakePage(), cancel=token)
+                asyncio.get_running_loop().call_later(0.05, token.cancel, "manual")
+                t0 = time.monotonic()
+                await watcher.wait(5000)
+                elapsed = time.monotonic() - t0
+                cancelled = watcher.cancelled
+                stats, _ = await scrape_core._count_calendar_stats_by_slots_async_loop(_FakePage(), watcher, max_wait_ms=5000)
+                watcher.close()
+                token.close()
+                return elapsed, cancelled, stats
+
+        elapsed, cancelled, stats = asyncio.run(scenario())
+        self.assertLess(elapsed, 1.0)
+        self.assertTrue(cancelled)
+        self.assertEqual(stats, {"ok": False, "reason": "cancelled"})
+
+
+class BreakerWaitCancelTests(unittest.TestCase):
+    def test_cancel_ends_open_breaker_wait(self):
+        url = "https://www.example.com/shop/A6ShopReservation/?girl_id=1"
+
+        async def scenario():
+            with tempfile.TemporaryDirectory() as tmp:
+                token = CancelToken(os.path.join(tmp, "stop.flag"), poll_s=0.05).start()
+                try:
+                    cb = scrape_core.HostCircuitBreaker(threshold=1, cooldown_s=600)
+                    cb.trip(url)
+                    sem = asyncio.Semaphore(1)
+
+                    async def worker():
+                        async with scrape_core._breaker_slot(cb, sem, url, cancel=token) as probe:
+                            return probe, token.is_set()
+
+                    task = asyncio.create_task(worker())
+                    await asyncio.sleep(0.1)
+                    self.assertFalse(task.done())
+                    t0 = time.monotonic()
+                    token.cancel("test")
+                    res = await asyncio.wait_for(task, timeout=2.0)
+                    return res, time.monotonic() - t0, cb.state(url)
+                finally:
+                    token.close()
+
+        (probe, cancelled), elapsed, state = asyncio.run(scenario())
+        self.assertEqual((probe, cancelled, state), (False, True, "open"))
+        self.assertLess(elapsed, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
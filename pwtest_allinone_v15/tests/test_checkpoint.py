@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+
+from core.checkpoint import RunCheckpoint, checkpoint_path, load_checkpoint, load_job_rows
+
+
+class CheckpointTests(unittest.TestCase):
+    def test_rows_and_done_markers_round_trip(self):
+        with tempfile.TemporaryDirectory() as d:
+            cp = RunCheckpoint(d)
+            cp.add_row(1, "A店", {"gid": "100", "stats": {"bell": 3}})
+            cp.add_row(1, "A店", {"gid": "101", "stats": {"bell": 1}})
+            cp.add_row(2, "B店", {"gid": "200", "stats": {"bell": 0}})
+            cp.mark_job_done(1, "A店", 2)
+            with open(checkpoint_path(d), "a", encoding="utf-8") as f:
+                f.write('{"type": "row", "job": 2, "gid": "201", "row": {"gid"')  # torn write
+            got = load_checkpoint(d)
+        self.assertEqual(got["done"], {1})
+        self.assertEqual(sorted(got["rows"][1]), ["100", "101"])
+        self.assertEqual(list(got["rows"][2]), ["200"])
+        self.assertEqual(got["rows"][1]["100"]["stats"]["bell"], 3)
+
+    def test_shard_checkpoints_are_merged(self):
+        with tempfile.TemporaryDirectory() as d:
+            RunCheckpoint(d, shard=0).add_row(1, "A店", {"gid": "100"})
+            s1 = RunCheckpoint(d, shard=1)
+            s1.add_row(2, "B店", {"gid": "200"})
+            s1.mark_job_done(2, "B店", 1)
+            self.assertTrue(checkpoint_path(d, 1).endswith("checkpoint.shard1.jsonl"))
+            got = load_checkpoint(d)
+        self.assertEqual(got["done"], {2})
+        self.assertEqual(list(got["rows"][1]), ["100"])
+        self.assertEqual(list(got["rows"][2]), ["200"])
+
+    def test_missing_checkpoint_is_empty(self):
+        with tempfile.TemporaryDirectory() as d:
+            self.assertEqual(load_checkpoint(d), {"rows": {}, "done": set()})
+            self.assertIsNone(load_job_rows(d, 1))
+
+    def test_load_job_rows_by_index(self):
+        with tempfile.TemporaryDirectory() as d:
+            os.makedirs(os.path.join(d, "jobs"))
+            for name, rows in (("01_A_current.json", [{"gid": "1"}]), ("01_A_prev.json", []), ("02_B_current.json", [])):
+                with open(os.path.join(d, "jobs", name), "w", encoding="utf-8") as f:
+                    json.dump(rows, f)
+            self.assertEqual(load_job_rows(d, 1), [{"gid": "1"}])
+            self.assertEqual(load_job_rows(d, 2), [])
+            self.assertIsNone(load_job_rows(d, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
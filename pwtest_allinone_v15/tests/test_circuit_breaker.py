@@ -0,0 +1,136 @@
+import asyncio
+import sys
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+from scrape_core import HostCircuitBreaker, _breaker_slot
+
+URL = "https://www.example.com/shop/A6ShopReservation/?girl_id=1"
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+class HostCircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cb = HostCircuitBreaker(threshold=2, window_s=60, cooldown_s=10, max_opens=2, clock=self.clock)
+
+    def _wait(self, timeout=0.2):
+        return asyncio.run(asyncio.wait_for(self.cb.wait(URL), timeout))
+
+    def test_opens_after_threshold_in_window(self):
+        self.cb.record(URL, blocked=True)
+        self.clock.t += 61
+        self.cb.record(URL, blocked=True)
+        self.assertEqual(self.cb.state(URL), "closed")
+        self.assertFalse(self._wait())
+        self.cb.record(URL, blocked=True)
+        self.assertEqual(self.cb.state(URL), "open")
+        with self.assertRaises(asyncio.TimeoutError):
+            self._wait(timeout=0.1)
+
+    def test_half_open_probe_closes_or_reopens(self):
+        self.cb.trip(URL)
+        self.clock.t += 10
+        self.assertTrue(self._wait())
+        self.assertEqual(self.cb.state(URL), "half_open")
+        # probe の結果待ちの間、他は通さない
+        with self.assertRaises(asyncio.TimeoutError):
+            self._wait(timeout=0.1)
+        self.cb.record(URL, blocked=True, probe=True)
+        self.assertEqual(self.cb.state(URL), "open")
+        self.assertTrue(self.cb.gave_up(URL))
+        self.clock.t += 19
+        with self.assertRaises(asyncio.TimeoutError):
+            self._wait(timeout=0.1)
+        self.clock.t += 1
+        self.assertTrue(self._wait())
+        self.cb.record(URL, blocked=False, probe=True)
+        self.assertEqual(self.cb.state(URL), "closed")
+        self.assertFalse(self.cb.gave_up(URL))
+        self.assertFalse(self._wait())
+
+    def test_probe_without_verdict_hands_over(self):
+        self.cb.trip(URL)
+        self.clock.t += 10
+        self.assertTrue(self._wait())
+        self.cb.record(URL, None, probe=True)
+        self.assertTrue(self._wait())
+        self.assertEqual(self.cb.stats(), {"www.example.com": {"state": "half_open", "opens": 1}})
+
+
+class BreakerSlotTests(unittest.TestCase):
+    def test_queued_workers_do_not_navigate_once_open(self):
+        cb = HostCircuitBreaker(threshold=1, cooldown_s=60)
+        navigated = []
+
+        async def worker(sem, n):
+            async with _breaker_slot(cb, sem, URL) as probe:
+                navigated.append((n, cb.state(URL), probe))
+                if n == 0:
+                    cb.record(URL, blocked=True)
+                await asyncio.sleep(0)
+
+        async def scenario():
+            sem = asyncio.Semaphore(1)
+            tasks = [asyncio.create_task(worker(sem, n)) for n in range(10)]
+            await asyncio.sleep(0.3)
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return sem.locked()
+
+        locked = asyncio.run(scenario())
+        self.assertEqual(navigated, [(0, "closed", False)])
+        self.assertEqual(cb.state(URL), "open")
+        self.assertFalse(locked)
+
+    def test_presets_share_one_page_budget(self):
+        # run_job は全プリセットに同じ page_sem を渡す: 並行プリセットを合わせても同時ページ数は枠まで
+        pages = {"now": 0, "peak": 0}
+        order = []
+
+        async def preset(name, sem, gids):
+            async def one(gid):
+                async with _breaker_slot(None, sem, URL):
+                    pages["now"] += 1
+                    pages["peak"] = max(pages["peak"], pages["now"])
+                    order.append(name)
+                    await asyncio.sleep(0.01)
+                    pages["now"] -= 1
+
+            await asyncio.gather(*[one(g) for g in gids])
+
+        async def scenario():
+            sem = asyncio.Semaphore(2)
+            await asyncio.gather(preset("A", sem, range(4)), preset("B", sem, range(4)))
+
+        asyncio.run(scenario())
+        self.assertEqual(pages["peak"], 2)
+        self.assertEqual(sorted(order), ["A"] * 4 + ["B"] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
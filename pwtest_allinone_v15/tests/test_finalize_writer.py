@@ -0,0 +1,71 @@
+import sys
+import threading
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+import scrape_core
+from scrape_core import FinalizeWriter
+
+
+class FinalizeWriterTests(unittest.TestCase):
+    def setUp(self):
+        self._log_event = scrape_core.log_event
+        self.logged = []
+        scrape_core.log_event = lambda level, msg, **kv: self.logged.append((level, msg))
+
+    def tearDown(self):
+        scrape_core.log_event = self._log_event
+
+    def test_runs_in_submit_order_and_survives_errors(self):
+        done = []
+        writer = FinalizeWriter()
+
+        def _boom():
+            raise ValueError("disk full")
+
+        writer.submit(done.append, 1)
+        writer.submit(_boom)
+        writer.submit(done.append, 2)
+        writer.flush()
+        self.assertEqual(done, [1, 2])
+        writer.submit(done.append, 3)
+        writer.close()
+        self.assertEqual(done, [1, 2, 3])
+        self.assertIn(("ERR", "finalize writer failed"), self.logged)
+
+    def test_wait_gid_blocks_until_queued_write_is_done(self):
+        gate = threading.Event()
+        written = []
+        writer = FinalizeWriter()
+        writer.submit(gate.wait)
+        writer.submit_gid("123", written.append, "123")
+        self.assertTrue(writer.pending("123"))
+        self.assertFalse(writer.pending("456"))
+        self.assertTrue(writer.wait_gid("456", timeout=0.1))
+        # 前の書き込みが詰まっている間は、その gid を読む側は待たされる
+        self.assertFalse(writer.wait_gid("123", timeout=0.1))
+        gate.set()
+        self.assertTrue(writer.wait_gid("123", timeout=5))
+        self.assertEqual(written, ["123"])
+        self.assertFalse(writer.pending("123"))
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
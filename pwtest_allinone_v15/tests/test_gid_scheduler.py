@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+from scrape_core import GidScheduler, _calendar_volatility
+
+NOW = time.mktime(time.strptime("20240110_120000", "%Y%m%d_%H%M%S"))
+
+
+class GidSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "deferred.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_priority_prefers_unknown_then_rank_volatility_staleness(self):
+        sch = GidScheduler(deferred_path=self.path)
+        fresh_top = {"ts": "20240110_110000", "rank_percentile": 1.0, "calendar_volatility": 0.0}
+        fresh_low = {"ts": "20240110_110000", "rank_percentile": 0.1, "calendar_volatility": 0.0}
+        stale_low = {"ts": "20240107_120000", "rank_percentile": 0.1, "calendar_volatility": 1.0}
+        p = {k: sch.priority("b::" + k, v, now=NOW) for k, v in (("top", fresh_top), ("low", fresh_low), ("stale", stale_low))}
+        self.assertGreater(sch.priority("b::new", None, now=NOW), max(p.values()))
+        self.assertGreater(p["top"], p["low"])
+        self.assertGreater(p["stale"], p["low"])
+
+    def test_deferred_gids_come_first_next_run_and_budget_expires(self):
+        sch = GidScheduler(time_budget_s=0.01, deferred_path=self.path)
+        time.sleep(0.02)
+        self.assertTrue(sch.expired())
+        sch.defer("b::7", "A店")
+        sch.save()
+        nxt = GidScheduler(deferred_path=self.path)
+        self.assertFalse(nxt.expired())
+        self.assertEqual(nxt.priority("b::7", None), 2.0)
+        nxt.done("b::7")
+        nxt.save()
+        self.assertEqual(GidScheduler(deferred_path=self.path).priority("b::7", None), 1.5)
+
+    def test_volatility_smooths_changes(self):
+        prev = {"stats_by_date": {"d1": {"bell": 1}, "d2": {"bell": 2}}, "calendar_volatility": 0.0}
+        self.assertEqual(_calendar_volatility(prev, {"d1": {"bell": 1}, "d2": {"bell": 3}}), 0.25)
+        self.assertEqual(_calendar_volatility(None, {}), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from core.list_cache import ListCache, list_page_fingerprint
+
+URL = "https://www.example.com/shop/girllist/"
+PAGE1 = [["1", "あい"], ["2", "かな"]]
+FULL = PAGE1 + [["3", "さき"], ["4", "たえ"]]
+
+
+class ListCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "list_cache.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprint_is_order_sensitive(self):
+        self.assertEqual(list_page_fingerprint(PAGE1), list_page_fingerprint([("1", "あい"), ("2", "かな")]))
+        self.assertNotEqual(list_page_fingerprint(PAGE1), list_page_fingerprint(PAGE1[::-1]))
+
+    def test_hit_requires_same_page1_and_freshness(self):
+        cache = ListCache(self.path, ttl_hours=1)
+        fp = list_page_fingerprint(PAGE1)
+        cache.put(URL, fp, FULL, max_items=4, now=1000.0)
+        self.assertEqual(cache.get(URL, fp, 4, now=1000.0 + 60), FULL)
+        self.assertEqual(cache.get(URL, fp, 3, now=1000.0 + 60), FULL[:3])
+        self.assertIsNone(cache.get(URL, list_page_fingerprint(FULL[:1]), 4, now=1000.0 + 60))
+        self.assertIsNone(cache.get(URL, fp, 4, now=1000.0 + 3601))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_larger_limit_needs_complete_roster(self):
+        cache = ListCache(self.path, ttl_hours=1)
+        fp = list_page_fingerprint(PAGE1)
+        cache.put(URL, fp, FULL, max_items=4)
+        self.assertIsNone(cache.get(URL, fp, 10))
+        cache.put(URL, fp, FULL, max_items=60)
+        self.assertEqual(cache.get(URL, fp, 100), FULL)
+
+    def test_save_and_reload(self):
+        cache = ListCache(self.path, ttl_hours=1)
+        fp = list_page_fingerprint(PAGE1)
+        cache.put(URL, fp, FULL, max_items=4)
+        self.assertTrue(cache.save())
+        self.assertEqual(ListCache(self.path, ttl_hours=1).get(URL, fp, 4), FULL)
+
+
+if __name__ == "__main__":
+    unittest.main()
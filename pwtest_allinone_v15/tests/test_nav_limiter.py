@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+from scrape_core import AsyncAdaptiveNavLimiter
+
+URL = "https://www.example.com/shop/A6ShopReservation/?girl_id=1"
+
+
+class AdaptiveNavLimiterTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "nav_rate.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _limiter(self, **kw):
+        kw.setdefault("min_interval_ms", 1000)
+        kw.setdefault("floor_ms", 100)
+        kw.setdefault("max_interval_ms", 4000)
+        return AsyncAdaptiveNavLimiter(state_path=self.path, **kw)
+
+    def test_speeds_up_on_success_and_backs_off_on_block(self):
+        lim = self._limiter()
+        for _ in range(10):
+            lim.report(URL, ok=True, latency_s=0.5)
+        fast = lim.interval_ms(URL)
+        self.assertLess(fast, 1000)
+        lim.report(URL, ok=False, blocked=True)
+        self.assertAlmostEqual(lim.interval_ms(URL), fast * 2, delta=2)
+        for _ in range(20):
+            lim.report(URL, ok=False, blocked=True)
+        self.assertEqual(lim.interval_ms(URL), 4000)
+
+    def test_latency_spike_backs_off(self):
+        lim = self._limiter()
+        lim.report(URL, ok=True, latency_s=0.5)
+        before = lim.interval_ms(URL)
+        lim.report(URL, ok=True, latency_s=5.0)
+        self.assertGreater(lim.interval_ms(URL), before)
+        self.assertEqual(lim.stats()["www.example.com"]["slow"], 1)
+
+    def test_learned_rate_persists_per_host(self):
+        lim = self._limiter()
+        for _ in range(10):
+            lim.report(URL, ok=True)
+        learned = lim.interval_ms(URL)
+        lim.save()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["www.example.com"]["interval_ms"], learned)
+        again = self._limiter()
+        self.assertEqual(again.interval_ms(URL), learned)
+        self.assertEqual(again.interval_ms("https://other.example.net/"), 1000)
+
+    def test_wait_turn_spaces_requests(self):
+        lim = self._limiter(min_interval_ms=100, floor_ms=50)
+
+        async def _go():
+            t0 = time.perf_counter()
+            for _ in range(3):
+                await lim.wait_turn(URL)
+            return time.perf_counter() - t0
+
+        self.assertGreaterEqual(asyncio.run(_go()), 0.18)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from core.negative_cache import NegativeCache, is_negative_reason
+
+KEY = "https://www.example.com/shop::123"
+
+
+class NegativeCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "negative_cache.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_negative_reasons(self):
+        self.assertTrue(is_negative_reason("not_reservable(page:予約できません)"))
+        self.assertTrue(is_negative_reason("calendar_not_present(iframe_no_src)"))
+        self.assertTrue(is_negative_reason("iframe_missing"))
+        self.assertFalse(is_negative_reason("sanity_failed"))
+        self.assertFalse(is_negative_reason(None))
+
+    def test_skip_until_ttl_then_expire(self):
+        cache = NegativeCache(self.path, ttl_hours=1, recheck_ratio=0.0)
+        cache.observe(KEY, ok=False, reason="iframe_missing", now=1000.0)
+        cache.observe("other", ok=False, reason="timeout", now=1000.0)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.should_skip(KEY, now=1000.0 + 1800)[0], True)
+        self.assertEqual(cache.should_skip(KEY, now=1000.0 + 3601), (False, None))
+        self.assertEqual(len(cache), 0)
+
+    def test_recheck_sampling_and_clear_on_success(self):
+        draws = iter([0.05, 0.5])
+        cache = NegativeCache(self.path, ttl_hours=1, recheck_ratio=0.1, rng=lambda: next(draws))
+        cache.observe(KEY, ok=False, reason="not_reservable(error_page)")
+        skip, ent = cache.should_skip(KEY)
+        self.assertFalse(skip)
+        self.assertEqual(ent["reason"], "not_reservable(error_page)")
+        self.assertTrue(cache.should_skip(KEY)[0])
+        self.assertEqual((cache.rechecked, cache.skipped), (1, 1))
+        cache.observe(KEY, ok=True)
+        self.assertIsNone(cache.get(KEY))
+
+    def test_persists_between_runs(self):
+        cache = NegativeCache(self.path, ttl_hours=24)
+        cache.observe(KEY, ok=False, reason="iframe_missing")
+        cache.observe(KEY, ok=False, reason="iframe_missing")
+        self.assertTrue(cache.save())
+        self.assertFalse(cache.save())
+        again = NegativeCache(self.path, ttl_hours=24, recheck_ratio=0.0)
+        self.assertEqual(again.get(KEY)["hits"], 2)
+        self.assertTrue(again.should_skip(KEY)[0])
+
+    def test_save_keeps_entries_from_other_processes(self):
+        a = NegativeCache(self.path, ttl_hours=24)
+        b = NegativeCache(self.path, ttl_hours=24)
+        a.observe(KEY, ok=False, reason="iframe_missing")
+        b.observe("other::1", ok=False, reason="iframe_missing")
+        a.save()
+        b.save()
+        merged = NegativeCache(self.path, ttl_hours=24)
+        self.assertIsNotNone(merged.get(KEY))
+        self.assertIsNotNone(merged.get("other::1"))
+        merged.observe(KEY, ok=True)
+        merged.save()
+        self.assertIsNone(NegativeCache(self.path, ttl_hours=24).get(KEY))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import sys
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+from scrape_core import AsyncPagePool
+
+
+class _Page:
+    def __init__(self, fail_goto=False):
+        self.closed = False
+        self.fail_goto = fail_goto
+        self.urls = []
+
+    def is_closed(self):
+        return self.closed
+
+    def set_default_navigation_timeout(self, ms):
+        pass
+
+    async def goto(self, url, timeout=None):
+        if self.fail_goto:
+            raise RuntimeError("target closed")
+        self.urls.append(url)
+
+    async def close(self):
+        self.closed = True
+
+
+class _Context:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = _Page()
+        self.pages.append(page)
+        return page
+
+
+class AsyncPagePoolTests(unittest.TestCase):
+    def test_released_page_is_reset_and_reused(self):
+        async def scenario():
+            pool = AsyncPagePool(_Context(), size=1)
+            page, hit = await pool.acquire()
+            self.assertFalse(hit)
+            await pool.release(page)
+            self.assertEqual(page.urls, ["about:blank"])
+            again, hit = await pool.acquire()
+            self.assertIs(again, page)
+            self.assertTrue(hit)
+            return pool.stats()
+
+        self.assertEqual(asyncio.run(scenario()), {"hits": 1, "misses": 1, "discards": 0, "idle": 0, "hit_rate": 0.5})
+
+    def test_closed_or_broken_pages_are_discarded(self):
+        async def scenario():
+            ctx = _Context()
+            pool = AsyncPagePool(ctx, size=2)
+            a, _ = await pool.acquire()
+            b, _ = await pool.acquire()
+            a.closed = True
+            b.fail_goto = True
+            await pool.release(a)
+            await pool.release(b)
+            self.assertTrue(b.closed)
+            self.assertEqual(pool.stats()["idle"], 0)
+            self.assertEqual(pool.opened(), [])
+            c, hit = await pool.acquire()
+            self.assertFalse(hit)
+            return pool.stats()["discards"], len(ctx.pages)
+
+        self.assertEqual(asyncio.run(scenario()), (2, 3))
+
+    def test_idle_pages_closed_elsewhere_are_skipped(self):
+        async def scenario():
+            pool = AsyncPagePool(_Context(), size=3)
+            pages = [(await pool.acquire())[0] for _ in range(3)]
+            for p in pages:
+                await pool.release(p)
+            pages[2].closed = True
+            page, hit = await pool.acquire()
+            self.assertTrue(hit)
+            self.assertIs(page, pages[1])
+            await pool.close()
+            self.assertTrue(pages[0].closed)
+            self.assertFalse(page.closed)
+
+        asyncio.run(scenario())
+
+    def test_keeps_at_most_size_idle_pages(self):
+        async def scenario():
+            pool = AsyncPagePool(_Context(), size=1)
+            a, _ = await pool.acquire()
+            b, _ = await pool.acquire()
+            await pool.release(a)
+            await pool.release(b)
+            return a.closed, b.closed, pool.stats()["idle"]
+
+        self.assertEqual(asyncio.run(scenario()), (False, True, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
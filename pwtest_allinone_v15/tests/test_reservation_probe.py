@@ -0,0 +1,103 @@
+import asyncio
+import sys
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+import scrape_core
+from scrape_core import _is_not_reservable_page_async, _reservation_page_probe_async, _should_skip_login_like
+
+PAGE_URL = "https://www.example.com/shop/girlid-1/"
+
+
+class _Frame:
+    def __init__(self, name, url):
+        self.name = name
+        self.url = url
+
+
+class _Page:
+    def __init__(self, frames=()):
+        self.frames = list(frames)
+        self.url = PAGE_URL
+
+    def frame(self, name=None):
+        return next((f for f in self.frames if f.name == name), None)
+
+
+def _signals(**kw):
+    sig = {"url": PAGE_URL, "err_msg": "", "body_txt": "", "has_table": False, "iframe": False, "iframe_src": "",
+           "iframe_src_abs": "", "iframe_name": "", "iframe_h": 0, "has_reserve_ui": False, "link": False,
+           "iframe_hint": False, "frames": []}
+    sig.update(kw)
+    return sig
+
+
+class ReservationProbeTests(unittest.TestCase):
+    def test_calendar_table_in_frame(self):
+        fr = _Frame("pcreserveiframe", "https://yoyaku.cityheaven.net/calendar/1")
+        sig = _signals(iframe=True, iframe_name="pcreserveiframe", body_txt="別の女の子",
+                       frames=[{"frame": fr, "url": fr.url, "name": fr.name, "has_table": True}])
+        probe = asyncio.run(_reservation_page_probe_async(_Page([fr]), signals=sig))
+        self.assertTrue(probe["has_calendar_table"])
+        self.assertTrue(probe["text_hit"])
+        self.assertFalse(probe["not_reservable"])
+        self.assertEqual(probe["iframe_frame_url"], fr.url)
+
+    def test_login_iframe(self):
+        fr = _Frame("pcreserveiframe", "https://www.example.com/S6ShareToReservationLogin/")
+        sig = _signals(iframe=True, iframe_name="pcreserveiframe", iframe_src=fr.url, iframe_h=120,
+                       frames=[{"frame": fr, "url": fr.url, "name": fr.name}])
+        probe = asyncio.run(_reservation_page_probe_async(_Page([fr]), signals=sig))
+        self.assertTrue(probe["login_like"])
+        self.assertTrue(_should_skip_login_like(probe))
+
+    def test_not_reservable_needs_reserve_ui_on_page(self):
+        page = _Page()
+        sig = _signals(err_msg="該当の女の子は予約できません")
+        self.assertEqual(asyncio.run(_is_not_reservable_page_async(page, signals=sig)), (False, ""))
+        sig["has_reserve_ui"] = True
+        self.assertEqual(asyncio.run(_is_not_reservable_page_async(page, signals=sig)), (True, "page:予約できません/該当の女の子"))
+
+    def test_not_reservable_in_frame(self):
+        fr = {"url": "https://yoyaku.cityheaven.net/error/EFRESV01", "name": "pcreserveiframe"}
+        ok, why = asyncio.run(_is_not_reservable_page_async(_Page(), signals=_signals(frames=[fr])))
+        self.assertTrue(ok)
+        self.assertEqual(why, "frame[pcreserveiframe]:url_error")
+
+    def test_counter_reuses_callers_signals(self):
+        calls = []
+        orig = scrape_core._collect_page_signals_async
+
+        async def collect(page):
+            calls.append(page)
+            return _signals()
+
+        scrape_core._collect_page_signals_async = collect
+        try:
+            fr = {"url": "https://yoyaku.cityheaven.net/error/EFRESV01", "name": "pcreserveiframe"}
+            stats, frame_url = asyncio.run(scrape_core.count_calendar_stats_by_slots_async(_Page(), signals=_signals(frames=[fr])))
+        finally:
+            scrape_core._collect_page_signals_async = orig
+        self.assertEqual(calls, [])
+        self.assertEqual(stats, {"ok": False, "reason": "not_reservable(frame[pcreserveiframe]:url_error)"})
+        self.assertIsNone(frame_url)
+
+
+if __name__ == "__main__":
+    unittest.main()
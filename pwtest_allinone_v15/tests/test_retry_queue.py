@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+
+from core.retry_queue import RetryQueue
+
+
+class RetryQueueTests(unittest.TestCase):
+    def test_backoff_is_exponential_jittered_and_capped(self):
+        q = RetryQueue(base_delay_s=2.0, max_delay_s=10.0, rng=lambda: 0.0)
+        self.assertEqual([q.delay_s(n) for n in (1, 2, 3, 4)], [1.0, 2.0, 4.0, 5.0])
+        q = RetryQueue(base_delay_s=2.0, max_delay_s=10.0, rng=lambda: 0.999)
+        self.assertLess(q.delay_s(1), 2.0)
+        self.assertGreater(q.delay_s(1), 1.9)
+
+    def test_attempt_and_run_budget(self):
+        q = RetryQueue(max_attempts=2, budget=3)
+        self.assertTrue(q.push("A", "1", now=0.0))
+        self.assertTrue(q.push("A", "1", now=0.0))
+        self.assertFalse(q.push("A", "1", now=0.0))
+        self.assertTrue(q.push("B", "2", now=0.0))
+        self.assertFalse(q.push("B", "3", now=0.0))
+        self.assertEqual((q.pushed, q.exhausted), (3, 2))
+        self.assertEqual((q.pending("A"), q.pending("B")), (2, 1))
+
+    def test_drain_only_owner_and_repushes(self):
+        q = RetryQueue(max_attempts=2, base_delay_s=0.0, rng=lambda: 0.0)
+        q.push("A", "1")
+        q.push("A", "2")
+        q.push("B", "9")
+        seen = []
+
+        async def fn(key):
+            seen.append(key)
+            if key == "1":
+                q.push("A", key)
+
+        calls = asyncio.run(q.drain("A", fn))
+        self.assertEqual(calls, 3)
+        self.assertEqual(sorted(seen), ["1", "1", "2"])
+        self.assertEqual(q.exhausted, 1)
+        self.assertEqual(q.pending("A"), 0)
+        self.assertEqual(q.pending("B"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import sys
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+import scrape_core
+from scrape_core import ROUTE_PROFILES, RouteStats, _route_profile_name, _site_domain
+
+
+class RouteProfileTests(unittest.TestCase):
+    def test_profile_by_frame_url(self):
+        self.assertEqual(_route_profile_name("https://www.cityheaven.net/tokyo/A1/shop/A6ShopReservation/?girl_id=1"), "reservation")
+        self.assertEqual(_route_profile_name("https://yoyaku.cityheaven.net/calendar/123/"), "calendar")
+        self.assertEqual(_route_profile_name("https://www.cityheaven.net/tokyo/A1/shop/girllist/"), "list")
+        self.assertEqual(_route_profile_name(""), "list")
+        self.assertEqual(_site_domain("https://yoyaku.cityheaven.net/js/a.js"), _site_domain("https://www.cityheaven.net/"))
+
+    def test_site_domain_keeps_second_level_country_domains_apart(self):
+        self.assertEqual(_site_domain("https://www.example.co.jp/a"), "example.co.jp")
+        self.assertNotEqual(_site_domain("https://ads.tracker.co.jp/t.js"), _site_domain("https://www.example.co.jp/"))
+        self.assertEqual(_site_domain("https://cdn.example.co.jp/x.js"), _site_domain("https://www.example.co.jp/"))
+        self.assertEqual(_site_domain("https://example.jp/"), "example.jp")
+        self.assertEqual(_site_domain("https://a.b.example.com./"), "example.com")
+
+    def test_counts_and_bytes_saved(self):
+        rs = RouteStats()
+        rs.note_blocked("reservation", "stylesheet")
+        rs.note_blocked("reservation", "script")
+        rs.note_blocked("list", "beacon")
+        out = rs.summary()
+        self.assertEqual(out["reservation"]["blocked"], 2)
+        self.assertEqual(out["reservation"]["bytes_saved_est"], 110000)
+        self.assertEqual(out["list"]["bytes_saved_est"], 5000)
+
+    def test_low_sanity_pass_rate_falls_back_to_list_profile(self):
+        rs = RouteStats(min_samples=4, min_pass_rate=0.75)
+        self.assertIn("stylesheet", rs.profile("reservation")["types"])
+        for ok in (True, True, False, False):
+            rs.note_sanity("reservation", ok)
+        self.assertIn("reservation", rs.disabled)
+        self.assertIs(rs.profile("reservation"), ROUTE_PROFILES["list"])
+        self.assertEqual(rs.summary()["reservation"]["sanity_pass_rate"], 0.5)
+        rs.reset()
+        self.assertIsNot(rs.profile("reservation"), ROUTE_PROFILES["list"])
+
+    def test_disabled_by_config(self):
+        rs = RouteStats()
+        rs.enabled = False
+        self.assertIs(rs.profile("reservation"), ROUTE_PROFILES["list"])
+        self.assertIsInstance(scrape_core._ROUTE_STATS, RouteStats)
+
+
+if __name__ == "__main__":
+    unittest.main()
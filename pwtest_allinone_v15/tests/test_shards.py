@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+import scrape_core
+
+
+class ShardJobIndicesTests(unittest.TestCase):
+    def test_round_robin_partition_covers_every_preset_once(self):
+        parts = [scrape_core._shard_job_indices(7, shard=(k, 3)) for k in range(3)]
+        self.assertEqual(parts, [[1, 4, 7], [2, 5], [3, 6]])
+        self.assertEqual(sorted(i for p in parts for i in p), list(range(1, 8)))
+
+    def test_unsharded_and_explicit_indices(self):
+        self.assertEqual(scrape_core._shard_job_indices(3), [1, 2, 3])
+        # --queue-worker: 割り振りより job_indices が優先、範囲外は無視
+        self.assertEqual(scrape_core._shard_job_indices(3, shard=(1, 2), job_indices=[1, 5]), [1])
+
+
+class PrepareShardWorkerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._saved = (scrape_core.DATA_ROOT, scrape_core.PROFILE_DIR)
+        scrape_core.DATA_ROOT = os.path.join(self.tmp.name, "score_data")
+        scrape_core.PROFILE_DIR = ""
+
+    def tearDown(self):
+        scrape_core.DATA_ROOT, scrape_core.PROFILE_DIR = self._saved
+        self.tmp.cleanup()
+
+    def test_sharded_session_never_attaches_daemon(self):
+        cfg = {"auto": {"browser_daemon": True}}
+        scrape_core._prepare_shard_worker(cfg, 0, 1)
+        session = scrape_core._browser_session_from_config(cfg, headless=True, minimize_browser=False)
+        self.assertFalse(session.attach_daemon)
+        cfg = {"auto": {"browser_daemon": True}}
+        scrape_core._prepare_shard_worker(cfg, 1, 3)
+        session = scrape_core._browser_session_from_config(cfg, headless=True, minimize_browser=False)
+        self.assertFalse(session.attach_daemon)
+
+    def test_intervals_are_scaled_by_shard_count(self):
+        cfg = {"auto": {"min_nav_interval_ms": 500}}
+        scrape_core._prepare_shard_worker(cfg, 0, 3)
+        self.assertEqual(cfg["auto"]["min_nav_interval_ms"], 1500)
+        self.assertEqual(cfg["auto"]["nav_interval_floor_ms"], 750)
+
+    def test_later_shards_use_a_copy_of_the_profile(self):
+        profile = os.path.join(self.tmp.name, "pw_profile")
+        os.makedirs(os.path.join(profile, "Default", "Cache"))
+        for name in ("Default/Cookies", "Default/Cache/data", "SingletonLock"):
+            with open(os.path.join(profile, name), "w") as f:
+                f.write("x")
+        scrape_core.PROFILE_DIR = profile
+        scrape_core._prepare_shard_worker({}, 0, 2)
+        self.assertEqual(scrape_core.PROFILE_DIR, profile)
+        scrape_core._prepare_shard_worker({}, 1, 2)
+        copy = scrape_core.PROFILE_DIR
+        self.assertEqual(copy, os.path.join(scrape_core.DATA_ROOT, "shard_profiles", "shard1"))
+        self.assertTrue(os.path.exists(os.path.join(copy, "Default", "Cookies")))
+        self.assertFalse(os.path.exists(os.path.join(copy, "Default", "Cache")))
+        self.assertFalse(os.path.exists(os.path.join(copy, "SingletonLock")))
+        # --queue-worker は 1 件ごとに呼ぶ: 使用中のコピーはそのまま
+        scrape_core._prepare_shard_worker({}, 1, 2)
+        self.assertEqual(scrape_core.PROFILE_DIR, copy)
+
+
+class MergeShardResultsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.run_dir = self.tmp.name
+        os.makedirs(os.path.join(self.run_dir, "jobs"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_rows(self, job_i, rows):
+        with open(os.path.join(self.run_dir, "jobs", f"{job_i:02d}_p{job_i}_current.json"), "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+
+    def test_rows_from_every_shard_without_error_rows(self):
+        self._write_rows(1, [{"name": "a"}, {"name": "[ERROR] p1"}])
+        self._write_rows(2, [{"name": "b"}])
+        self._write_rows(3, [{"name": "c"}])
+        rows, status, stop_reason, failed = scrape_core._merge_shard_results(
+            self.run_dir, 3, [{"status": "done"}, {"status": "done"}], [0, 0]
+        )
+        self.assertEqual([r["name"] for r in rows], ["a", "b", "c"])
+        self.assertEqual((status, stop_reason, failed), ("done", None, []))
+
+    def test_status_priority_and_failed_shards(self):
+        _, status, stop_reason, failed = scrape_core._merge_shard_results(
+            self.run_dir, 0, [{"status": "blocked", "stop_reason": "blocked"}, {"status": "stopped"}, {}], [0, 0, 0]
+        )
+        self.assertEqual((status, stop_reason, failed), ("stopped", "blocked", [2]))
+        _, status, stop_reason, failed = scrape_core._merge_shard_results(
+            self.run_dir, 0, [{"status": "done"}, {"status": "done"}], [0, 1]
+        )
+        self.assertEqual((status, stop_reason, failed), ("done", "shard_failed", [1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
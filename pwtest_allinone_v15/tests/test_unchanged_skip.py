@@ -0,0 +1,48 @@
+import sys
+import types
+import unittest
+
+if "playwright.sync_api" not in sys.modules:
+    sync_api = types.ModuleType("playwright.sync_api")
+
+    class DummyTimeoutError(Exception):
+        pass
+
+    def sync_playwright():
+        raise RuntimeError("playwright not available in test environment")
+
+    sync_api.sync_playwright = sync_playwright
+    sync_api.TimeoutError = DummyTimeoutError
+    playwright = types.ModuleType("playwright")
+    playwright.sync_api = sync_api
+    sys.modules["playwright"] = playwright
+    sys.modules["playwright.sync_api"] = sync_api
+
+from scrape_core import _calendar_fingerprint, _reusable_scoring
+
+STATS = {"ok": True, "total_slots": 238, "bookable_slots": 200, "bell": 102, "tel": 34, "dash": 34, "other": 0,
+         "excluded_slots": 0, "time_rows": 34, "max_cols": 7, "td_count": 238}
+BY_DATE = {"2024-01-10": {"bell": 34, "maru": 0, "tel": 0, "other": 0}}
+
+
+class UnchangedSkipTests(unittest.TestCase):
+    def test_fingerprint_tracks_signature_and_dates(self):
+        fp = _calendar_fingerprint(STATS, BY_DATE)
+        self.assertEqual(fp, _calendar_fingerprint(dict(STATS, elapsed_ms=5), dict(BY_DATE)))
+        self.assertNotEqual(fp, _calendar_fingerprint(dict(STATS, bell=101), BY_DATE))
+        changed = {"2024-01-10": {"bell": 33, "maru": 1, "tel": 0, "other": 0}}
+        self.assertNotEqual(fp, _calendar_fingerprint(STATS, changed))
+        self.assertEqual(_calendar_fingerprint({"ok": False}, BY_DATE), "")
+
+    def test_reuse_only_same_day_and_same_fingerprint(self):
+        fp = _calendar_fingerprint(STATS, BY_DATE)
+        prev = {"ts": "20240110_090000", "calendar_fp": fp, "scoring": {"big_score": 0.4, "rank_score_raw": 0.3}}
+        reuse = _reusable_scoring(prev, fp, today="20240110")
+        self.assertEqual((reuse["big_score"], reuse["rank_score_raw"]), (0.4, 0.3))
+        self.assertIsNone(_reusable_scoring(prev, fp, today="20240111"))
+        self.assertIsNone(_reusable_scoring(prev, "other", today="20240110"))
+        self.assertIsNone(_reusable_scoring(dict(prev, scoring=None), fp, today="20240110"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from core.work_queue import SqliteWorkQueue, WorkQueue, open_work_queue
+
+
+class SqliteWorkQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "q", "work_queue.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_base_class_is_abstract(self):
+        with self.assertRaises(TypeError):
+            WorkQueue()
+        self.assertIsInstance(open_work_queue(self.path), WorkQueue)
+
+    def test_lease_is_exclusive_and_complete_records_result(self):
+        q = open_work_queue(self.path)
+        self.assertEqual(q.enqueue("r1", [("01", {"name": "A"}), ("02", {"name": "B"})]), 2)
+        self.assertEqual(q.enqueue("r1", [("01", {"name": "A"})]), 0)
+        a = q.lease("w1", 60, now=100.0)
+        b = SqliteWorkQueue(self.path).lease("w2", 60, now=100.0)
+        self.assertEqual((a["key"], b["key"]), ("01", "02"))
+        self.assertIsNone(q.lease("w3", 60, now=100.0))
+        self.assertFalse(q.complete(a["id"], "w2", {"rows": []}))
+        self.assertTrue(q.complete(a["id"], "w1", {"rows": [{"gid": "1"}]}))
+        self.assertEqual(q.counts("r1"), {"done": 1, "leased": 1})
+        res = {x["key"]: x for x in q.results("r1")}
+        self.assertEqual(res["01"]["result"], {"rows": [{"gid": "1"}]})
+        self.assertEqual(res["02"]["payload"], {"name": "B"})
+
+    def test_expired_lease_moves_to_next_worker(self):
+        q = SqliteWorkQueue(self.path, max_attempts=2)
+        q.enqueue("r1", [("01", {})])
+        first = q.lease("w1", 10, now=100.0)
+        self.assertTrue(q.heartbeat(first["id"], "w1", 10, now=105.0))
+        self.assertIsNone(q.lease("w2", 10, now=114.0))
+        second = q.lease("w2", 10, now=116.0)
+        self.assertEqual((second["id"], second["attempt"]), (first["id"], 2))
+        self.assertFalse(q.heartbeat(first["id"], "w1", 10, now=117.0))
+        self.assertFalse(q.complete(first["id"], "w1", {}))
+        self.assertIsNone(q.lease("w3", 10, now=200.0))
+        self.assertEqual(q.counts("r1"), {"failed": 1})
+
+    def test_fail_retries_until_attempts_run_out_and_cancel(self):
+        q = SqliteWorkQueue(self.path, max_attempts=2)
+        q.enqueue("r1", [("01", {})])
+        q.enqueue("r2", [("01", {})])
+        it = q.lease("w1", 10, now=1.0)
+        self.assertTrue(q.fail(it["id"], "w1", "boom"))
+        it = q.lease("w1", 10, now=2.0)
+        self.assertEqual(it["attempt"], 2)
+        q.fail(it["id"], "w1", "boom again")
+        self.assertEqual(q.counts("r1"), {"failed": 1})
+        self.assertEqual(q.results("r1")[0]["error"], "boom again")
+        self.assertEqual(q.lease("w1", 10, now=3.0, run_id="r1"), None)
+        self.assertEqual(q.cancel("r2"), 1)
+        self.assertIsNone(q.lease("w1", 10, now=3.0))
+
+
+if __name__ == "__main__":
+    unittest.main()